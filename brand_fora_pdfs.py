@@ -4,12 +4,25 @@ Adds SEAL Enterprises branding/contact info to FORA PDFs
 """
 
 from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    NameObject,
+)
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.colors import HexColor
 import io
 import os
 
+# Resource name the shared branding Form XObject is registered under on every page
+BRANDING_XOBJECT = NameObject('/SealBranding')
+# PdfWriter has no public way to add or replace an object, so the streams below go
+# through its internals (_add_object, _objects); this is the release that was tested
+PYPDF2_VERSION = '3.0.1'
+
 
 def create_branding_overlay():
     """Create a PDF overlay with your branding"""
@@ -30,26 +43,97 @@ def create_branding_overlay():
     return PdfReader(packet)
 
 
-def add_branding_to_pdf(input_pdf, output_pdf):
-    """Add your branding to a FORA PDF"""
+def _stream(writer, data):
+    """Add a Flate-compressed content stream to the writer and return its reference"""
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return writer._add_object(stream.flate_encode())
+
+
+def _add_branding_xobject(writer, branding_page):
+    """Register the overlay once as a Form XObject shared by every page"""
+    form = DecodedStreamObject()
+    form.set_data(branding_page.get_contents().get_data())
+    form = form.flate_encode()
+    form.update({
+        NameObject('/Type'): NameObject('/XObject'),
+        NameObject('/Subtype'): NameObject('/Form'),
+        NameObject('/BBox'): ArrayObject([FloatObject(v) for v in branding_page.mediabox]),
+        NameObject('/Resources'): branding_page['/Resources'].get_object().clone(writer),
+    })
+    return writer._add_object(form)
+
+
+def _compressed_contents(writer, page):
+    """Return the page's content stream references, Flate-compressing raw streams
+    in place: the compressed stream replaces the raw one under its existing
+    reference, so the uncompressed copy is not written as well"""
+    contents = page.get('/Contents')
+    if contents is None:
+        return []
+    refs = list(contents.get_object()) if isinstance(contents.get_object(), ArrayObject) else [contents]
+    compressed = []
+    for ref in refs:
+        stream = ref.get_object()
+        if getattr(ref, 'pdf', None) is not writer:
+            # direct stream (or one not yet in the writer): add it, compressed
+            ref = writer._add_object(stream if '/Filter' in stream else stream.flate_encode())
+        elif '/Filter' not in stream:
+            encoded = stream.flate_encode()
+            encoded.indirect_reference = ref
+            writer._objects[ref.idnum - 1] = encoded
+        compressed.append(ref)
+    return compressed
+
+
+def add_branding_to_pdf(input_pdf, output_pdf, branding=None):
+    """Add your branding to a FORA PDF
+
+    Instead of merging the overlay's operators into every page (which parses and
+    rewrites each page's content), the overlay is stored once as a Form XObject
+    and each page just draws it by reference. The same wrapper streams are
+    shared across pages, so the branding adds a few bytes per page at most.
+    """
     
     if not os.path.exists(input_pdf):
         print(f"Error: {input_pdf} not found")
         return False
     
     try:
-        # Read original PDF
+        # Read original PDF (pages are loaded lazily)
         reader = PdfReader(input_pdf)
         writer = PdfWriter()
         
         # Create branding overlay
-        branding = create_branding_overlay()
-        branding_page = branding.pages[0]
+        if branding is None:
+            branding = create_branding_overlay()
+        branding_ref = _add_branding_xobject(writer, branding.pages[0])
+        
+        # Isolate the original page's graphics state, then draw the shared overlay
+        save_state = _stream(writer, b'q\n')
+        draw_branding = {}
         
         # Add branding to each page
         for page in reader.pages:
-            page.merge_page(branding_page)
-            writer.add_page(page)
+            page = writer.add_page(page)
+            
+            if '/Resources' not in page:
+                page[NameObject('/Resources')] = DictionaryObject()
+            resources = page['/Resources'].get_object()
+            if '/XObject' not in resources:
+                resources[NameObject('/XObject')] = DictionaryObject()
+            resources['/XObject'].get_object()[BRANDING_XOBJECT] = branding_ref
+            
+            origin = (float(page.mediabox.left), float(page.mediabox.bottom))
+            if origin not in draw_branding:
+                draw_branding[origin] = _stream(
+                    writer,
+                    f'Q\nq 1 0 0 1 {origin[0]:g} {origin[1]:g} cm {BRANDING_XOBJECT} Do Q\n'.encode('ascii'),
+                )
+            
+            page[NameObject('/Contents')] = ArrayObject(
+                [save_state] + _compressed_contents(writer, page) + [draw_branding[origin]]
+            )
         
         # Add metadata
         writer.add_metadata({
@@ -59,9 +143,16 @@ def add_branding_to_pdf(input_pdf, output_pdf):
             '/Creator': 'SEAL Enterprises Travel Planning'
         })
         
-        # Write output
-        with open(output_pdf, 'wb') as output_file:
-            writer.write(output_file)
+        # Write output straight to disk, then swap it into place
+        tmp_pdf = f'{output_pdf}.tmp'
+        try:
+            with open(tmp_pdf, 'wb', buffering=1024 * 1024) as output_file:
+                writer.write(output_file)
+            os.replace(tmp_pdf, output_pdf)
+        except BaseException:
+            if os.path.exists(tmp_pdf):
+                os.remove(tmp_pdf)
+            raise
         
         print(f"✓ Branded PDF created: {output_pdf}")
         return True
@@ -88,12 +179,15 @@ def brand_all_guides(guides_dir='guides'):
     
     print(f"Found {len(pdf_files)} PDF(s) to brand\n")
     
+    # Render the overlay once for the whole batch
+    branding = create_branding_overlay()
+    
     for pdf_file in pdf_files:
         input_path = os.path.join(guides_dir, pdf_file)
         output_path = os.path.join(guides_dir, f'branded-{pdf_file}')
         
         print(f"Branding: {pdf_file}")
-        add_branding_to_pdf(input_path, output_path)
+        add_branding_to_pdf(input_path, output_path, branding)
     
     print(f"\n✓ Done! Branded PDFs saved with 'branded-' prefix")
     print(f"Send the branded versions to clients!")
@@ -112,8 +206,13 @@ if __name__ == '__main__':
     except ImportError:
         print("Installing required packages...")
         import subprocess
-        subprocess.check_call(['pip', 'install', 'PyPDF2', 'reportlab'])
+        subprocess.check_call(['pip', 'install', f'PyPDF2=={PYPDF2_VERSION}', 'reportlab'])
         print("Packages installed. Please run this script again.")
         exit()
     
+    if PyPDF2.__version__ != PYPDF2_VERSION:
+        print(f"Warning: branding was tested with PyPDF2 {PYPDF2_VERSION}, found {PyPDF2.__version__}; "
+              f"check a branded PDF or run: pip install PyPDF2=={PYPDF2_VERSION}")
+        print()
+    
     brand_all_guides()
@@ -0,0 +1,122 @@
+"""
+Compact, precompressed JSON files for the guide catalog and travel-guides index.
+
+write_catalog() replaces a plain json.dump(..., indent=2) and writes:
+  - <name>.json                the full document, minified
+  - <name>.slim.json           the scalar fields of the document with each guide
+                               cut down to the fields its consumers render
+  - <name>-by-continent/*.json the slim guides split by continent (guides
+                               with no continent field are left out)
+plus a .gz copy of each (and .br when the brotli package is installed) for
+hosts that serve precompressed files. Every file is replaced atomically
+(written to a temporary file, then renamed).
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# what the Mailchimp email builder renders from fora_guides_catalog.json
+CATALOG_SLIM_FIELDS = ('name', 'description', 'continent')
+# what dynamic_guides_widget.js renders from travel-guides/index.json
+INDEX_SLIM_FIELDS = ('title', 'description', 'filename', 'published_date')
+
+
+def continent_slug(continent: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', (continent or '').lower()).strip('-') or 'other'
+
+
+def slim_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}.slim.json")
+
+
+def shard_dir(path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}-by-continent")
+
+
+def replace_file(path: Path, data: bytes):
+    """Write data to a temporary file next to path and rename it over path, so
+    readers see either the old or the new file, never a partly written one"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _write(path: Path, data: bytes):
+    """Write data and its precompressed siblings"""
+    replace_file(path, data)
+    replace_file(path.with_name(path.name + '.gz'), gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        replace_file(path.with_name(path.name + '.br'), brotli.compress(data))
+
+
+def _encode(document) -> bytes:
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_json(path, document) -> int:
+    """Write document as minified JSON with precompressed siblings; returns its size"""
+    data = _encode(document)
+    _write(Path(path), data)
+    return len(data)
+
+
+def write_catalog(path, document: Dict, slim_fields: Iterable[str]) -> Dict[str, int]:
+    """Write document (a dict with a 'guides' list) and its slim and per-continent
+    projections; returns the byte size of each file written (uncompressed)"""
+    path = Path(path)
+    slim_fields = tuple(slim_fields)
+    # the projections carry the scalar fields only (not the guides or a facet table)
+    meta = {k: v for k, v in document.items() if not isinstance(v, (dict, list))}
+    slim = [{k: g.get(k, '') for k in slim_fields} for g in document.get('guides', [])]
+
+    sizes = {}
+    for target, doc in [(path, document), (slim_path(path), {**meta, 'guides': slim})]:
+        sizes[target.name] = write_json(target, doc)
+
+    by_continent = {}
+    for guide, entry in zip(document.get('guides', []), slim):
+        # entries that do not say (e.g. index entries published before they carried
+        # a continent) would all land in 'other'
+        if 'continent' in guide:
+            by_continent.setdefault(continent_slug(guide['continent']), []).append(entry)
+    shards = shard_dir(path)
+    if by_continent:
+        shards.mkdir(exist_ok=True)
+    for slug, guides in by_continent.items():
+        sizes[f"{shards.name}/{slug}.json"] = write_json(shards / f"{slug}.json",
+                                                         {**meta, 'continent': slug, 'guides': guides})
+    if shards.is_dir():
+        for stale in shards.iterdir():
+            base = stale.name.split('.json')[0]
+            if base not in by_continent and not stale.name.startswith('.'):
+                stale.unlink()
+    return sizes
+
+
+def load_guides(path, slim: bool = True):
+    """Guides from a catalog written by write_catalog, preferring the slim file"""
+    path = Path(path)
+    for candidate in ([slim_path(path)] if slim else []) + [path]:
+        if candidate.exists():
+            with open(candidate, 'r', encoding='utf-8') as f:
+                return json.load(f).get('guides', [])
+    return []
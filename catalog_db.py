@@ -0,0 +1,358 @@
+"""
+Guide Catalog Database
+One SQLite database (fora_catalog.db, WAL mode) for the state the automation
+scripts share, with a thin data-access layer (CatalogDB):
+
+  guides          the FORA guide sheet as last loaded by generate_resources_page.py
+  publications    travel-guides/index.json entries, one per published page
+  publish_events  which guides each pipeline has published (automation_state.json,
+                  published_guides_state.json)
+  content_hashes  sha256 of generated files
+  campaigns       Mailchimp campaigns created from guides
+  sheet_rows      the guide sheet as of the last pull by sheet_sync.py (row
+                  hashes, for the next pull's delta)
+
+The JSON files are still written for the site and anything else that reads
+them, but as exports of these tables (export_index, export_state,
+guides). Existing JSON state is imported the first time it is needed.
+WAL mode lets scheduled jobs read while another one writes; writes wait for
+each other (busy timeout) instead of overwriting each other.
+"""
+
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import json
+import re
+import sqlite3
+
+from catalog_artifacts import INDEX_SLIM_FIELDS, load_guides, write_catalog
+
+DB_FILE = 'fora_catalog.db'
+SCHEMA_VERSION = 1
+
+# publish pipelines (publish_events.pipeline)
+FORA_PORTAL = 'fora-portal'      # fora_automation.py
+GOOGLE_SHEETS = 'google-sheets'  # fora_google_sheets_automation.py
+PDF = 'pdf'                      # fora_pdf_to_web.py
+
+# guide fields in catalog order (fora_guides_catalog.json)
+GUIDE_FIELDS = ('name', 'description', 'continent', 'country', 'region', 'style', 'season', 'partner',
+                'budget_friendly', 'magic_url', 'date')
+# sheet country/continent values that do not name a place
+NON_PLACES = {'', 'multiple', 'n/a', 'other'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guides (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    continent TEXT NOT NULL DEFAULT '',
+    country TEXT NOT NULL DEFAULT '',
+    region TEXT NOT NULL DEFAULT '',
+    style TEXT NOT NULL DEFAULT '',
+    season TEXT NOT NULL DEFAULT '',
+    partner TEXT NOT NULL DEFAULT '',
+    budget_friendly INTEGER NOT NULL DEFAULT 0,
+    magic_url TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS guides_name ON guides(name);
+CREATE INDEX IF NOT EXISTS guides_continent ON guides(continent);
+CREATE INDEX IF NOT EXISTS guides_country ON guides(country);
+CREATE INDEX IF NOT EXISTS guides_position ON guides(position);
+
+CREATE TABLE IF NOT EXISTS publications (
+    index_file TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    published_date TEXT NOT NULL DEFAULT '',
+    entry TEXT NOT NULL,
+    PRIMARY KEY (index_file, filename)
+);
+CREATE INDEX IF NOT EXISTS publications_published ON publications(index_file, published_date);
+
+CREATE TABLE IF NOT EXISTS publish_events (
+    id INTEGER PRIMARY KEY,
+    pipeline TEXT NOT NULL,
+    guide_key TEXT NOT NULL,
+    filename TEXT,
+    published_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS publish_events_guide ON publish_events(pipeline, guide_key);
+
+CREATE TABLE IF NOT EXISTS content_hashes (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    guide_key TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'draft',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS campaigns_guide ON campaigns(guide_key);
+
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def catalog_guides(limit: Optional[int] = None, path=DB_FILE) -> List[Dict]:
+    """Guides from the database, or from fora_guides_catalog.json before the
+    resources generator has filled it"""
+    with CatalogDB(path) as db:
+        guides = db.guides(limit=limit)
+    if not guides:
+        guides = load_guides('fora_guides_catalog.json')
+        guides = guides if limit is None else guides[:limit]
+    return guides
+
+
+class CatalogDB:
+    """Data-access layer over fora_catalog.db"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._places = None  # (pattern, continent) for continent_for()
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                              (str(SCHEMA_VERSION),))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # meta
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key: str, value: Optional[str]):
+        with self.conn:
+            if value is None:
+                self.conn.execute('DELETE FROM meta WHERE key = ?', (key,))
+            else:
+                self.conn.execute('INSERT INTO meta (key, value) VALUES (?, ?) '
+                                  'ON CONFLICT (key) DO UPDATE SET value = excluded.value', (key, value))
+
+    # guides
+
+    def replace_guides(self, guides: List[Dict]):
+        """Store the guides loaded from the sheet, replacing the previous load;
+        each guide needs the 'id' generate_resources_page.py assigns"""
+        rows = [tuple(g.get(f, '') for f in GUIDE_FIELDS) + (g['id'], position)
+                for position, g in enumerate(guides)]
+        with self.conn:
+            self.conn.execute('DELETE FROM guides')
+            self.conn.executemany(
+                f"INSERT INTO guides ({', '.join(GUIDE_FIELDS)}, id, position) "
+                f"VALUES ({', '.join('?' * (len(GUIDE_FIELDS) + 2))})", rows)
+
+    def guides(self, continent: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Guides in sheet order, as the dicts fora_guides_catalog.json holds"""
+        sql = f"SELECT {', '.join(GUIDE_FIELDS)}, id FROM guides"
+        params = []
+        if continent is not None:
+            sql += ' WHERE continent = ?'
+            params.append(continent)
+        sql += ' ORDER BY position'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        guides = []
+        for row in self.conn.execute(sql, params):
+            guide = dict(row)
+            guide['budget_friendly'] = bool(guide['budget_friendly'])
+            guides.append(guide)
+        return guides
+
+    def guide_count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM guides').fetchone()[0]
+
+    def continent_for(self, text: str) -> str:
+        """Continent of the sheet country (or continent) that text names, e.g. a
+        PDF guide's location or a portal guide's title; '' if it names none"""
+        if self._places is None:
+            self._places = self._place_patterns()
+        for pattern, continent in self._places:
+            if pattern.search(text or ''):
+                return continent
+        return ''
+
+    def _place_patterns(self):
+        guides = self.guides() or load_guides('fora_guides_catalog.json', slim=False)
+        continents = {}
+        for guide in guides:
+            continent = (guide.get('continent') or '').strip()
+            if continent.lower() in NON_PLACES:
+                continue
+            for place in (guide.get('country') or '', continent):
+                place = place.strip()
+                if place.lower() not in NON_PLACES:
+                    continents.setdefault(place, Counter())[continent] += 1
+        # longest names first, so 'South Africa' wins over 'Africa'
+        return [(re.compile(rf'\b{re.escape(place)}\b', re.I), counts.most_common(1)[0][0])
+                for place, counts in sorted(continents.items(), key=lambda item: -len(item[0]))]
+
+    # publications (travel-guides/index.json)
+
+    def import_index(self, index_file):
+        """Load an existing index.json into publications, once (no-op if any of
+        its entries are already stored or the file does not exist)"""
+        index_file = Path(index_file)
+        key = index_file.as_posix()
+        if not index_file.exists() or self.conn.execute(
+                'SELECT 1 FROM publications WHERE index_file = ? LIMIT 1', (key,)).fetchone():
+            return
+        with open(index_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('guides', [])
+        self.upsert_publications(index_file, entries)
+
+    def upsert_publications(self, index_file, entries: Iterable[Dict]):
+        """Add or replace index entries (keyed by filename)"""
+        key = Path(index_file).as_posix()
+        rows = [(key, e['filename'], e.get('title', ''), e.get('published_date', ''),
+                 json.dumps(e, ensure_ascii=False)) for e in entries]
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO publications (index_file, filename, title, published_date, entry) '
+                'VALUES (?, ?, ?, ?, ?) ON CONFLICT (index_file, filename) DO UPDATE SET '
+                'title = excluded.title, published_date = excluded.published_date, entry = excluded.entry',
+                rows)
+
+    def publications(self, index_file) -> List[Dict]:
+        """Index entries in the order they were first published"""
+        rows = self.conn.execute('SELECT entry FROM publications WHERE index_file = ? ORDER BY rowid',
+                                 (Path(index_file).as_posix(),))
+        return [json.loads(row['entry']) for row in rows]
+
+    def export_index(self, index_file, sort_key=None, reverse: bool = False):
+        """Write index_file (and its slim/continent projections) from publications"""
+        guides = self.publications(index_file)
+        if sort_key is not None:
+            guides.sort(key=sort_key, reverse=reverse)
+        write_catalog(index_file, {'guides': guides, 'last_updated': _now()}, INDEX_SLIM_FIELDS)
+
+    # publish events (automation_state.json, published_guides_state.json)
+
+    def import_state(self, pipeline: str, state_file, field: str):
+        """Load a pipeline's JSON state file into publish_events, once"""
+        state_file = Path(state_file)
+        if not state_file.exists() or self.published_keys(pipeline):
+            return
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.record_published(pipeline, state.get(field, []), published_at=state.get('last_run'))
+
+    def record_published(self, pipeline: str, guide_keys: Iterable[str], filename: Optional[str] = None,
+                         published_at: Optional[str] = None):
+        """Record publish events for the guides not yet published by this pipeline"""
+        done = set(self.published_keys(pipeline))
+        at = published_at or _now()
+        rows = [(pipeline, key, filename, at) for key in dict.fromkeys(guide_keys) if key not in done]
+        with self.conn:
+            self.conn.executemany('INSERT INTO publish_events (pipeline, guide_key, filename, published_at) '
+                                  'VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def published_keys(self, pipeline: str) -> List[str]:
+        """Guides a pipeline has published, oldest first"""
+        rows = self.conn.execute('SELECT guide_key FROM publish_events WHERE pipeline = ? '
+                                 'GROUP BY guide_key ORDER BY MIN(id)', (pipeline,))
+        return [row['guide_key'] for row in rows]
+
+    def is_published(self, pipeline: str, guide_key: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM publish_events WHERE pipeline = ? AND guide_key = ? LIMIT 1',
+                                 (pipeline, guide_key)).fetchone() is not None
+
+    def export_state(self, pipeline: str, state_file, field: str):
+        """Write a pipeline's JSON state file from publish_events"""
+        state = {
+            field: self.published_keys(pipeline),
+            'last_run': _now()
+        }
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+
+    # content hashes, campaigns
+
+    def content_hash(self, path) -> Optional[str]:
+        row = self.conn.execute('SELECT sha256 FROM content_hashes WHERE path = ?',
+                                (Path(path).as_posix(),)).fetchone()
+        return row['sha256'] if row else None
+
+    def content_hashes(self) -> Dict[str, str]:
+        """Every stored hash, by path (one query for a bulk build)"""
+        return {row['path']: row['sha256'] for row in self.conn.execute('SELECT path, sha256 FROM content_hashes')}
+
+    def set_content_hash(self, path, sha256: str):
+        self.set_content_hashes([(path, sha256)])
+
+    def set_content_hashes(self, items: Iterable):
+        """Store (path, sha256) pairs in one transaction"""
+        now = _now()
+        with self.conn:
+            self.conn.executemany('INSERT INTO content_hashes (path, sha256, updated_at) VALUES (?, ?, ?) '
+                                  'ON CONFLICT (path) DO UPDATE SET sha256 = excluded.sha256, '
+                                  'updated_at = excluded.updated_at',
+                                  [(Path(path).as_posix(), sha256, now) for path, sha256 in items])
+
+    def record_campaign(self, campaign_id: str, guide_key: str = '', title: str = '', status: str = 'draft'):
+        with self.conn:
+            self.conn.execute('INSERT INTO campaigns (id, guide_key, title, status, created_at) '
+                              'VALUES (?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET status = excluded.status',
+                              (campaign_id, guide_key, title, status, _now()))
+
+    def campaigns(self, guide_key: Optional[str] = None) -> List[Dict]:
+        if guide_key is None:
+            rows = self.conn.execute('SELECT * FROM campaigns ORDER BY created_at')
+        else:
+            rows = self.conn.execute('SELECT * FROM campaigns WHERE guide_key = ? ORDER BY created_at',
+                                     (guide_key,))
+        return [dict(row) for row in rows]
+
+    # guide sheet snapshot
+
+    def sheet_row_hashes(self) -> Dict[str, str]:
+        """sha256 of every row in the last sheet snapshot, by row key"""
+        return {row['key']: row['sha256'] for row in self.conn.execute('SELECT key, sha256 FROM sheet_rows')}
+
+    def replace_sheet_rows(self, rows: Iterable):
+        """Store (key, sha256, name) for every row of a pull, replacing the previous snapshot"""
+        now = _now()
+        with self.conn:
+            self.conn.execute('DELETE FROM sheet_rows')
+            self.conn.executemany('INSERT INTO sheet_rows (key, sha256, name, position, updated_at) '
+                                  'VALUES (?, ?, ?, ?, ?)',
+                                  [(key, sha256, name, position, now)
+                                   for position, (key, sha256, name) in enumerate(rows)])
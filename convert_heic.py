@@ -1,15 +1,145 @@
-from PIL import Image
+"""
+HEIC Photo Ingester
+Converts phone photos (HEIC/HEIF) dropped in images/inbox into web-optimized
+JPEG + WebP at the same target size webopt_canva uses for hero images.
+
+Usage:
+    python convert_heic.py                      # ingest everything new in images/inbox
+    python convert_heic.py images/IMG_1234.heic # ingest specific files
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import sys
+
 import pillow_heif
 
-# Register HEIC opener with PIL
+BASE = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE / 'scripts'))
+from webopt_canva import MAPPINGS, file_digest, process  # noqa: E402
+
+# Register HEIC opener with PIL (at import time so worker processes get it too)
 pillow_heif.register_heif_opener()
 
-# Open and convert HEIC to JPG
-heic_path = "images/IMG_20251209_090844.heic"
-jpg_path = "images/gregory-st-kitts.jpg"
+INBOX_DIR = BASE / 'images' / 'inbox'
+OUT_DIR = BASE / 'images' / 'photos'
+MANIFEST_FILE = INBOX_DIR / '.ingested.json'
+HEIC_EXTS = {'.heic', '.heif'}
+FORMATS = ['jpg', 'webp']
+# largest target webopt_canva produces (the hero size)
+TARGET_SIZE = max((size for _, _, size, *_ in MAPPINGS), key=lambda s: s[0] * s[1])
+
+
+def output_name(path: Path) -> str:
+    """Web-safe output base name: IMG 0042.HEIC -> img-0042"""
+    return re.sub(r'[^a-z0-9]+', '-', path.stem.lower()).strip('-') or 'photo'
+
+
+def load_manifest():
+    if MANIFEST_FILE.exists():
+        return json.loads(MANIFEST_FILE.read_text(encoding='utf-8'))
+    return {}
+
+
+def save_manifest(manifest):
+    MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_FILE.with_name(MANIFEST_FILE.name + '.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    os.replace(tmp, MANIFEST_FILE)
+
+
+def is_heic(path: Path) -> bool:
+    return path.is_file() and path.suffix.lower() in HEIC_EXTS
+
+
+def find_photos(paths):
+    """(photos, rejected): explicit paths are filtered like the inbox scan, and each
+    one that is not an existing HEIC/HEIF file is reported and returned in rejected"""
+    if paths:
+        photos, rejected = [], []
+        for p in paths:
+            path = Path(p).resolve()
+            if is_heic(path):
+                photos.append(path)
+            else:
+                print(f"Skipping {p}: {'not a HEIC/HEIF file' if path.is_file() else 'no such file'}")
+                rejected.append(p)
+        return photos, rejected
+    if not INBOX_DIR.exists():
+        return [], []
+    return sorted(p for p in INBOX_DIR.iterdir() if is_heic(p)), []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert HEIC phone photos to web-optimized JPEG + WebP')
+    parser.add_argument('files', nargs='*', help=f'HEIC files to ingest (default: everything in {INBOX_DIR.relative_to(BASE)})')
+    parser.add_argument('--out', default=str(OUT_DIR), help='output directory')
+    parser.add_argument('--size', default=f'{TARGET_SIZE[0]}x{TARGET_SIZE[1]}', help='bounding box WxH')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='re-ingest photos already in the manifest')
+    args = parser.parse_args(argv)
+
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    out_dir = Path(args.out).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    photos, rejected = find_photos(args.files)
+    if not photos:
+        if rejected:
+            return 1
+        print(f"No HEIC photos found. Drop them in {INBOX_DIR} and run again.")
+        return 0
+
+    manifest = load_manifest()
+    todo = []
+    for photo in photos:
+        digest = file_digest(photo)
+        if digest in manifest and not args.force:
+            print(f"Skipping {photo.name} (already ingested as {manifest[digest]['output']})")
+            continue
+        todo.append((photo, digest))
+
+    ingested, failed = 0, len(rejected)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(process, photo, out_dir / output_name(photo), size, FORMATS, []): (photo, digest)
+                   for photo, digest in todo}
+        for fut in as_completed(futures):
+            photo, digest = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                print(f"ERROR converting {photo}: {e}")
+                failed += 1
+                continue
+            for err in r['errors']:
+                print(err)
+            if r['errors'] or not r['outputs']:
+                # left out of the manifest so the next run tries it again
+                failed += 1
+                continue
+            manifest[digest] = {
+                'source': photo.name,
+                'output': r['output'],
+                'width': r['size'][0],
+                'height': r['size'][1],
+                'files': [o['path'] for o in r['outputs']] + [o['alias'] for o in r['outputs'] if o.get('alias')],
+            }
+            sizes = ', '.join(f"{o['format']} {o['bytes'] / 1024:.0f} KB" for o in r['outputs'])
+            print(f"✅ {photo.name} ({r['source_bytes'] / 1024 / 1024:.1f} MB) -> {r['output']} "
+                  f"{r['size'][0]}x{r['size'][1]}: {sizes}")
+            save_manifest(manifest)
+            ingested += 1
+
+    print(f"\nIngested {ingested} photo(s) into {out_dir}")
+    if failed:
+        print(f"{failed} photo(s) failed or were skipped")
+        return 1
+    return 0
 
-img = Image.open(heic_path)
-img.convert("RGB").save(jpg_path, "JPEG", quality=95)
 
-print(f"✅ Converted! Saved as: {jpg_path}")
-print(f"Image size: {img.size[0]}x{img.size[1]} pixels")
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,7 @@ Create Sample Mailchimp Campaign with FORA Guides
 """
 
 from mailchimp_fora_integration import MailchimpFORAIntegration
-import json
-import os
+from catalog_db import catalog_guides
 
 
 def main():
@@ -30,34 +29,31 @@ def main():
     
     # Load FORA guides
     guide_list = []
-    if os.path.exists('fora_guides_catalog.json'):
-        with open('fora_guides_catalog.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            all_guides = data.get('guides', [])
-            
-            # Select diverse guides from different continents
-            continents = {}
-            for guide in all_guides:
-                continent = guide.get('continent', 'Other')
-                if continent not in continents:
-                    continents[continent] = []
-                continents[continent].append(guide)
-            
-            # Pick guides based on user preference
-            if num_guides == 1:
-                # Pick first guide from first continent
-                for guides in continents.values():
-                    if guides:
-                        guide_list.append(guides[0])
-                        break
-            else:
-                # Pick multiple guides from different continents
-                guides_per_continent = max(1, num_guides // len(continents))
-                for continent, guides in continents.items():
-                    guide_list.extend(guides[:guides_per_continent])
-                    if len(guide_list) >= num_guides:
-                        break
-                guide_list = guide_list[:num_guides]
+    all_guides = catalog_guides()
+    if all_guides:
+        # Select diverse guides from different continents
+        continents = {}
+        for guide in all_guides:
+            continent = guide.get('continent', 'Other')
+            if continent not in continents:
+                continents[continent] = []
+            continents[continent].append(guide)
+        
+        # Pick guides based on user preference
+        if num_guides == 1:
+            # Pick first guide from first continent
+            for guides in continents.values():
+                if guides:
+                    guide_list.append(guides[0])
+                    break
+        else:
+            # Pick multiple guides from different continents
+            guides_per_continent = max(1, num_guides // len(continents))
+            for continent, guides in continents.items():
+                guide_list.extend(guides[:guides_per_continent])
+                if len(guide_list) >= num_guides:
+                    break
+            guide_list = guide_list[:num_guides]
     
     print(f"\nSelected {len(guide_list)} featured guide(s):")
     for i, guide in enumerate(guide_list, 1):
@@ -6,8 +6,13 @@
 class TravelGuidesWidget {
     constructor(containerId, options = {}) {
         this.container = document.getElementById(containerId);
+        // the slim index only carries the fields rendered here; with a
+        // continent option only that continent's file is fetched
+        const continentSlug = (options.continent || '').toLowerCase().replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
         this.options = {
-            indexPath: 'travel-guides/index.json',
+            indexPath: continentSlug
+                ? `travel-guides/index-by-continent/${continentSlug}.json`
+                : 'travel-guides/index.slim.json',
             maxGuides: options.maxGuides || 6,
             layout: options.layout || 'grid', // 'grid', 'list', 'carousel'
             autoRefresh: options.autoRefresh || false,
@@ -292,7 +297,8 @@ document.addEventListener('DOMContentLoaded', () => {
         const options = {
             maxGuides: parseInt(container.dataset.maxGuides) || 6,
             layout: container.dataset.layout || 'grid',
-            autoRefresh: container.dataset.autoRefresh === 'true'
+            autoRefresh: container.dataset.autoRefresh === 'true',
+            continent: container.dataset.continent || ''
         };
         
         new TravelGuidesWidget(container.id, options);
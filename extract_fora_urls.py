@@ -3,11 +3,12 @@ FORA URL Extractor
 Extracts actual magic URLs from FORA Google Sheet CSV and adds advisor tracking
 """
 
-import csv
 import os
 import json
 import logging
 
+from guide_sheet import SheetReader
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -22,39 +23,26 @@ def extract_fora_urls(csv_file='fora_guides.csv', advisor_id='gregory-rhoney'):
     guides_with_urls = []
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            # Skip first line if not header
-            first_line = f.readline()
-            if 'Date' not in first_line and 'Name' not in first_line:
-                f.seek(0)
-                f.readline()
-            else:
-                f.seek(0)
-            
-            reader = csv.DictReader(f)
+        reader = SheetReader(csv_file)
+        for row in reader:
+            # Check if there's a URL in the Magic Content column
+            magic_url = row['magic_content']
             
-            for row in reader:
-                name = row.get('Name', '').strip()
-                if not name:
-                    continue
-                
-                # Check if there's a URL in the Magic Content column
-                magic_url = row.get('Magic Content', '').strip()
+            # Only include if there's an actual URL (starts with http)
+            if magic_url and magic_url.startswith('http'):
+                # Ensure advisor ID is in the URL
+                if advisor_id not in magic_url:
+                    # Add advisor parameter
+                    separator = '&' if '?' in magic_url else '?'
+                    magic_url = f"{magic_url}{separator}advisor={advisor_id}"
                 
-                # Only include if there's an actual URL (starts with http)
-                if magic_url and magic_url.startswith('http'):
-                    # Ensure advisor ID is in the URL
-                    if advisor_id not in magic_url:
-                        # Add advisor parameter
-                        separator = '&' if '?' in magic_url else '?'
-                        magic_url = f"{magic_url}{separator}advisor={advisor_id}"
-                    
-                    guides_with_urls.append({
-                        'name': name,
-                        'url': magic_url,
-                        'continent': row.get('Continent', 'Other').strip(),
-                        'description': row.get('Short Description', '').strip()
-                    })
+                guides_with_urls.append({
+                    'name': row['name'],
+                    'url': magic_url,
+                    'continent': row['continent'],
+                    'description': row['description']
+                })
+        reader.report(logger)
         
         logger.info(f"Found {len(guides_with_urls)} guides with valid URLs")
         return guides_with_urls
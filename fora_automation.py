@@ -3,8 +3,8 @@ FORA Travel Guides & Mailchimp Automation System
 Automatically fetches FORA "magic" travel guides and integrates with Mailchimp
 """
 
+import argparse
 import os
-import json
 import requests
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -13,6 +13,11 @@ import logging
 from bs4 import BeautifulSoup
 import re
 
+from catalog_db import FORA_PORTAL, CatalogDB
+from guide_index import IndexStore
+from publish_plan import PublishPlan
+from guide_schema import article_jsonld
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -199,6 +204,7 @@ class FORAClient:
                 
                 # Extract main content
                 content = {
+                    'url': response.url,
                     'html': response.text,
                     'title': soup.find('h1').get_text(strip=True) if soup.find('h1') else '',
                     'content': self._extract_main_content(soup),
@@ -353,39 +359,42 @@ class MailchimpClient:
 class ContentPublisher:
     """Publishes travel guides to website"""
     
-    def __init__(self, output_dir='travel-guides'):
+    def __init__(self, output_dir='travel-guides', db: Optional[CatalogDB] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.index_file = self.output_dir / 'index.json'
+        self.db = db or CatalogDB()
+        self.index = IndexStore(self.index_file, db=self.db)
     
-    def publish_guide(self, guide: Dict, content: Dict) -> bool:
-        """Publish a travel guide to the website"""
-        try:
-            # Create sanitized filename
-            safe_title = re.sub(r'[^\w\s-]', '', guide['title']).strip().replace(' ', '-')
-            safe_title = safe_title[:50]  # Limit length
-            
-            # Save HTML file
-            html_file = self.output_dir / f"{safe_title}.html"
-            
-            # Rebrand content with SEAL branding
-            rebranded_content = self._rebrand_content(content, guide['title'])
-            
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(rebranded_content)
-            
-            # Update index
-            self._update_index(guide, str(html_file.name))
-            
-            logger.info(f"✓ Published guide: {html_file}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error publishing guide: {str(e)}")
-            return False
+    @staticmethod
+    def _page_filename(guide: Dict) -> str:
+        """Sanitized page filename from the guide title"""
+        safe_title = re.sub(r'[^\w\s-]', '', guide['title']).strip().replace(' ', '-')
+        safe_title = safe_title[:50]  # Limit length
+        return f"{safe_title}.html"
+    
+    def existing_entries(self) -> Dict[str, Dict]:
+        """Current index entries by filename"""
+        self.db.import_index(self.index_file)
+        return {e['filename']: e for e in self.db.publications(self.index_file)}
     
-    def _rebrand_content(self, content: Dict, title: str) -> str:
-        """Rebrand FORA content with SEAL branding"""
+    def plan_guide(self, plan: PublishPlan, guide: Dict, content: Dict, existing: Dict[str, Dict]):
+        """Add the guide's page and index entry to a publish plan (nothing is written)"""
+        filename = self._page_filename(guide)
+        entry = existing.get(filename)
+        # keep the first publish date, so rerunning an unchanged guide plans no writes
+        published = entry['published_date'] if entry else datetime.now().isoformat()
+        html = self._rebrand_content(content, guide['title'], filename, published)
+        plan.page(self.output_dir / filename, html.encode('utf-8'))
+        continent = self.db.continent_for(f"{guide['title']} {guide.get('description', '')}")
+        plan.index_entry(self._index_entry(guide, filename, published, continent), entry)
+    
+    @staticmethod
+    def _rebrand_content(content: Dict, title: str, filename: str, published: str) -> str:
+        """Rebrand FORA content with SEAL branding (published: ISO publish date)"""
+        images = content.get('images') or []
+        jsonld = article_jsonld(title, filename, published=published[:10],
+                                image=images[0] if images else None, image_base=content.get('url'))
         # Create a complete HTML page with SEAL branding
         html_template = f"""<!DOCTYPE html>
 <html lang="en">
@@ -394,6 +403,7 @@ class ContentPublisher:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title} - SEAL Enterprises</title>
     <link rel="stylesheet" href="../css/styles.css">
+    {jsonld}
 </head>
 <body>
     <nav class="navbar">
@@ -408,7 +418,7 @@ class ContentPublisher:
             <header>
                 <h1>{title}</h1>
                 <p class="byline">Curated by SEAL Enterprises | Powered by FORA Travel</p>
-                <p class="publish-date">Published: {datetime.now().strftime('%B %d, %Y')}</p>
+                <p class="publish-date">Published: {datetime.fromisoformat(published).strftime('%B %d, %Y')}</p>
             </header>
             
             <div class="guide-content">
@@ -437,38 +447,19 @@ class ContentPublisher:
 </html>"""
         return html_template
     
-    def _update_index(self, guide: Dict, filename: str):
-        """Update the guides index file"""
-        try:
-            # Load existing index
-            if self.index_file.exists():
-                with open(self.index_file, 'r') as f:
-                    index = json.load(f)
-            else:
-                index = {'guides': []}
-            
-            # Add or update guide entry
-            guide_entry = {
-                'title': guide['title'],
-                'description': guide.get('description', ''),
-                'filename': filename,
-                'url': guide.get('url', ''),
-                'published_date': datetime.now().isoformat(),
-                'source': 'FORA Travel'
-            }
-            
-            # Remove any existing entry with same filename
-            index['guides'] = [g for g in index['guides'] if g['filename'] != filename]
-            index['guides'].append(guide_entry)
-            
-            # Save updated index
-            with open(self.index_file, 'w') as f:
-                json.dump(index, f, indent=2)
-            
-        except Exception as e:
-            logger.error(f"Error updating index: {str(e)}")
-
-
+    @staticmethod
+    def _index_entry(guide: Dict, filename: str, published_date: str, continent: str) -> Dict:
+        """The guide's travel-guides/index.json entry"""
+        return {
+            'title': guide['title'],
+            'description': guide.get('description', ''),
+            'filename': filename,
+            'url': guide.get('url', ''),
+            'continent': continent,
+            'published_date': published_date,
+            'source': 'FORA Travel'
+        }
+    
 class AutomationManager:
     """Main automation orchestrator"""
     
@@ -476,11 +467,13 @@ class AutomationManager:
         self.config = ConfigManager()
         self.fora = FORAClient(self.config)
         self.mailchimp = MailchimpClient(self.config)
-        self.publisher = ContentPublisher()
+        self.db = CatalogDB()
+        self.publisher = ContentPublisher(db=self.db)
         self.state_file = Path('automation_state.json')
     
-    def run(self):
-        """Run the automation workflow"""
+    def run(self, dry_run: bool = False, plan_json: Optional[str] = None):
+        """Run the automation workflow: plan the run, then apply it unless dry_run
+        (a dry run still reads from FORA and Mailchimp, but writes nothing)"""
         logger.info("=" * 60)
         logger.info("FORA Travel Guides Automation - Starting")
         logger.info("=" * 60)
@@ -510,7 +503,11 @@ class AutomationManager:
         # Load previous state to avoid republishing
         processed_guides = self._load_state()
         
-        # Process each guide
+        # Plan each guide
+        plan = PublishPlan(FORA_PORTAL, self.db)
+        existing = self.publisher.existing_entries()
+        publish = self.config.get('AUTO_PUBLISH_TO_WEBSITE', 'True') == 'True'
+        send = self.config.get('AUTO_SEND_TO_MAILCHIMP', 'False') == 'True'
         for guide in guides:
             guide_id = guide.get('url', guide.get('title'))
             
@@ -528,19 +525,31 @@ class AutomationManager:
                 continue
             
             # Publish to website
-            if self.config.get('AUTO_PUBLISH_TO_WEBSITE', 'True') == 'True':
-                if self.publisher.publish_guide(guide, content):
-                    processed_guides.append(guide_id)
+            if publish:
+                try:
+                    self.publisher.plan_guide(plan, guide, content, existing)
+                    plan.published([guide_id])
+                except Exception as e:
+                    logger.error(f"Error publishing guide: {str(e)}")
+                    plan.fail(guide['title'], e)
             
-            # Create Mailchimp campaign
-            if self.config.get('AUTO_SEND_TO_MAILCHIMP', 'False') == 'True':
-                campaign_id = self.mailchimp.create_campaign(guide, content['content'])
-                
-                if campaign_id:
-                    logger.info(f"Campaign created: {campaign_id} (not sent - review in Mailchimp)")
+            # Create Mailchimp campaign (a draft - review in Mailchimp)
+            if send:
+                plan.campaign(guide_id, guide['title'], guide, content['content'])
         
-        # Save state
-        self._save_state(processed_guides)
+        for line in plan.summary():
+            logger.info(line)
+        if plan_json:
+            plan.write_json(plan_json)
+            logger.info(f"Plan written to {plan_json}")
+        if dry_run:
+            logger.info("\nDry run - nothing was written or sent")
+            return
+        
+        # Write the pages and the index once for the whole run, then save state
+        counts = plan.apply(self.publisher.index, create_campaign=self.mailchimp.create_campaign)
+        logger.info(f"✓ Published {counts['pages_written']} page(s), {counts['campaigns']} campaign draft(s)")
+        self._save_state(processed_guides + plan.state)
         
         logger.info("\n" + "=" * 60)
         logger.info("Automation complete!")
@@ -548,26 +557,23 @@ class AutomationManager:
     
     def _load_state(self) -> List[str]:
         """Load previously processed guides"""
-        if self.state_file.exists():
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
-                return state.get('processed_guides', [])
-        return []
+        self.db.import_state(FORA_PORTAL, self.state_file, 'processed_guides')
+        return self.db.published_keys(FORA_PORTAL)
     
     def _save_state(self, processed_guides: List[str]):
-        """Save processed guides state"""
-        state = {
-            'processed_guides': processed_guides,
-            'last_run': datetime.now().isoformat()
-        }
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+        """Record processed guides and export automation_state.json"""
+        self.db.record_published(FORA_PORTAL, processed_guides)
+        self.db.export_state(FORA_PORTAL, self.state_file, 'processed_guides')
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publish new FORA guides and create Mailchimp drafts')
+    parser.add_argument('--dry-run', action='store_true', help='print what would change and write nothing')
+    parser.add_argument('--plan-json', metavar='PATH', help='also write the plan as JSON')
+    args = parser.parse_args()
     try:
         automation = AutomationManager()
-        automation.run()
+        automation.run(dry_run=args.dry_run, plan_json=args.plan_json)
     except KeyboardInterrupt:
         logger.info("\nAutomation interrupted by user")
     except Exception as e:
@@ -3,18 +3,25 @@ FORA Travel Guides - Google Sheets Automation
 Automatically pulls FORA "magic" content from Google Sheets and publishes to your website
 """
 
+import argparse
 import os
-import json
-import csv
-from datetime import datetime
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import logging
 import re
 from urllib.parse import quote
 import requests
 from bs4 import BeautifulSoup
 
+from catalog_db import GOOGLE_SHEETS, CatalogDB
+from guide_index import IndexStore
+from guide_sheet import SheetReader
+from publish_plan import PublishPlan
+from guide_schema import article_jsonld
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -75,40 +82,36 @@ class GoogleSheetsReader:
         guides = []
         
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
+            reader = SheetReader(self.csv_file)
+            for row in reader:
+                # Skip rows without magic content
+                magic_content = row['magic_content']
+                if not magic_content:
+                    continue
+                
+                guide = {
+                    'date': row['date'],
+                    'name': row['name'],
+                    'description': row['description'],
+                    'continent': row['continent'],
+                    'country': row['country'],
+                    'region': row['region'],
+                    'partner': row['partner'],
+                    'style': row['style'],
+                    'season': row['season'],
+                    'budget_friendly': row['budget_friendly'],
+                    'magic_content_url': self._personalize_url(magic_content),
+                    'magic_content_original': magic_content,
+                    'instagram_feed': row['instagram_feed'],
+                    'instagram_story': row['instagram_story'],
+                    'video_template': row['video_template'],
+                    'pdf_template': row['pdf_template'],
+                    'notes': row['notes'],
+                    'article_title': row['article_title']
+                }
                 
-                for row in reader:
-                    # Skip empty rows or rows without magic content
-                    magic_content = row.get('Magic Content', '').strip()
-                    if not magic_content:
-                        continue
-                    
-                    # Personalize the URL with advisor ID
-                    magic_url = self._personalize_url(magic_content)
-                    
-                    guide = {
-                        'date': row.get('Date', ''),
-                        'name': row.get('Name', ''),
-                        'description': row.get('Description', ''),
-                        'continent': row.get('Continent', ''),
-                        'country': row.get('Country', '').strip(),
-                        'region': row.get('Region', '').strip(),
-                        'partner': row.get('Partner', ''),
-                        'style': row.get('Style', ''),
-                        'season': row.get('Season', ''),
-                        'budget_friendly': row.get('< $500 option(s)', '').lower() in ['yes', 'true', 'x'],
-                        'magic_content_url': magic_url,
-                        'magic_content_original': magic_content,
-                        'instagram_feed': row.get('Instagram In-Feed', ''),
-                        'instagram_story': row.get('Instagram Story', ''),
-                        'video_template': row.get('Video Template', ''),
-                        'pdf_template': row.get('PDF Template', ''),
-                        'notes': row.get('Notes', ''),
-                        'article_title': row.get('Article Title (Fora HQ reference)', '')
-                    }
-                    
-                    guides.append(guide)
+                guides.append(guide)
+            reader.report(logger)
             
             logger.info(f"✓ Loaded {len(guides)} travel guides from CSV")
             return guides
@@ -138,7 +141,9 @@ class GoogleSheetsReader:
                 return f"{base}/advisor/{self.advisor_id}/{path}"
         
         return url
-FORAContentFetcher:
+
+
+class FORAContentFetcher:
     """Fetches content from FORA magic content URLs"""
     
     def __init__(self, config: ConfigManager):
@@ -178,34 +183,21 @@ FORAContentFetcher:
                 return True
             else:
                 logger.warning("Authentication may have failed")
-                return False, fetched_content: Optional[str] = None) -> str:
-        """Create a complete branded HTML page"""
-        
-        # Use fetched content if available, otherwise use placeholder
-        if fetched_content:
-            formatted_content = fetched_content
-        else:
-            # Fallback: create a preview/teaser page
-            formatted_content = f"""
-            <div style="padding: 2rem; background: #f8f9fa; border-radius: 8px; text-align: center;">
-                <p style="font-size: 1.2rem; margin-bottom: 1rem;">
-                    This travel guide is available exclusively through FORA Travel.
-                </p>
-                <p style="margin-bottom: 1.5rem;">
-                    <a href="{guide.get('magic_content_url', '')}" 
-                       target="_blank" 
-                       rel="noopener noreferrer"
-                       class="btn"
-                       style="display: inline-block; background: #0b6fa4; color: white; padding: 0.75rem 2rem; 
-                              border-radius: 4px; text-decoration: none; font-weight: 600;">
-                        View Full Guide on FORA
-                    </a>
-                </p>
-                <p style="font-size: 0.9rem; color: #666;">
-                    Contact me for personalized assistance with this destination.
-                </p>
-            </div>
-            """
+                return False
+                
+        except Exception as e:
+            logger.error(f"Authentication error: {str(e)}")
+            return False
+    
+    def fetch_content(self, url: str) -> Optional[str]:
+        """Fetch the article behind a FORA magic content URL"""
+        try:
+            logger.info(f"Fetching content from {url}")
+            response = self.session.get(url, timeout=15)
+            
+            if response.status_code == 200:
+                soup = BeautifulSoup(response.text, 'html.parser')
+                
                 # Extract the main article content
                 content = self._extract_article_content(soup)
                 
@@ -263,59 +255,107 @@ FORAContentFetcher:
 class ContentPublisher:
     """Publishes travel guides to website"""
     
-    def __init__(self, output_dir='travel-guides'):
+    def __init__(self, output_dir='travel-guides', db: Optional[CatalogDB] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.index_file = self.output_dir / 'index.json'
+        self.db = db or CatalogDB()
+        # Sort by published date (newest first)
+        self.index = IndexStore(self.index_file, sort_key=lambda x: x['published_date'], reverse=True,
+                                db=self.db)
         self.state_file = Path('published_guides_state.json')
     
-    def publish_guide(self, guide: Dict, fetched_content: Optional[str] = Noneed_guides_state.json')
-    
-    def publish_guide(self, guide: Dict) -> bool:
-        """Publish a travel guide to the website"""
-        try:
-            # Create sanitized filename from name
-            safe_title = re.sub(r'[^\w\s-]', '', guide['name']).strip().replace(' ', '-')
-            safe_title = safe_title[:50].lower()  # Limit length
-            
-            if not safe_title:
-                safe_title = f"guide-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            # Save HTML file
-            html_file = self.output_dir / f"{safe_title}.html"
-            
-            # Create branded HTML content
-            html_content = self._create_html_page(guide)
-            
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            # Update index
-            self._update_index(guide, str(html_file.name))
-            
-            logger.info(f"✓ Published guide: {guide['name']} → {html_file.name}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error publishing guide '{guide.get('name', 'Unknown')}': {str(e)}")
-            return False
+    @staticmethod
+    def _page_filename(guide: Dict) -> str:
+        """Sanitized page filename from the guide name"""
+        safe_title = re.sub(r'[^\w\s-]', '', guide['name']).strip().replace(' ', '-')
+        safe_title = safe_title[:50].lower()  # Limit length
+        
+        if not safe_title:
+            safe_title = f"guide-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return f"{safe_title}.html"
     
-    def _create_html_page(self, guide: Dict) -> str:
-        """Create a complete branded HTML page"""
+    def plan_publish(self, guides: List[Dict], fetched: Optional[Dict[str, str]] = None,
+                     workers: Optional[int] = None) -> PublishPlan:
+        """Plan publishing the guides without writing anything: pages are rendered
+        across a process pool and compared with their stored content hashes.
+        Guides keep the publish date of their existing page, so republishing an
+        unchanged sheet plans no writes. fetched maps guide names to content
+        fetched from FORA."""
+        fetched = fetched or {}
+        self.db.import_index(self.index_file)
+        existing = {e['filename']: e for e in self.db.publications(self.index_file)}
         
-        # Process magic content - convert line breaks to paragraphs
-        content = guide['magic_content'].strip()
+        jobs = {}
+        for guide in guides:
+            filename = self._page_filename(guide)
+            entry = existing.get(filename)
+            published = entry['published_date'][:10] if entry else date.today().isoformat()
+            jobs[filename] = (guide, filename, fetched.get(guide['name']), published)  # last row wins
+        jobs = list(jobs.values())
         
-        # If content has URLs, make them clickable
-        content = re.sub(
-            r'(https?://[^\s<>"]+)',
-            r'<a href="\1" target="_blank" rel="noopener noreferrer">\1</a>',
-            content
-        )
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                rendered = list(pool.map(_render_page, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            rendered = [_render_page(job) for job in jobs]
         
-        # Split into paragraphs on double line breaks
-        paragraphs = content.split('\n\n')
-        formatted_content = '\n'.join([f'<p>{p.strip()}</p>' for p in paragraphs if p.strip()])
+        plan = PublishPlan(GOOGLE_SHEETS, self.db)
+        for (guide, filename, _, _), result in zip(jobs, rendered):
+            if isinstance(result, Exception):
+                logger.error(f"Error publishing guide '{guide.get('name', 'Unknown')}': {str(result)}")
+                plan.fail(guide['name'], result)
+                continue
+            data, digest = result
+            plan.page(self.output_dir / filename, data, digest)
+            entry = existing.get(filename)
+            plan.index_entry(self._index_entry(guide, filename,
+                                               entry['published_date'] if entry else datetime.now().isoformat()),
+                             entry)
+            plan.published([guide['name']])
+        return plan
+    
+    def apply_plan(self, plan: PublishPlan) -> Dict[str, int]:
+        """Write what plan_publish planned and commit the index once"""
+        counts = plan.apply(self.index)
+        for page in plan.pages:
+            if page['action'] != 'unchanged':
+                logger.info(f"✓ Published guide: {page['path']}")
+        if counts['index_changes']:
+            logger.info(f"✓ Index updated: {counts['index_changes']} guide(s) in {self.index_file}")
+        return counts
+    
+    @staticmethod
+    def _create_html_page(guide: Dict, filename: str, fetched_content: Optional[str] = None,
+                          published: Optional[str] = None) -> str:
+        """Create a complete branded HTML page"""
+        
+        # Use fetched content if available, otherwise use placeholder
+        if fetched_content:
+            formatted_content = fetched_content
+        else:
+            # Fallback: create a preview/teaser page
+            formatted_content = f"""
+            <div style="padding: 2rem; background: #f8f9fa; border-radius: 8px; text-align: center;">
+                <p style="font-size: 1.2rem; margin-bottom: 1rem;">
+                    This travel guide is available exclusively through FORA Travel.
+                </p>
+                <p style="margin-bottom: 1.5rem;">
+                    <a href="{guide.get('magic_content_url', '')}" 
+                       target="_blank" 
+                       rel="noopener noreferrer"
+                       class="btn"
+                       style="display: inline-block; background: #0b6fa4; color: white; padding: 0.75rem 2rem; 
+                              border-radius: 4px; text-decoration: none; font-weight: 600;">
+                        View Full Guide on FORA
+                    </a>
+                </p>
+                <p style="font-size: 0.9rem; color: #666;">
+                    Contact me for personalized assistance with this destination.
+                </p>
+            </div>
+            """
         
         # Create location string
         location_parts = [guide['region'], guide['country'], guide['continent']]
@@ -342,6 +382,9 @@ class ContentPublisher:
                 tags_html += f'<span style="background: #e9ecef; padding: 0.25rem 0.75rem; border-radius: 4px; font-size: 0.85rem;">{tag}</span>'
             tags_html += '</div>'
         
+        jsonld = article_jsonld(guide['name'], filename, description=guide['description'], location=location,
+                                published=published)
+        
         html_template = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -350,6 +393,7 @@ class ContentPublisher:
     <meta name="description" content="{guide['description'][:155]}">
     <title>{guide['name']} - SEAL Enterprises Travel Guide</title>
     <link rel="stylesheet" href="../css/styles.css">
+    {jsonld}
     <style>
         .travel-guide {{
             max-width: 800px;
@@ -423,10 +467,7 @@ class ContentPublisher:
 <body>
     <nav class="navbar" style="background: #0b6fa4; padding: 1rem 0; color: white;">
         <div class="container" style="max-width: 1200px; margin: 0 auto; padding: 0 1rem; display: flex; justify-content: space-between; align-items: center;">
-            <a href="../index.html" style="color
-            advisor_id=self.config.get('FORA_ADVISOR_ID', 'gregory-rhoney')
-        )
-        self.content_fetcher = FORAContentFetcher(self.config: white; text-decoration: none; font-weight: 700; font-size: 1.2rem;">SEAL Enterprises</a>
+            <a href="../index.html" style="color: white; text-decoration: none; font-weight: 700; font-size: 1.2rem;">SEAL Enterprises</a>
             <a href="../index.html" style="color: white; text-decoration: none;">← Back to Home</a>
         </div>
     </nav>
@@ -485,62 +526,44 @@ class ContentPublisher:
 </html>"""
         return html_template
     
-    def _update_index(self, guide: Dict, filename: str):
-        """Update the guides index file"""
-        try:
-            # Load existing index
-            if self.index_file.exists():
-                with open(self.index_file, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-            else:
-                index = {'guides': [], 'last_updated': None}
-            
-            # Add or update guide entry
-            guide_entry = {
-                'title': guide['name'],
-                'description': guide['description'],
-                'filename': filename,
-                'location': f"{guide['region']}, {guide['country']}" if guide['country'] else guide['continent'],
-                'continent': guide['continent'],
-                'country': guide['country'],
-                'style': guide['style'],
-                'season': guide['season'],
-                'budget_friendly': guide['budget_friendly'],
-                'published_date': datetime.now().isoformat(),
-                'source': 'FORA Travel'
-            }
-            
-            # Remove any existing entry with same filename
-            index['guides'] = [g for g in index['guides'] if g['filename'] != filename]
-            index['guides'].append(guide_entry)
-            index['last_updated'] = datetime.now().isoformat()
-            
-            # Sort by published date (newest first)
-            index['guides'].sort(key=lambda x: x['published_date'], reverse=True)
-            
-            # Save updated index
-            with open(self.index_file, 'w', encoding='utf-8') as f:
-                json.dump(index, f, indent=2)
-            
-        except Exception as e:
-            logger.error(f"Error updating index: {str(e)}")
+    @staticmethod
+    def _index_entry(guide: Dict, filename: str, published_date: str) -> Dict:
+        """The guide's travel-guides/index.json entry"""
+        return {
+            'title': guide['name'],
+            'description': guide['description'],
+            'filename': filename,
+            'location': f"{guide['region']}, {guide['country']}" if guide['country'] else guide['continent'],
+            'continent': guide['continent'],
+            'country': guide['country'],
+            'style': guide['style'],
+            'season': guide['season'],
+            'budget_friendly': guide['budget_friendly'],
+            'published_date': published_date,
+            'source': 'FORA Travel'
+        }
     
     def load_published_state(self) -> List[str]:
         """Load list of already published guide names"""
-        if self.state_file.exists():
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                state = json.load(f)
-                return state.get('published_guides', [])
-        return []
+        self.db.import_state(GOOGLE_SHEETS, self.state_file, 'published_guides')
+        return self.db.published_keys(GOOGLE_SHEETS)
     
     def save_published_state(self, published_guides: List[str]):
-        """Save list of published guide names"""
-        state = {
-            'published_guides': published_guides,
-            'last_run': datetime.now().isoformat()
-        }
-        with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f, indent=2)
+        """Record published guide names and export published_guides_state.json
+        (left untouched when no guide was newly published)"""
+        if self.db.record_published(GOOGLE_SHEETS, published_guides) or not self.state_file.exists():
+            self.db.export_state(GOOGLE_SHEETS, self.state_file, 'published_guides')
+
+
+def _render_page(job):
+    """Render one page for ContentPublisher.plan_publish: (html bytes, sha256), or
+    the exception raised; module level so a process pool can run it"""
+    guide, filename, fetched_content, published = job
+    try:
+        data = ContentPublisher._create_html_page(guide, filename, fetched_content, published).encode('utf-8')
+    except Exception as e:
+        return e
+    return data, hashlib.sha256(data).hexdigest()
 
 
 class AutomationManager:
@@ -548,11 +571,32 @@ class AutomationManager:
     
     def __init__(self):
         self.config = ConfigManager()
-        self.sheets_reader = GoogleSheetsReader()
-        self.publisher = ContentPublisher()
+        self.sheets_reader = GoogleSheetsReader(
+            advisor_id=self.config.get('FORA_ADVISOR_ID', 'gregory-rhoney')
+        )
+        self.content_fetcher = FORAContentFetcher(self.config)
+        self.publisher = ContentPublisher(self.config.get('OUTPUT_DIR', 'travel-guides'))
     
-    def run(self):
-        ""Authenticate with FORA if credentials are provided
+    def run(self, rebuild: bool = False, workers: Optional[int] = None, dry_run: bool = False,
+            plan_json: Optional[str] = None, only: Optional[Iterable[str]] = None) -> Optional[PublishPlan]:
+        """Run the automation workflow: plan the run, then apply it unless dry_run;
+        returns the plan (None if the sheet had no guides).
+        rebuild republishes every guide in the sheet instead of only the new ones;
+        only (guide names, e.g. the rows sheet_sync.py found new or changed)
+        publishes just those guides, whether or not they were published before."""
+        logger.info("=" * 70)
+        logger.info("FORA Travel Guides - Google Sheets Automation")
+        logger.info("=" * 70)
+        
+        # Read guides from the exported sheet
+        logger.info("\nReading travel guides from CSV...")
+        guides = self.sheets_reader.read_guides()
+        
+        if not guides:
+            logger.warning("No travel guides found - nothing to publish")
+            return
+        
+        # Authenticate with FORA if credentials are provided
         fetch_content = self.config.get('FETCH_FORA_CONTENT', 'True') == 'True'
         
         if fetch_content:
@@ -567,65 +611,65 @@ class AutomationManager:
         published_guides = self.publisher.load_published_state()
         logger.info(f"Previously published: {len(published_guides)} guides")
         
-        # Process each guide
-        new_count = 0
-        skipped_count = 0
+        # Only new guides, unless rebuilding
+        if rebuild:
+            targets = guides
+        elif only is not None:
+            only = set(only)
+            targets = [g for g in guides if g['name'] in only]
+            logger.info(f"Guides changed in the sheet: {len(targets)}")
+        else:
+            targets = [g for g in guides if g['name'] not in published_guides]
+            logger.info(f"Previously published (skipped): {len(guides) - len(targets)}")
         
-        for guide in guides:
-            guide_id = guide['name']
-            
-            if guide_id in published_guides:
-                skipped_count += 1
-                logger.debug(f"Skipping already published: {guide['name']}")
-                continue
-            
-            logger.info(f"\n📚 Processing: {guide['name']}")
-            
-            # Fetch content from FORA if enabled
-            fetched_content = None
-            if fetch_content and guide.get('magic_content_url'):
-                fetched_content = self.content_fetcher.fetch_content(guide['magic_content_url'])
-            
-            # Publish to website
-            if self.publisher.publish_guide(guide, fetched_content
-        new_count = 0
-        skipped_count = 0
+        fetched = {}
+        if fetch_content:
+            # network bound: fetch on a few threads rather than one guide at a time
+            with_urls = [g for g in targets if g.get('magic_content_url')]
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                contents = pool.map(lambda g: self.content_fetcher.fetch_content(g['magic_content_url']), with_urls)
+                fetched = {g['name']: c for g, c in zip(with_urls, contents) if c}
         
-        for guide in guides:
-            guide_id = guide['name']
-            
-            if guide_id in published_guides:
-                skipped_count += 1
-                logger.debug(f"Skipping already published: {guide['name']}")
-                continue
-            
-            logger.info(f"\n📚 Processing: {guide['name']}")
-            
-            # Publish to website
-            if self.publisher.publish_guide(guide):
-                published_guides.append(guide_id)
-                new_count += 1
+        logger.info(f"\n📚 Rendering {len(targets)} guides on {workers or os.cpu_count() or 1} worker(s)...")
+        plan = self.publisher.plan_publish(targets, fetched, workers)
+        for line in plan.summary():
+            logger.info(line)
+        if plan_json:
+            plan.write_json(plan_json)
+            logger.info(f"Plan written to {plan_json}")
+        if dry_run:
+            logger.info("\nDry run - nothing was written")
+            return plan
         
-        # Save state
-        self.publisher.save_published_state(published_guides)
+        counts = self.publisher.apply_plan(plan)
+        self.publisher.save_published_state(published_guides + plan.state)
         
         logger.info("\n" + "=" * 70)
         logger.info(f"Automation Complete!")
-        logger.info(f"  New guides published: {new_count}")
-        logger.info(f"  Previously published (skipped): {skipped_count}")
-        logger.info(f"  Total guides in catalog: {len(published_guides)}")
+        logger.info(f"  Pages written: {counts['pages_written']}")
+        logger.info(f"  Pages unchanged (not written): {plan.counts()['pages_unchanged']}")
+        logger.info(f"  Failed: {len(plan.failed)}")
+        logger.info(f"  Total guides in catalog: {len(set(published_guides + plan.state))}")
         logger.info(f"  Output directory: {self.publisher.output_dir.absolute()}")
         logger.info("=" * 70)
         
-        if new_count > 0:
+        if counts['pages_written'] > 0:
             logger.info("\n✓ Check the 'travel-guides' folder for your new HTML files!")
             logger.info("✓ View 'travel-guides/index.json' for the complete catalog")
+        return plan
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publish FORA guides from the exported Google Sheet')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='republish every guide in the sheet (pages are only written when they change)')
+    parser.add_argument('--workers', type=int, help='rendering processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='print what would change and write nothing')
+    parser.add_argument('--plan-json', metavar='PATH', help='also write the plan as JSON')
+    args = parser.parse_args()
     try:
         automation = AutomationManager()
-        automation.run()
+        automation.run(rebuild=args.rebuild, workers=args.workers, dry_run=args.dry_run, plan_json=args.plan_json)
     except KeyboardInterrupt:
         logger.info("\nAutomation interrupted by user")
     except Exception as e:
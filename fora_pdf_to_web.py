@@ -3,14 +3,19 @@ FORA PDF Travel Guides to Website Converter
 Converts FORA travel guide PDFs to branded HTML pages for your website
 """
 
+import argparse
 import os
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 import logging
 import re
 
+from catalog_db import PDF, CatalogDB
+from guide_index import IndexStore
+from publish_plan import PublishPlan
+from guide_schema import article_jsonld
+
 try:
     import PyPDF2
 except ImportError:
@@ -126,44 +131,44 @@ class PDFConverter:
 class WebPublisher:
     """Publishes converted guides to website"""
     
-    def __init__(self, output_dir='travel-guides'):
+    def __init__(self, output_dir='travel-guides', db: Optional[CatalogDB] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.index_file = self.output_dir / 'index.json'
+        self.db = db or CatalogDB()
+        # Sort by title
+        self.index = IndexStore(self.index_file, sort_key=lambda x: x['title'], db=self.db)
     
-    def publish_guide(self, guide: Dict) -> bool:
-        """Publish a guide to the website"""
-        try:
-            # Create sanitized filename
-            safe_title = re.sub(r'[^\w\s-]', '', guide['title']).strip().replace(' ', '-')
-            safe_title = safe_title[:50].lower()
-            
-            html_file = self.output_dir / f"{safe_title}.html"
-            
-            # Create HTML page
-            html_content = self._create_html_page(guide)
-            
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            # Copy PDF to travel-guides folder for download
-            pdf_copy = self.output_dir / guide['filename']
-            if not pdf_copy.exists():
-                import shutil
-                shutil.copy2(guide['source_pdf'], pdf_copy)
-            
-            # Update index
-            self._update_index(guide, str(html_file.name))
-            
-            logger.info(f"✓ Published: {guide['title']} → {html_file.name}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error publishing guide: {str(e)}")
-            return False
+    @staticmethod
+    def _page_filename(guide: Dict) -> str:
+        """Sanitized page filename from the guide title"""
+        safe_title = re.sub(r'[^\w\s-]', '', guide['title']).strip().replace(' ', '-')
+        safe_title = safe_title[:50].lower()
+        return f"{safe_title}.html"
+    
+    def existing_entries(self) -> Dict[str, Dict]:
+        """Current index entries by filename"""
+        self.db.import_index(self.index_file)
+        return {e['filename']: e for e in self.db.publications(self.index_file)}
     
-    def _create_html_page(self, guide: Dict) -> str:
-        """Create branded HTML page"""
+    def plan_guide(self, plan: PublishPlan, guide: Dict, existing: Dict[str, Dict]):
+        """Add the guide's page, PDF copy and index entry to a publish plan
+        (nothing is written)"""
+        filename = self._page_filename(guide)
+        entry = existing.get(filename)
+        # keep the first publish date, so rerunning an unchanged PDF plans no writes
+        published = entry['published_date'] if entry else guide['converted_date']
+        plan.page(self.output_dir / filename, self._create_html_page(guide, filename, published).encode('utf-8'))
+        plan.copy(guide['source_pdf'], self.output_dir / guide['filename'])
+        continent = self.db.continent_for(f"{guide['location']} {guide['title']}")
+        plan.index_entry(self._index_entry(guide, filename, published, continent), entry)
+        plan.published([guide['filename']])
+    
+    def _create_html_page(self, guide: Dict, filename: str, published: str) -> str:
+        """Create branded HTML page (published: ISO publish date)"""
+        jsonld = article_jsonld(guide['title'], filename,
+                                description=f"Expert travel guide for {guide['title']} curated by SEAL Enterprises",
+                                location=guide['location'], published=published[:10])
         
         # Format text into paragraphs
         text = guide['text']
@@ -194,6 +199,7 @@ class WebPublisher:
     <meta name="description" content="Expert travel guide for {guide['title']} curated by SEAL Enterprises">
     <title>{guide['title']} - SEAL Enterprises Travel Guide</title>
     <link rel="stylesheet" href="../css/styles.css">
+    {jsonld}
     <style>
         .travel-guide {{
             max-width: 800px;
@@ -306,41 +312,21 @@ class WebPublisher:
 </html>"""
         return html_template
     
-    def _update_index(self, guide: Dict, filename: str):
-        """Update the guides index"""
-        try:
-            if self.index_file.exists():
-                with open(self.index_file, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-            else:
-                index = {'guides': [], 'last_updated': None}
-            
-            guide_entry = {
-                'title': guide['title'],
-                'filename': filename,
-                'pdf_filename': guide['filename'],
-                'location': guide['location'],
-                'published_date': datetime.now().isoformat(),
-                'source': 'FORA Travel'
-            }
-            
-            # Remove existing entry with same filename
-            index['guides'] = [g for g in index['guides'] if g['filename'] != filename]
-            index['guides'].append(guide_entry)
-            index['last_updated'] = datetime.now().isoformat()
-            
-            # Sort by title
-            index['guides'].sort(key=lambda x: x['title'])
-            
-            with open(self.index_file, 'w', encoding='utf-8') as f:
-                json.dump(index, f, indent=2)
-                
-        except Exception as e:
-            logger.error(f"Error updating index: {str(e)}")
-
-
-def main():
-    """Main conversion process"""
+    @staticmethod
+    def _index_entry(guide: Dict, filename: str, published_date: str, continent: str) -> Dict:
+        """The guide's travel-guides/index.json entry"""
+        return {
+            'title': guide['title'],
+            'filename': filename,
+            'pdf_filename': guide['filename'],
+            'location': guide['location'],
+            'continent': continent,
+            'published_date': published_date,
+            'source': 'FORA Travel'
+        }
+    
+def main(dry_run: bool = False, plan_json: Optional[str] = None):
+    """Main conversion process: plan every guide, then apply the plan unless dry_run"""
     logger.info("=" * 70)
     logger.info("FORA PDF Travel Guides → Website Converter")
     logger.info("=" * 70)
@@ -367,7 +353,8 @@ def main():
     
     # Convert each PDF
     logger.info(f"\nConverting {len(pdfs)} PDF guides...")
-    converted = 0
+    plan = PublishPlan(PDF, publisher.db)
+    existing = publisher.existing_entries()
     
     for pdf_path in pdfs:
         logger.info(f"\n📄 Processing: {pdf_path.name}")
@@ -380,9 +367,25 @@ def main():
         # Parse guide info
         guide = converter.parse_guide_info(pdf_path, text)
         
-        # Publish to website
-        if publisher.publish_guide(guide):
-            converted += 1
+        # Plan the page
+        try:
+            publisher.plan_guide(plan, guide, existing)
+        except Exception as e:
+            logger.error(f"Error publishing guide: {str(e)}")
+            plan.fail(guide['title'], e)
+    
+    for line in plan.summary():
+        logger.info(line)
+    if plan_json:
+        plan.write_json(plan_json)
+        logger.info(f"Plan written to {plan_json}")
+    if dry_run:
+        logger.info("\nDry run - nothing was written")
+        return
+    
+    plan.apply(publisher.index)
+    publisher.db.record_published(PDF, plan.state)
+    converted = len(plan.state)
     
     logger.info("\n" + "=" * 70)
     logger.info(f"✅ Conversion Complete!")
@@ -398,8 +401,12 @@ def main():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert FORA guide PDFs to branded web pages')
+    parser.add_argument('--dry-run', action='store_true', help='print what would change and write nothing')
+    parser.add_argument('--plan-json', metavar='PATH', help='also write the plan as JSON')
+    args = parser.parse_args()
     try:
-        main()
+        main(dry_run=args.dry_run, plan_json=args.plan_json)
     except KeyboardInterrupt:
         logger.info("\nConversion interrupted by user")
     except Exception as e:
@@ -4,11 +4,12 @@ Creates a "Travel Guides" section HTML snippet to add to existing resources page
 """
 
 import os
-import csv
 from datetime import datetime
 from typing import Dict, List
 import logging
 
+from guide_sheet import SheetReader
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -32,29 +33,16 @@ class FORASectionGenerator:
         guides = []
         
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                # Skip first line if it's not the header
-                first_line = f.readline()
-                if 'Date' not in first_line and 'Name' not in first_line:
-                    # Not header, read from position
-                    f.seek(0)
-                    f.readline()  # Skip line 1
-                else:
-                    f.seek(0)  # Reset to beginning
-                
-                reader = csv.DictReader(f)
+            reader = SheetReader(self.csv_file)
+            for row in reader:
+                guide = {
+                    'name': row['name'],
+                    'continent': row['continent'],
+                    'description': row['description']
+                }
                 
-                for row in reader:
-                    if not row.get('Name'):
-                        continue
-                    
-                    guide = {
-                        'name': row.get('Name', '').strip(),
-                        'continent': row.get('Continent', 'Other').strip(),
-                        'description': row.get('Short Description', '').strip()
-                    }
-                    
-                    guides.append(guide)
+                guides.append(guide)
+            reader.report(logger)
             
             self.guides = guides
             logger.info(f"Loaded {len(guides)} FORA destination guides")
@@ -5,13 +5,16 @@ Creates a resources directory page with links to FORA magic content
 """
 
 import os
-import json
-import csv
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
 import logging
 import re
+import unicodedata
+
+from catalog_artifacts import CATALOG_SLIM_FIELDS, continent_slug, write_catalog, write_json
+from catalog_db import CatalogDB
+from guide_sheet import SheetReader
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +26,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# resources.html shows the first guides of each continent; the rest go into
+# small continent pages (resources-pages/europe-2.html, ...) that crawlers can
+# follow and the page script fetches on demand
+SHARD_DIR = 'resources-pages'
+FIRST_PAGE_SIZE = 6
+SHARD_SIZE = 24
+
+# inverted index the resources page searches and filters with
+SEARCH_INDEX_FILE = 'fora_guides_search.json'
+SEARCH_FIELDS = ('name', 'description', 'continent', 'country', 'region', 'style', 'season')
+STOPWORDS = {'a', 'an', 'and', 'at', 'for', 'from', 'in', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+# filter dimensions of the facet table (sorted guide ids and counts per value,
+# and counts for every pair of values from two dimensions)
+FACET_DIMENSIONS = ('continent', 'style', 'season', 'budget')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, accent-free words (the page script tokenizes queries the same way)"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [t for t in re.split(r'[^a-z0-9]+', text) if t and t not in STOPWORDS]
+
 
 class ResourcesPageGenerator:
     """Generates a resources page from FORA guide catalog"""
@@ -31,6 +57,7 @@ class ResourcesPageGenerator:
         self.csv_file = csv_file
         self.advisor_id = advisor_id
         self.guides = []
+        self.facets = {}
     
     def load_guides(self) -> List[Dict]:
         """Load guides from CSV"""
@@ -42,42 +69,27 @@ class ResourcesPageGenerator:
         guides = []
         
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                # Skip first line if it's not the header
-                first_line = f.readline()
-                # Check if first line looks like a header (contains "Date" or "Name")
-                if 'Date' not in first_line and 'Name' not in first_line:
-                    # First line is not header, continue reading from line 2
-                    pass
-                else:
-                    # First line IS the header, reset to beginning
-                    f.seek(0)
+            reader = SheetReader(self.csv_file)
+            for row in reader:
+                if not row['magic_content']:
+                    continue
                 
-                reader = csv.DictReader(f)
+                guide = {
+                    'name': row['name'],
+                    'description': row['description'],
+                    'continent': row['continent'],
+                    'country': row['country'],
+                    'region': row['region'],
+                    'style': row['style'],
+                    'season': row['season'],
+                    'partner': row['partner'],
+                    'budget_friendly': row['budget_friendly'],
+                    'magic_url': self._personalize_url(row['magic_content']),
+                    'date': row['date']
+                }
                 
-                for row in reader:
-                    magic_content = row.get('Magic Content', '').strip()
-                    if not magic_content:
-                        continue
-                    
-                    # Personalize URL
-                    magic_url = self._personalize_url(magic_content)
-                    
-                    guide = {
-                        'name': row.get('Name', '').strip(),
-                        'description': row.get('Description', '').strip(),
-                        'continent': row.get('Continent', '').strip(),
-                        'country': row.get('Country', '').strip(),
-                        'region': row.get('Region', '').strip(),
-                        'style': row.get('Style', '').strip(),
-                        'season': row.get('Season', '').strip(),
-                        'partner': row.get('Partner', '').strip(),
-                        'budget_friendly': row.get('< $500 option(s)', '').lower() in ['yes', 'true', 'x'],
-                        'magic_url': magic_url,
-                        'date': row.get('Date', '').strip()
-                    }
-                    
-                    guides.append(guide)
+                guides.append(guide)
+            reader.report(logger)
             
             self.guides = guides
             logger.info(f"✓ Loaded {len(guides)} travel guides from CSV")
@@ -124,6 +136,13 @@ class ResourcesPageGenerator:
             for continent in by_continent:
                 by_continent[continent].sort(key=lambda x: x['name'])
             
+            # Number the guides in page order; cards, search index and facet
+            # table all refer to guides by this id
+            for continent, guides, first_id in self._ordered(by_continent):
+                for i, guide in enumerate(guides):
+                    guide['id'] = first_id + i
+            self.facets = self._create_facets()
+            
             # Generate HTML
             html = self._create_html(by_continent)
             
@@ -132,6 +151,13 @@ class ResourcesPageGenerator:
             
             logger.info(f"✓ Resources page created: {output_file}")
             
+            shard_count = self._write_shards(by_continent, Path(output_file).parent / SHARD_DIR)
+            logger.info(f"✓ {shard_count} continent pages written to {SHARD_DIR}/")
+            
+            index_path = Path(output_file).parent / SEARCH_INDEX_FILE
+            size = write_json(index_path, self._create_search_index(by_continent))
+            logger.info(f"✓ Search index created: {index_path} ({size:,} bytes)")
+            
             # Also create JSON catalog
             self._create_json_catalog()
             
@@ -152,8 +178,7 @@ class ResourcesPageGenerator:
         # Build continent sections
         sections_html = ''
         for continent in sorted(by_continent.keys()):
-            guides = by_continent[continent]
-            sections_html += self._create_continent_section(continent, guides)
+            sections_html += self._create_continent_section(continent, by_continent[continent])
         
         html = f"""<!DOCTYPE html>
 <html lang="en">
@@ -163,161 +188,7 @@ class ResourcesPageGenerator:
     <meta name="description" content="Exclusive travel guides and destination resources curated by SEAL Enterprises">
     <title>Travel Resources & Destination Guides - SEAL Enterprises</title>
     <link rel="stylesheet" href="css/styles.css">
-    <style>
-        .resources-hero {{
-            background: linear-gradient(135deg, #0b6fa4 0%, #094d73 100%);
-            color: white;
-            padding: 4rem 0;
-            text-align: center;
-        }}
-        .resources-hero h1 {{
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-        }}
-        .resources-hero p {{
-            font-size: 1.2rem;
-            opacity: 0.9;
-        }}
-        .stats {{
-            display: flex;
-            justify-content: center;
-            gap: 3rem;
-            margin-top: 2rem;
-            flex-wrap: wrap;
-        }}
-        .stat {{
-            text-align: center;
-        }}
-        .stat-number {{
-            font-size: 2.5rem;
-            font-weight: 700;
-            display: block;
-        }}
-        .stat-label {{
-            font-size: 0.9rem;
-            opacity: 0.8;
-        }}
-        .filter-bar {{
-            background: #f8f9fa;
-            padding: 1.5rem;
-            margin: 2rem 0;
-            border-radius: 8px;
-            display: flex;
-            gap: 1rem;
-            flex-wrap: wrap;
-            align-items: center;
-        }}
-        .filter-bar input {{
-            flex: 1;
-            min-width: 250px;
-            padding: 0.75rem;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            font-size: 1rem;
-        }}
-        .filter-bar select {{
-            padding: 0.75rem;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            font-size: 1rem;
-        }}
-        .continent-section {{
-            margin: 3rem 0;
-        }}
-        .continent-header {{
-            color: #0b6fa4;
-            font-size: 2rem;
-            margin-bottom: 1.5rem;
-            padding-bottom: 0.5rem;
-            border-bottom: 2px solid #0b6fa4;
-        }}
-        .guides-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
-            gap: 1.5rem;
-            margin-bottom: 2rem;
-        }}
-        .guide-card {{
-            background: white;
-            border: 1px solid #e0e0e0;
-            border-radius: 8px;
-            padding: 1.5rem;
-            transition: all 0.3s;
-            display: flex;
-            flex-direction: column;
-        }}
-        .guide-card:hover {{
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-            transform: translateY(-2px);
-        }}
-        .guide-card h3 {{
-            color: #0b6fa4;
-            margin-bottom: 0.75rem;
-            font-size: 1.3rem;
-        }}
-        .guide-meta {{
-            display: flex;
-            gap: 0.75rem;
-            flex-wrap: wrap;
-            margin-bottom: 0.75rem;
-            font-size: 0.85rem;
-            color: #666;
-        }}
-        .guide-tag {{
-            background: #e9ecef;
-            padding: 0.25rem 0.75rem;
-            border-radius: 4px;
-        }}
-        .budget-tag {{
-            background: #d4edda;
-            color: #155724;
-            padding: 0.25rem 0.75rem;
-            border-radius: 4px;
-            font-weight: 600;
-        }}
-        .guide-description {{
-            color: #555;
-            margin-bottom: 1rem;
-            flex: 1;
-            line-height: 1.6;
-        }}
-        .guide-link {{
-            display: inline-block;
-            background: #0b6fa4;
-            color: white;
-            padding: 0.75rem 1.5rem;
-            border-radius: 4px;
-            text-decoration: none;
-            font-weight: 600;
-            text-align: center;
-            transition: background 0.2s;
-        }}
-        .guide-link:hover {{
-            background: #094d73;
-        }}
-        .cta-section {{
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            padding: 3rem;
-            border-radius: 8px;
-            text-align: center;
-            margin: 3rem 0;
-        }}
-        .cta-section h2 {{
-            color: #0b6fa4;
-            margin-bottom: 1rem;
-        }}
-        @media (max-width: 768px) {{
-            .resources-hero h1 {{
-                font-size: 1.8rem;
-            }}
-            .guides-grid {{
-                grid-template-columns: 1fr;
-            }}
-            .stats {{
-                gap: 1.5rem;
-            }}
-        }}
-    </style>
+    <link rel="stylesheet" href="css/resources.css">
 </head>
 <body>
     <nav class="navbar" style="background: #0b6fa4; padding: 1rem 0; color: white;">
@@ -362,15 +233,24 @@ class ResourcesPageGenerator:
     
     <main class="container" style="max-width: 1200px; margin: 0 auto; padding: 2rem 1rem;">
         <div class="filter-bar">
-            <input type="text" id="searchInput" placeholder="🔍 Search destinations, countries, or styles...">
-            <select id="continentFilter">
+            <input type="text" id="searchInput" list="guideSuggestions" autocomplete="off" placeholder="🔍 Search destinations, countries, or styles...">
+            <datalist id="guideSuggestions"></datalist>
+            <select id="continentFilter" data-facet="continent">
                 <option value="">All Continents</option>
-                {self._create_continent_options(by_continent)}
+                {self._create_continent_options()}
             </select>
-            <select id="styleFilter">
+            <select id="styleFilter" data-facet="style">
                 <option value="">All Styles</option>
                 {self._create_style_options()}
             </select>
+            <select id="seasonFilter" data-facet="season">
+                <option value="">All Seasons</option>
+                {self._create_facet_options('season')}
+            </select>
+            <label class="budget-filter">
+                <input type="checkbox" id="budgetFilter" value="yes">
+                💰 Budget-friendly (<span id="budgetCount">{self.facets['counts']['budget'].get('yes', 0)}</span>)
+            </label>
         </div>
         
         <div id="guidesContainer">
@@ -400,65 +280,293 @@ class ResourcesPageGenerator:
     </footer>
     
     <script>
-        // Search and filter functionality
+        // Search and filter functionality. Each continent starts with its first
+        // few guides; "Show all" links point at the continent pages, which are
+        // fetched and appended in place. Searches and filters are answered from
+        // the prebuilt index ({SEARCH_INDEX_FILE}), and only the continent pages
+        // holding matches are fetched. Filters intersect the facet table's id
+        // lists, and the option counts come from its precomputed counts.
         const searchInput = document.getElementById('searchInput');
-        const continentFilter = document.getElementById('continentFilter');
-        const styleFilter = document.getElementById('styleFilter');
-        const allCards = document.querySelectorAll('.guide-card');
-        const allSections = document.querySelectorAll('.continent-section');
-        
-        function filterGuides() {{
-            const searchTerm = searchInput.value.toLowerCase();
-            const continent = continentFilter.value.toLowerCase();
-            const style = styleFilter.value.toLowerCase();
+        const facetSelects = [...document.querySelectorAll('.filter-bar select[data-facet]')];
+        const budgetFilter = document.getElementById('budgetFilter');
+        const budgetCount = document.getElementById('budgetCount');
+        const suggestions = document.getElementById('guideSuggestions');
+        const container = document.getElementById('guidesContainer');
+        const pages = new Map();
+        let searchIndex = null;
+        let filterRun = 0;
+        
+        function fetchPage(url) {{
+            if (!pages.has(url)) {{
+                pages.set(url, fetch(url)
+                    .then(response => response.ok ? response.text() : Promise.reject(response.status))
+                    .then(html => new DOMParser().parseFromString(html, 'text/html')));
+            }}
+            return pages.get(url);
+        }}
+        
+        function appendCards(doc, url) {{
+            const source = doc.querySelector('.continent-section');
+            const section = container.querySelector(`.continent-section[data-continent="${{source.dataset.continent}}"]`);
+            const grid = section.querySelector('.guides-grid');
+            doc.querySelectorAll('.guide-card').forEach(card => {{
+                const id = Number(card.dataset.id);
+                if (grid.querySelector(`.guide-card[data-id="${{id}}"]`)) return;
+                card.querySelectorAll('a[href]').forEach(a => {{ a.href = new URL(a.getAttribute('href'), url).href; }});
+                const after = [...grid.children].find(other => Number(other.dataset.id) > id);
+                grid.insertBefore(document.adoptNode(card), after || null);
+            }});
+        }}
+        
+        async function loadMore(link) {{
+            const url = link.href;
+            let doc;
+            try {{
+                doc = await fetchPage(url);
+            }} catch (error) {{
+                return false;
+            }}
+            appendCards(doc, url);
+            const next = doc.querySelector('.shard-nav a[rel="next"]');
+            if (next) {{
+                link.href = new URL(next.getAttribute('href'), url).href;
+            }} else {{
+                link.remove();
+            }}
+            return true;
+        }}
+        
+        function loadIndex() {{
+            searchIndex = searchIndex || fetch('{SEARCH_INDEX_FILE}')
+                .then(response => response.json())
+                .then(index => {{
+                    index.sortedTerms = Object.keys(index.terms).sort();
+                    index.stopwords = new Set(index.stopwords);
+                    return index;
+                }});
+            return searchIndex;
+        }}
+        
+        function tokenize(text, index) {{
+            return text.toLowerCase().normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '')
+                .split(/[^a-z0-9]+/).filter(token => token && !index.stopwords.has(token));
+        }}
+        
+        function postings(index, token, prefix) {{
+            if (!prefix) return index.terms[token] || [];
+            // the word being typed: every term starting with it (binary search for the first)
+            const terms = index.sortedTerms;
+            let lo = 0, hi = terms.length;
+            while (lo < hi) {{
+                const mid = (lo + hi) >> 1;
+                if (terms[mid] < token) lo = mid + 1; else hi = mid;
+            }}
+            const ids = new Set();
+            for (let i = lo; i < terms.length && terms[i].startsWith(token); i++) {{
+                index.terms[terms[i]].forEach(id => ids.add(id));
+            }}
+            return [...ids];
+        }}
+        
+        function activeFacets() {{
+            const active = facetSelects.filter(select => select.value)
+                .map(select => [select.dataset.facet, select.value]);
+            if (budgetFilter.checked) active.push(['budget', budgetFilter.value]);
+            return active;
+        }}
+        
+        function intersect(lists) {{
+            if (!lists.length) return null;
+            lists.sort((a, b) => a.length - b.length);
+            let result = new Set(lists[0]);
+            lists.slice(1).forEach(list => {{
+                const other = new Set(list);
+                result = new Set([...result].filter(id => other.has(id)));
+            }});
+            return result;
+        }}
+        
+        function matchingIds(index, except) {{
+            // ids matching the search and every active filter except one dimension
+            const lists = [];
+            const tokens = tokenize(searchInput.value, index);
+            const typing = !/\\s$/.test(searchInput.value);
+            tokens.forEach((token, i) => lists.push(postings(index, token, typing && i === tokens.length - 1)));
+            activeFacets().forEach(([dim, value]) => {{
+                if (dim !== except) lists.push(index.facets.ids[dim][value] || []);
+            }});
+            return intersect(lists);
+        }}
+        
+        function facetCounter(index, dim) {{
+            // count(value) for the options of one dimension, given everything else selected
+            const facets = index.facets;
+            const others = activeFacets().filter(([other]) => other !== dim);
+            if (!tokenize(searchInput.value, index).length && others.length <= 1) {{
+                if (!others.length) return value => facets.counts[dim][value] || 0;
+                const [other, otherValue] = others[0];
+                const first = facets.dimensions.indexOf(dim) < facets.dimensions.indexOf(other);
+                const pairs = facets.pairs[first ? `${{dim}}|${{other}}` : `${{other}}|${{dim}}`];
+                return value => pairs[first ? `${{value}}|${{otherValue}}` : `${{otherValue}}|${{value}}`] || 0;
+            }}
+            const rest = matchingIds(index, dim);
+            return value => (facets.ids[dim][value] || []).filter(id => rest.has(id)).length;
+        }}
+        
+        function updateCounts(index) {{
+            facetSelects.forEach(select => {{
+                const count = facetCounter(index, select.dataset.facet);
+                [...select.options].forEach(option => {{
+                    if (!option.value) return;
+                    const n = count(option.value);
+                    option.textContent = `${{option.dataset.label}} (${{n}})`;
+                    option.disabled = n === 0 && option.value !== select.value;
+                }});
+            }});
+            const n = facetCounter(index, 'budget')(budgetFilter.value);
+            budgetCount.textContent = n;
+            budgetFilter.disabled = n === 0 && !budgetFilter.checked;
+        }}
+        
+        async function filterGuides() {{
+            const run = ++filterRun;
+            const index = await loadIndex();
+            const ids = matchingIds(index);
+            if (ids) {{
+                const needed = new Set([...ids].map(id => index.docs[id][1]).filter(page => page));
+                await Promise.all([...needed].map(async page => {{
+                    const url = new URL(index.pages[page], location.href).href;
+                    try {{
+                        appendCards(await fetchPage(url), url);
+                    }} catch (error) {{}}
+                }}));
+            }}
+            if (run !== filterRun) return;
             
-            allCards.forEach(card => {{
-                const name = card.dataset.name.toLowerCase();
-                const cardContinent = card.dataset.continent.toLowerCase();
-                const cardStyle = card.dataset.style.toLowerCase();
-                const country = card.dataset.country.toLowerCase();
-                
-                const matchesSearch = !searchTerm || name.includes(searchTerm) || country.includes(searchTerm) || cardStyle.includes(searchTerm);
-                const matchesContinent = !continent || cardContinent === continent;
-                const matchesStyle = !style || cardStyle.includes(style);
-                
-                if (matchesSearch && matchesContinent && matchesStyle) {{
-                    card.style.display = 'flex';
-                }} else {{
-                    card.style.display = 'none';
-                }}
+            updateCounts(index);
+            suggestions.innerHTML = '';
+            if (ids && searchInput.value) {{
+                [...ids].slice(0, 8).forEach(id => suggestions.appendChild(new Option(index.docs[id][0])));
+            }}
+            container.querySelectorAll('.guide-card').forEach(card => {{
+                card.style.display = !ids || ids.has(Number(card.dataset.id)) ? 'flex' : 'none';
             }});
             
             // Hide empty sections
-            allSections.forEach(section => {{
+            container.querySelectorAll('.continent-section').forEach(section => {{
                 const visibleCards = section.querySelectorAll('.guide-card[style*="display: flex"]').length;
                 section.style.display = visibleCards > 0 ? 'block' : 'none';
             }});
+            container.querySelectorAll('.load-more').forEach(link => {{ link.hidden = Boolean(ids); }});
         }}
         
+        container.addEventListener('click', event => {{
+            const link = event.target.closest('.load-more');
+            if (!link) return;
+            event.preventDefault();
+            loadMore(link).then(ok => {{
+                if (!ok) location.href = link.href;
+            }});
+        }});
+        searchInput.addEventListener('focus', loadIndex, {{ once: true }});
         searchInput.addEventListener('input', filterGuides);
-        continentFilter.addEventListener('change', filterGuides);
-        styleFilter.addEventListener('change', filterGuides);
+        facetSelects.forEach(select => select.addEventListener('change', filterGuides));
+        budgetFilter.addEventListener('change', filterGuides);
     </script>
 </body>
 </html>"""
         return html
     
+    @staticmethod
+    def _ordered(by_continent: Dict):
+        """(continent, guides, id of its first guide) in page order; guide ids
+        number the guides across the whole page for the search index"""
+        first_id = 0
+        for continent in sorted(by_continent.keys()):
+            yield continent, by_continent[continent], first_id
+            first_id += len(by_continent[continent])
+    
     def _create_continent_section(self, continent: str, guides: List[Dict]) -> str:
-        """Create HTML for a continent section"""
-        cards_html = '\n'.join([self._create_guide_card(g) for g in guides])
+        """Create HTML for a continent section (its first page of guides)"""
+        cards_html = '\n'.join([self._create_guide_card(g) for g in guides[:FIRST_PAGE_SIZE]])
+        
+        more_html = ''
+        if len(guides) > FIRST_PAGE_SIZE:
+            more_html = (f'<a class="load-more" href="{SHARD_DIR}/{self._continent_slug(continent)}-2.html">'
+                         f'Show all {len(guides)} {continent} guides</a>')
         
         return f"""
-        <section class="continent-section" data-continent="{continent.lower()}">
+        <section class="continent-section" id="{self._continent_slug(continent)}" data-continent="{continent.lower()}">
             <h2 class="continent-header">🌍 {continent}</h2>
             <div class="guides-grid">
                 {cards_html}
             </div>
+            {more_html}
         </section>
         """
     
-    def _create_guide_card(self, guide: Dict) -> str:
-        """Create HTML for a single guide card"""
+    @staticmethod
+    def _continent_slug(continent: str) -> str:
+        return continent_slug(continent)
+    
+    def _write_shards(self, by_continent: Dict, shard_dir: Path) -> int:
+        """Write the guides past each continent's first page into continent pages of
+        SHARD_SIZE guides, removing pages left over from a larger catalog"""
+        shard_dir.mkdir(exist_ok=True)
+        written = set()
+        for continent, guides in by_continent.items():
+            rest = guides[FIRST_PAGE_SIZE:]
+            chunks = [rest[i:i + SHARD_SIZE] for i in range(0, len(rest), SHARD_SIZE)]
+            for number, chunk in enumerate(chunks, start=2):
+                path = shard_dir / self._shard_name(continent, number)
+                html = self._create_shard_page(continent, chunk, number, len(chunks) + 1)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                written.add(path.name)
+        for stale in shard_dir.glob('*.html'):
+            if stale.name not in written:
+                stale.unlink()
+        return len(written)
+    
+    def _shard_name(self, continent: str, number: int) -> str:
+        return f"{self._continent_slug(continent)}-{number}.html"
+    
+    def _create_shard_page(self, continent: str, guides: List[Dict], number: int, total: int) -> str:
+        """Create a standalone continent page; the resources page script fetches these too"""
+        slug = self._continent_slug(continent)
+        cards_html = '\n'.join([self._create_guide_card(g, base='../') for g in guides])
+        prev_href = f'../resources.html#{slug}' if number == 2 else f'{slug}-{number - 1}.html'
+        next_html = f'<a href="{slug}-{number + 1}.html" rel="next">Next page →</a>' if number < total else ''
+        
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="description" content="{continent} travel guides curated by SEAL Enterprises, page {number} of {total}">
+    <title>{continent} Travel Guides (page {number} of {total}) - SEAL Enterprises</title>
+    <link rel="stylesheet" href="../css/styles.css">
+    <link rel="stylesheet" href="../css/resources.css">
+</head>
+<body>
+    <main class="container" style="max-width: 1200px; margin: 0 auto; padding: 2rem 1rem;">
+        <p><a href="../resources.html">← All travel resources</a></p>
+        <section class="continent-section" data-continent="{continent.lower()}">
+            <h1 class="continent-header">🌍 {continent} travel guides</h1>
+            <div class="guides-grid">
+                {cards_html}
+            </div>
+        </section>
+        <nav class="shard-nav" aria-label="More {continent} guides">
+            <a href="{prev_href}" rel="prev">← Previous page</a>
+            {next_html}
+        </nav>
+    </main>
+</body>
+</html>"""
+    
+    def _create_guide_card(self, guide: Dict, base: str = '') -> str:
+        """Create HTML for a single guide card (base prefixes site-relative links)"""
         location = ', '.join(filter(None, [guide['region'], guide['country']]))
         
         tags = []
@@ -477,6 +585,7 @@ class ResourcesPageGenerator:
         
         return f"""
         <div class="guide-card" 
+             data-id="{guide['id']}"
              data-name="{guide['name']}" 
              data-continent="{guide['continent'].lower()}" 
              data-country="{guide['country'].lower()}"
@@ -489,48 +598,119 @@ class ResourcesPageGenerator:
             </div>
             {f'<p class="guide-description">{guide["description"]}</p>' if guide['description'] else ''}
             {f'<a href="{guide["magic_url"]}" target="_blank" rel="noopener noreferrer" class="guide-link">View Travel Guide →</a>' if guide['magic_url'] and guide['magic_url'].startswith('http') else '<p style="color: #999; font-size: 0.9rem; font-style: italic;">Contact me for detailed information about this destination</p>'}
-            <a href="contact.html" class="guide-link" style="background: #28a745; margin-top: 0.5rem;">
+            <a href="{base}contact.html" class="guide-link" style="background: #28a745; margin-top: 0.5rem;">
                 Request Information
             </a>
         </div>
         """
     
-    def _create_continent_options(self, by_continent: Dict) -> str:
-        """Create continent filter options"""
-        options = []
-        for continent in sorted(by_continent.keys()):
-            count = len(by_continent[continent])
-            options.append(f'<option value="{continent.lower()}">{continent} ({count})</option>')
-        return '\n'.join(options)
+    def _create_search_index(self, by_continent: Dict) -> Dict:
+        """Inverted index over the guides: word -> guide ids, the facet table, and for
+        each guide its name and the page its card is on (0 = resources.html)"""
+        pages = ['']
+        docs = []
+        terms = {}
+        for continent, guides, _ in self._ordered(by_continent):
+            for i, guide in enumerate(guides):
+                page = 0
+                if i >= FIRST_PAGE_SIZE:
+                    url = f"{SHARD_DIR}/{self._shard_name(continent, 2 + (i - FIRST_PAGE_SIZE) // SHARD_SIZE)}"
+                    if pages[-1] != url:
+                        pages.append(url)
+                    page = len(pages) - 1
+                docs.append([guide['name'], page])
+                words = set(tokenize(' '.join(guide[field] for field in SEARCH_FIELDS)))
+                for word in sorted(words):
+                    terms.setdefault(word, []).append(guide['id'])
+        return {
+            'version': 2,
+            'pages': pages,
+            'docs': docs,
+            'terms': dict(sorted(terms.items())),
+            'facets': self.facets,
+            'stopwords': sorted(STOPWORDS),
+        }
     
-    def _create_style_options(self) -> str:
-        """Create style filter options"""
-        styles = set()
+    @staticmethod
+    def _facet_values(guide: Dict) -> Dict[str, Dict[str, str]]:
+        """{dimension: {value key: label}} for one guide"""
+        continent = guide['continent'] or 'Other'
+        values = {'continent': {continent.lower(): continent},
+                  'budget': {'yes': 'Budget-friendly'} if guide['budget_friendly'] else {}}
+        for field in ('style', 'season'):
+            # Split multiple values if comma-separated
+            values[field] = {v.strip().lower(): v.strip() for v in guide[field].split(',') if v.strip()}
+        return values
+    
+    def _create_facets(self) -> Dict:
+        """Facet table over the numbered guides: for each dimension the sorted ids,
+        label and count of every value, and the counts of every non-empty pair of
+        values from two dimensions ('continent|style' -> 'europe|cruise' -> n)"""
+        ids = {dim: {} for dim in FACET_DIMENSIONS}
+        labels = {dim: {} for dim in FACET_DIMENSIONS}
         for guide in self.guides:
-            if guide['style']:
-                # Split multiple styles if comma-separated
-                for style in guide['style'].split(','):
-                    styles.add(style.strip())
+            for dim, values in self._facet_values(guide).items():
+                for key, label in values.items():
+                    ids[dim].setdefault(key, []).append(guide['id'])
+                    labels[dim].setdefault(key, label)
+        ids = {dim: {key: sorted(ids[dim][key]) for key in sorted(ids[dim])} for dim in FACET_DIMENSIONS}
+        
+        pairs = {}
+        for i, a in enumerate(FACET_DIMENSIONS):
+            for b in FACET_DIMENSIONS[i + 1:]:
+                table = {}
+                for va, ids_a in ids[a].items():
+                    ids_a = set(ids_a)
+                    for vb, ids_b in ids[b].items():
+                        count = len(ids_a.intersection(ids_b))
+                        if count:
+                            table[f"{va}|{vb}"] = count
+                pairs[f"{a}|{b}"] = table
         
+        return {
+            'dimensions': list(FACET_DIMENSIONS),
+            'counts': {dim: {key: len(v) for key, v in ids[dim].items()} for dim in FACET_DIMENSIONS},
+            'labels': {dim: {key: labels[dim][key] for key in ids[dim]} for dim in FACET_DIMENSIONS},
+            'ids': ids,
+            'pairs': pairs,
+        }
+    
+    def _create_facet_options(self, dim: str) -> str:
+        """Create filter options for one facet dimension, with guide counts"""
         options = []
-        for style in sorted(styles):
-            options.append(f'<option value="{style.lower()}">{style}</option>')
+        for key, count in self.facets['counts'][dim].items():
+            label = self.facets['labels'][dim][key]
+            options.append(f'<option value="{key}" data-label="{label}">{label} ({count})</option>')
         return '\n'.join(options)
     
+    def _create_continent_options(self) -> str:
+        """Create continent filter options"""
+        return self._create_facet_options('continent')
+    
+    def _create_style_options(self) -> str:
+        """Create style filter options"""
+        return self._create_facet_options('style')
+    
     def _create_json_catalog(self):
-        """Create JSON catalog for programmatic access"""
+        """Store the guides in the catalog database and export the JSON catalog
+        for programmatic access"""
+        with CatalogDB() as db:
+            db.replace_guides(self.guides)
+            guides = db.guides()
+        
         catalog = {
             'total_guides': len(self.guides),
             'last_updated': datetime.now().isoformat(),
             'advisor': 'Gregory Rhoney',
             'advisor_id': self.advisor_id,
-            'guides': self.guides
+            'facets': self.facets,
+            'guides': guides
         }
         
-        with open('fora_guides_catalog.json', 'w', encoding='utf-8') as f:
-            json.dump(catalog, f, indent=2)
+        sizes = write_catalog('fora_guides_catalog.json', catalog, CATALOG_SLIM_FIELDS)
         
-        logger.info("✓ JSON catalog created: fora_guides_catalog.json")
+        logger.info(f"✓ JSON catalog created: fora_guides_catalog.json ({sizes['fora_guides_catalog.json']:,} bytes, "
+                    f"slim {sizes['fora_guides_catalog.slim.json']:,} bytes, {len(sizes) - 2} continent files)")
 
 
 def main():
@@ -556,6 +736,8 @@ def main():
         logger.info("\n" + "=" * 70)
         logger.info("✅ Resources page generated successfully!")
         logger.info("   File: resources.html")
+        logger.info(f"   Continent pages: {SHARD_DIR}/")
+        logger.info(f"   Search index: {SEARCH_INDEX_FILE}")
         logger.info("   Catalog: fora_guides_catalog.json")
         logger.info("=" * 70)
         logger.info("\n📄 Open resources.html in your browser to preview!")
@@ -0,0 +1,104 @@
+"""
+Guides Index Store
+Batched updates of travel-guides/index.json shared by the guide publishers
+(fora_automation.py, fora_google_sheets_automation.py, fora_pdf_to_web.py).
+
+Publishers upsert one entry per published page (keyed by its filename) while
+they run and commit once at the end: the entries are stored in the catalog
+database (catalog_db.py) and index.json is exported from it through
+write_catalog(), under an exclusive lock on .index.json.lock, so a batch of
+guides costs one write, and two runs at the same time wait for each other
+instead of overwriting each other's entries.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import logging
+import time
+
+from catalog_db import CatalogDB
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+# how long to wait for another run's lock on Windows before giving up
+LOCK_TIMEOUT = 60
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = LOCK_TIMEOUT):
+    """Hold an exclusive lock on path (created if missing) for the with block.
+    On Windows, TimeoutError if the lock is still held after timeout seconds."""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            deadline = time.monotonic() + timeout
+            attempts = 0
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # retries for about 10 s
+                    break
+                except OSError:
+                    attempts += 1
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"{path} is still locked after {timeout:.0f} s; if no other "
+                                           f"publisher is running, delete the stale lock file") from None
+                    if attempts == 1:
+                        logger.warning(f"Waiting for the lock on {path} (held by another run)")
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class IndexStore:
+    """Pending upserts for a guides index, applied in one locked write"""
+
+    def __init__(self, index_file, sort_key: Optional[Callable[[Dict], object]] = None,
+                 reverse: bool = False, db: Optional[CatalogDB] = None):
+        self.index_file = Path(index_file)
+        self.db = db
+        self.lock_file = self.index_file.with_name(f".{self.index_file.name}.lock")
+        self.sort_key = sort_key
+        self.reverse = reverse
+        self.pending = {}  # filename -> entry
+
+    def upsert(self, entry: Dict):
+        """Add or replace the entry for entry['filename'] (applied on commit)"""
+        self.pending[entry['filename']] = entry
+
+    def __len__(self):
+        return len(self.pending)
+
+    def commit(self) -> int:
+        """Merge the pending entries into the index file; returns how many were written"""
+        if not self.pending:
+            return 0
+        db = self.db or CatalogDB()
+        try:
+            with file_lock(self.lock_file):
+                db.import_index(self.index_file)  # entries published before the database existed
+                db.upsert_publications(self.index_file, self.pending.values())
+                db.export_index(self.index_file, self.sort_key, self.reverse)
+        finally:
+            if self.db is None:
+                db.close()
+        count = len(self.pending)
+        self.pending = {}
+        return count
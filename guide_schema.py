@@ -0,0 +1,58 @@
+"""
+Guide Structured Data
+Builds the JSON-LD <script> block the guide generators put in each page's <head>
+(checked by tools/check_structured_data.py).
+"""
+
+from datetime import date
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+import json
+
+SITE_URL = 'https://www.sealenterprises.net'
+ORGANIZATION_ID = f'{SITE_URL}/#organization'
+ORGANIZATION_NAME = 'Sea, Air, Land Enterprises, LLC'
+GUIDES_PATH = 'travel-guides'
+
+
+def guide_url(filename: str) -> str:
+    """Production URL of a generated guide page"""
+    return f'{SITE_URL}/{GUIDES_PATH}/{filename}'
+
+
+def article_jsonld(title: str, filename: str, description: str = '', location: str = '',
+                   published: Optional[str] = None, image: Optional[str] = None,
+                   image_base: Optional[str] = None) -> str:
+    """<script type="application/ld+json"> block describing one guide page as an Article.
+    A relative image src is resolved against image_base (the page it was taken
+    from); an image that is not an absolute http(s) URL after that is left out."""
+    url = guide_url(filename)
+    article = {
+        '@type': 'Article',
+        '@id': f'{url}#article',
+        'headline': title[:110],
+        'url': url,
+        'mainEntityOfPage': url,
+        'datePublished': published or date.today().isoformat(),
+        'inLanguage': 'en',
+        'author': {'@id': ORGANIZATION_ID},
+        'publisher': {'@id': ORGANIZATION_ID},
+    }
+    if description:
+        article['description'] = description
+    if location:
+        article['about'] = {'@type': 'Place', 'name': location}
+    if image:
+        image = urljoin(image_base or '', image)
+        if urlparse(image).scheme in ('http', 'https'):
+            article['image'] = image
+    data = {
+        '@context': 'https://schema.org',
+        '@graph': [
+            {'@type': 'TravelAgency', '@id': ORGANIZATION_ID, 'name': ORGANIZATION_NAME, 'url': f'{SITE_URL}/'},
+            article,
+        ],
+    }
+    # keep "</script>" inside strings from closing the block early
+    payload = json.dumps(data, indent=2, ensure_ascii=False).replace('</', '<\\/')
+    return f'<script type="application/ld+json">\n{payload}\n</script>'
@@ -0,0 +1,193 @@
+"""
+FORA Guide Sheet Ingestion
+Reads the FORA guide sheet export (fora_guides.csv) into typed rows for the
+generators and publishers.
+
+- The header row is located by matching cells against SCHEMA, so the row of
+  commas the export starts with (or any other preamble) is skipped.
+- Header cells are mapped to fields through SCHEMA: names are compared trimmed
+  and case-insensitively and columns can have aliases, so 'Country ' and
+  'Short Description' both land where they should.
+- Values are converted per column type in a single streaming pass over the
+  file; bad values are reported per row (SheetReader.errors) instead of
+  failing the whole file.
+
+Usage:
+    reader = SheetReader('fora_guides.csv')
+    for row in reader:          # dicts keyed by field name
+        ...
+    reader.errors               # [(line number, field, message)]
+"""
+
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import csv
+import re
+
+TRUE_VALUES = {'yes', 'y', 'true', 'x', '1'}
+FALSE_VALUES = {'no', 'n', 'false', '0', '', 'n/a', 'na', '-'}
+DATE_FORMATS = ('%d-%B-%Y', '%d-%b-%Y', '%Y-%m-%d', '%m/%d/%Y', '%B %d, %Y')
+UNDATED = {'evergreen'}
+HEADER_SCAN_ROWS = 20
+
+
+class Column:
+    """A sheet column: the field it fills, its header (plus aliases) and type
+    ('text', 'bool' or 'date'; dates stay text once validated)"""
+
+    def __init__(self, field: str, header: str, kind: str = 'text', aliases: Tuple[str, ...] = (),
+                 required: bool = False):
+        self.field = field
+        self.header = header
+        self.kind = kind
+        self.aliases = aliases
+        self.required = required
+
+    def names(self) -> List[str]:
+        return [normalize_header(n) for n in (self.header,) + self.aliases]
+
+
+SCHEMA = (
+    Column('date', 'Date', kind='date'),
+    Column('name', 'Name', required=True),
+    Column('description', 'Description', aliases=('Short Description',)),
+    Column('new_to_fora', 'New to Fora', kind='bool'),
+    Column('continent', 'Continent'),
+    Column('country', 'Country'),
+    Column('region', 'Region'),
+    Column('partner', 'Partner'),
+    Column('style', 'Style'),
+    Column('season', 'Season'),
+    Column('budget_friendly', '< $500 option(s)', kind='bool', aliases=('Under $500', 'Budget Friendly')),
+    Column('magic_content', 'Magic Content'),
+    Column('instagram_feed', 'Instagram In-Feed'),
+    Column('instagram_story', 'Instagram Story'),
+    Column('non_editable_assets', 'Non-Editable Assets'),
+    Column('video_template', 'Video Template'),
+    Column('pdf_template', 'PDF Template'),
+    Column('mailchimp', 'Mailchimp'),
+    Column('notes', 'Notes'),
+    Column('article_title', 'Article Title (Fora HQ reference)', aliases=('Article Title',)),
+)
+
+
+def normalize_header(name: str) -> str:
+    return re.sub(r'\s+', ' ', name).strip().casefold()
+
+
+def to_bool(value: str) -> bool:
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"expected yes/no, got {value!r}")
+
+
+def check_date(value: str) -> str:
+    if value and value.lower() not in UNDATED:
+        for fmt in DATE_FORMATS:
+            try:
+                datetime.strptime(value, fmt)
+                return value
+            except ValueError:
+                continue
+        raise ValueError(f"unrecognised date {value!r}")
+    return value
+
+
+CONVERTERS = {'text': None, 'bool': to_bool, 'date': check_date}
+EMPTY = {'text': '', 'bool': False, 'date': ''}
+
+
+class SheetReader:
+    """Typed rows of a guide sheet export, read in one pass"""
+
+    def __init__(self, csv_file='fora_guides.csv', schema=SCHEMA, encoding='utf-8-sig'):
+        self.csv_file = csv_file
+        self.schema = schema
+        self.encoding = encoding
+        self.header_line = None  # 1-based line of the header row
+        self.missing = []        # schema fields with no column in the sheet
+        self.unmapped = []       # sheet columns no schema field uses
+        self.errors = []         # (line, field, message)
+        self.rows_read = 0
+        self.rows_skipped = 0
+
+    def _map_header(self, cells: List[str]) -> Optional[Dict[str, int]]:
+        """{field: column index} if cells look like the header row"""
+        by_name = {}
+        for i, cell in enumerate(cells):
+            by_name.setdefault(normalize_header(cell), i)
+        mapping = {}
+        for column in self.schema:
+            for name in column.names():
+                if name in by_name:
+                    mapping[column.field] = by_name[name]
+                    break
+        required = [c.field for c in self.schema if c.required]
+        if not all(f in mapping for f in required) or len(mapping) < max(2, len(self.schema) // 3):
+            return None
+        return mapping
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.csv_file, 'r', encoding=self.encoding, newline='') as f:
+            reader = csv.reader(f)
+            mapping = None
+            for cells in reader:
+                if reader.line_num > HEADER_SCAN_ROWS:
+                    break
+                mapping = self._map_header(cells)
+                if mapping:
+                    self.header_line = reader.line_num
+                    used = set(mapping.values())
+                    self.unmapped = [c for i, c in enumerate(cells) if i not in used and c.strip()]
+                    break
+            if mapping is None:
+                raise ValueError(f"{self.csv_file}: no header row with the expected columns "
+                                 f"in the first {HEADER_SCAN_ROWS} lines")
+            self.missing = [c.field for c in self.schema if c.field not in mapping]
+
+            columns = [(c.field, mapping[c.field], CONVERTERS[c.kind], c.required, {})
+                       for c in self.schema if c.field in mapping]
+            defaults = {c.field: EMPTY[c.kind] for c in self.schema if c.field not in mapping}
+            for cells in reader:
+                if not any(cells):
+                    continue
+                self.rows_read += 1
+                row = dict(defaults)
+                ok = True
+                for field, index, convert, required, seen in columns:
+                    value = cells[index].strip() if index < len(cells) else ''
+                    if required and not value:
+                        self.errors.append((reader.line_num, field, 'required value missing'))
+                        ok = False
+                        break
+                    if convert is not None:
+                        # Sheet values repeat a lot (Yes/No, dates), so conversions are memoized
+                        if value not in seen:
+                            try:
+                                seen[value] = (convert(value), None)
+                            except ValueError as e:
+                                seen[value] = (EMPTY['bool'] if convert is to_bool else value, str(e))
+                        value, error = seen[value]
+                        if error:
+                            self.errors.append((reader.line_num, field, error))
+                    row[field] = value
+                if ok:
+                    yield row
+                else:
+                    self.rows_skipped += 1
+
+    def read(self) -> List[Dict]:
+        return list(self)
+
+    def report(self, logger, limit: int = 5):
+        """Log the sheet's problems (first few errors and a count)"""
+        if self.missing:
+            logger.warning(f"{self.csv_file}: no column for {', '.join(self.missing)}")
+        if self.errors:
+            logger.warning(f"{self.csv_file}: {len(self.errors)} value(s) failed validation, "
+                           f"{self.rows_skipped} row(s) skipped")
+            for line, field, message in self.errors[:limit]:
+                logger.warning(f"   line {line}, {field}: {message}")
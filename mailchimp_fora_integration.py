@@ -8,6 +8,8 @@ import json
 import requests
 from datetime import datetime
 
+from catalog_db import CatalogDB, catalog_guides
+
 
 class MailchimpFORAIntegration:
     """Integrate Mailchimp campaigns with FORA guides"""
@@ -82,10 +84,7 @@ class MailchimpFORAIntegration:
         
         # Load FORA guides if not provided
         if guide_list is None:
-            if os.path.exists('fora_guides_catalog.json'):
-                with open('fora_guides_catalog.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    guide_list = data.get('guides', [])[:10]  # Top 10 guides
+            guide_list = catalog_guides(limit=10)  # Top 10 guides
         
         # Build email HTML
         email_html = self._build_email_html(guide_list)
@@ -116,6 +115,8 @@ class MailchimpFORAIntegration:
                 campaign = response.json()
                 campaign_id = campaign['id']
                 print(f"✓ Campaign created: {campaign_id}")
+                with CatalogDB() as db:
+                    db.record_campaign(campaign_id, title=subject)
                 
                 # Set content
                 content_response = requests.put(
@@ -178,6 +179,8 @@ class MailchimpFORAIntegration:
             safe_name = guide_name.lower().replace(' ', '-').replace(':', '').replace(',', '')
             email_subject = f"Request: {guide_name} Travel Guide"
             email_body = f"Hi Gregory,\n\nI'd love to receive the '{guide_name}' travel guide.\n\nThanks!"
+            mailto = (f"mailto:gregory.rhoney@fora.travel?subject={email_subject.replace(' ', '%20')}"
+                      f"&body={email_body.replace(' ', '%20').replace(chr(10), '%0D%0A')}")
             
             html += f"""
                     <div class="guide-card">
@@ -185,7 +188,7 @@ class MailchimpFORAIntegration:
                         <p><strong>📍 Location:</strong> {guide.get('continent', 'Various')}</p>
                         <p>{guide.get('description', 'Explore this amazing destination')}</p>
                         <div style="margin-top: 15px;">
-                            <a href="mailto:gregory.rhoney@fora.travel?subject={email_subject.replace(' ', '%20')}&body={email_body.replace(' ', '%20').replace('\n', '%0D%0A')}" class="email-button">📧 Email Me for This Guide</a>
+                            <a href="{mailto}" class="email-button">📧 Email Me for This Guide</a>
                         </div>
                     </div>
             """
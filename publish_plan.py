@@ -0,0 +1,166 @@
+"""
+Publish Plans
+What a run of one of the guide publishers (fora_automation.py,
+fora_google_sheets_automation.py, fora_pdf_to_web.py) would change, computed
+before anything is written:
+
+  pages      guide pages to create or update (unchanged ones are listed too)
+  files      other files to copy (the PDFs next to their pages)
+  index      travel-guides/index.json entries to add or update
+  campaigns  Mailchimp campaign drafts to create
+  state      guides recorded as published
+
+Pages are rendered once while planning and compared by sha256 with the hashes
+in the catalog database (a page with no stored hash is read once instead);
+apply() writes the bytes it already holds rather than rendering again. With
+--dry-run the publishers print the plan (or save it with --plan-json) and stop
+there.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import shutil
+
+from catalog_db import CatalogDB
+from guide_index import IndexStore
+
+
+class PublishPlan:
+    """Changes planned for one publisher run; apply() carries them out"""
+
+    def __init__(self, pipeline: str, db: CatalogDB):
+        self.pipeline = pipeline
+        self.db = db
+        self.hashes = db.content_hashes()
+        self.pages = []      # {'path', 'action', 'bytes', 'sha256'}
+        self.files = []      # {'source', 'path'}
+        self.index = []      # {'filename', 'action'}
+        self.campaigns = []  # {'guide', 'title'}
+        self.state = []      # guide keys
+        self.failed = []     # {'guide', 'error'}
+        self._data = {}      # page path -> rendered bytes
+        self._known = []     # (path, sha256) of unchanged pages that had no stored hash
+        self._entries = []   # index entries to upsert
+        self._campaigns = []  # arguments for the campaign callback
+
+    def page(self, path: Path, data: bytes, digest: Optional[str] = None) -> str:
+        """Plan writing a rendered page; returns 'create', 'update' or 'unchanged'"""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        known = self.hashes.get(path.as_posix())
+        if not path.exists():
+            action = 'create'
+        elif known == digest:
+            action = 'unchanged'
+        elif known is None and path.read_bytes() == data:
+            action = 'unchanged'
+            self._known.append((path, digest))
+        else:
+            action = 'update'
+        self.pages.append({'path': path.as_posix(), 'action': action, 'bytes': len(data), 'sha256': digest})
+        if action != 'unchanged':
+            self._data[path] = data
+        return action
+
+    def copy(self, source, path: Path):
+        """Plan copying a file that does not exist yet"""
+        if not path.exists():
+            self.files.append({'source': str(source), 'path': path.as_posix()})
+
+    def index_entry(self, entry: Dict, existing: Optional[Dict] = None):
+        """Plan an index upsert (skipped when the entry is unchanged)"""
+        if entry == existing:
+            return
+        self.index.append({'filename': entry['filename'], 'action': 'update' if existing else 'add'})
+        self._entries.append(entry)
+
+    def campaign(self, guide_key: str, title: str, *args):
+        """Plan a Mailchimp campaign draft; args are passed to apply()'s callback"""
+        self.campaigns.append({'guide': guide_key, 'title': title})
+        self._campaigns.append((guide_key, title, args))
+
+    def published(self, guide_keys: Iterable[str]):
+        self.state.extend(guide_keys)
+
+    def fail(self, guide_key: str, error: Exception):
+        self.failed.append({'guide': guide_key, 'error': str(error)})
+
+    def counts(self) -> Dict[str, int]:
+        actions = [p['action'] for p in self.pages]
+        return {
+            'pages_created': actions.count('create'),
+            'pages_updated': actions.count('update'),
+            'pages_unchanged': actions.count('unchanged'),
+            'files_copied': len(self.files),
+            'index_changes': len(self.index),
+            'campaigns': len(self.campaigns),
+            'guides_recorded': len(self.state),
+            'failed': len(self.failed),
+        }
+
+    def as_dict(self) -> Dict:
+        return {
+            'pipeline': self.pipeline,
+            'counts': self.counts(),
+            'pages': self.pages,
+            'files': self.files,
+            'index': self.index,
+            'campaigns': self.campaigns,
+            'state': self.state,
+            'failed': self.failed,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2, ensure_ascii=False)
+
+    def summary(self) -> List[str]:
+        """Human-readable lines describing the plan"""
+        c = self.counts()
+        lines = [f"Plan for {self.pipeline}:",
+                 f"  pages: {c['pages_created']} new, {c['pages_updated']} changed, "
+                 f"{c['pages_unchanged']} unchanged",
+                 f"  index.json: {c['index_changes']} entr{'y' if c['index_changes'] == 1 else 'ies'} "
+                 f"to add or update"]
+        if self.files:
+            lines.append(f"  files to copy: {c['files_copied']}")
+        if self.campaigns:
+            lines.append(f"  Mailchimp drafts to create: {c['campaigns']}")
+        lines.append(f"  guides to record as published: {c['guides_recorded']}")
+        if self.failed:
+            lines.append(f"  failed to render: {c['failed']}")
+        for page in self.pages:
+            if page['action'] != 'unchanged':
+                lines.append(f"    {page['action']:7} {page['path']}")
+        for campaign in self.campaigns:
+            lines.append(f"    draft   {campaign['title']}")
+        for failure in self.failed:
+            lines.append(f"    failed  {failure['guide']}: {failure['error']}")
+        return lines
+
+    def apply(self, index: IndexStore,
+              create_campaign: Optional[Callable[..., Optional[str]]] = None) -> Dict[str, int]:
+        """Write the planned pages and files, commit the index once and create the
+        campaigns (create_campaign(*args) returns the campaign id or None)"""
+        written = []
+        for path, data in self._data.items():
+            with open(path, 'wb') as f:
+                f.write(data)
+            written.append((path, hashlib.sha256(data).hexdigest()))
+        self.db.set_content_hashes(written + self._known)
+        for item in self.files:
+            shutil.copy2(item['source'], item['path'])
+        for entry in self._entries:
+            index.upsert(entry)
+        index.commit()
+
+        campaigns = 0
+        if create_campaign is not None:
+            for guide_key, title, args in self._campaigns:
+                campaign_id = create_campaign(*args)
+                if campaign_id:
+                    self.db.record_campaign(campaign_id, guide_key, title)
+                    campaigns += 1
+        return {'pages_written': len(written), 'files_copied': len(self.files),
+                'index_changes': len(self._entries), 'campaigns': campaigns}
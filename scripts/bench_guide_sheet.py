@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark guide sheet ingestion (guide_sheet.SheetReader) on a synthetic sheet.
+Writes a CSV shaped like the fora_guides.csv export (leading row of commas,
+'Country ' header, Yes/No/N/A budget column) with --rows rows to a temp dir and
+times SheetReader against the plain csv.DictReader loop the generators used.
+Usage: python bench_guide_sheet.py [--rows 100000] [--repeat 3]
+"""
+from pathlib import Path
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+from guide_sheet import SheetReader  # noqa: E402
+
+HEADER = ['Date', 'Name', 'Description', 'New to Fora', 'Continent', 'Country ', 'Region', 'Partner',
+          'Style', 'Season', '< $500 option(s)', 'Magic Content', 'Instagram In-Feed', 'Instagram Story',
+          'Non-Editable Assets', 'Video Template', 'PDF Template', 'Mailchimp', 'Notes',
+          'Article Title (Fora HQ reference)']
+CONTINENTS = ['Europe', 'Asia', 'North America', 'Caribbean', 'Africa', 'South America', 'Oceania']
+STYLES = ['Adventure', 'Beach', 'City', 'Cruise', 'Family', 'General ', 'Luxury', 'Wellness']
+SEASONS = ['Spring', 'Summer', 'Fall', 'Winter', '']
+BUDGET = ['Yes', 'No', 'N/A', '', '-', 'No ']
+
+
+def write_sheet(path: Path, rows: int, seed: int = 1):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([''] * len(HEADER))
+        writer.writerow(HEADER)
+        for i in range(rows):
+            dated = rng.random() < 0.6
+            writer.writerow([
+                f"{rng.randint(1, 28)}-December-2025" if dated else 'Evergreen',
+                f"Guide {i}", f"Description of guide {i}, with a comma", rng.choice(['Yes', 'No']),
+                rng.choice(CONTINENTS), f"Country {i % 150}", f"Region {i % 40}", f"Partner {i % 25}",
+                rng.choice(STYLES), rng.choice(SEASONS), rng.choice(BUDGET),
+                f"https://www.foratravel.com/guides/guide-{i}" if rng.random() < 0.9 else '',
+                'Yes', 'Yes', '', '', '', '', '', f"Article {i}",
+            ])
+
+
+def legacy_read(path: Path) -> int:
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()
+        for row in csv.DictReader(f):
+            if not row.get('Magic Content', '').strip():
+                continue
+            {
+                'name': row.get('Name', '').strip(),
+                'continent': row.get('Continent', '').strip(),
+                'country': row.get('Country', '').strip(),
+                'budget_friendly': row.get('< $500 option(s)', '').lower() in ['yes', 'true', 'x'],
+            }
+            count += 1
+    return count
+
+
+def sheet_read(path: Path) -> int:
+    reader = SheetReader(path)
+    count = sum(1 for row in reader if row['magic_content'])
+    if reader.errors:
+        print(f"  {len(reader.errors)} validation errors")
+    return count
+
+
+def timed(fn, path: Path, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark guide sheet ingestion')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'fora_guides.csv'
+        write_sheet(path, args.rows)
+        print(f"{args.rows} rows, {path.stat().st_size / 1e6:.1f} MB (best of {args.repeat})")
+        for label, fn in (('csv.DictReader', legacy_read), ('SheetReader', sheet_read)):
+            count, best = timed(fn, path, args.repeat)
+            print(f"  {label:15} {best:6.3f} s  {args.rows / best:9.0f} rows/s  ({count} guides)")
+
+
+if __name__ == '__main__':
+    main()
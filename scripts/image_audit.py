@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Site-wide image inventory: sizes, dimensions and which pages use each image.
+Flags oversized, unreferenced and non-WebP images under images/, references to
+missing images and references whose case differs from the file (resolved
+through tools/site_index.py), and can batch recompress the flagged ones to WebP.
+Usage: python image_audit.py [--json report.json] [--recompress] [--workers N]
+"""
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except Exception:
+    PIL_AVAILABLE = False
+try:
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+except Exception:
+    pass
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import sys
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE / 'tools'))
+from site_index import CASE_MISMATCH, EXTERNAL, SiteIndex  # noqa: E402
+
+IMAGES_DIR = BASE / 'images'
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg', '.ico', '.heic', '.bmp', '.tif', '.tiff'}
+# formats that are already web-efficient (or not raster)
+MODERN_EXTS = {'.webp', '.avif', '.svg', '.ico'}
+# pages, stylesheets and scripts scanned for image references
+TEXT_EXTS = {'.html', '.htm', '.css', '.js'}
+# saved captures, backups and reports that are not part of the published site
+EXCLUDE = ['.git/*', 'node_modules/*', 'dist/*', '*.bak', '*_files/*', '*.original.html', 'inspiration_pages/*',
+           'previews/*', 'lighthouse-*', 'pa11y-*', 'localhost_*', 'live-seal-home.html']
+# source folders: never referenced by pages on purpose
+SOURCE_DIRS = ['images/canva/originals/*']
+
+MAX_BYTES = 300 * 1024
+MAX_WIDTH = 2400
+
+QUOTED_REF_RE = re.compile(r'''["'(]\s*([^"'()<>\s]+?\.(?:%s))(?:[?#][^"'()\s]*)?\s*["')]''' %
+                           '|'.join(e[1:] for e in sorted(IMAGE_EXTS)), re.I)
+SRCSET_RE = re.compile(r'''srcset\s*=\s*["']([^"']+)["']''', re.I)
+
+
+def excluded(rel, patterns=EXCLUDE):
+    return any(fnmatch(rel, pat) for pat in patterns)
+
+
+def read_header(path):
+    """Image format and (width, height) from the file header only; pixel data is never decoded"""
+    rel = path.relative_to(BASE).as_posix()
+    info = {'path': rel, 'bytes': path.stat().st_size, 'format': None, 'width': None, 'height': None}
+    if path.suffix.lower() == '.svg' or not PIL_AVAILABLE:
+        info['format'] = path.suffix.lower().lstrip('.').upper()
+        return info
+    try:
+        with Image.open(path) as im:
+            info['format'] = im.format
+            info['width'], info['height'] = im.size
+    except Exception as e:
+        info['error'] = str(e)
+    return info
+
+
+def scan_references(text_files, index):
+    """Map each referenced image path to the pages/stylesheets/scripts that reference it.
+    References are resolved through the site index; one whose case differs from the file
+    is counted against the real file and also returned in case_mismatch ({source: [(ref, file)]})."""
+    refs, case_mismatch = {}, {}
+    for f in text_files:
+        text = f.read_text(encoding='utf-8', errors='ignore')
+        found = set(m.group(1) for m in QUOTED_REF_RE.finditer(text))
+        for m in SRCSET_RE.finditer(text):
+            found.update(part.split()[0] for part in m.group(1).split(',') if part.strip())
+        page = f.relative_to(BASE).as_posix()
+        from_dir = f.parent.relative_to(BASE).as_posix()
+        for ref in found:
+            status, rel = index.resolve(ref, '' if from_dir == '.' else from_dir)
+            if status == EXTERNAL:
+                continue
+            if status == CASE_MISMATCH:
+                case_mismatch.setdefault(page, []).append((ref, rel))
+            refs.setdefault(rel, set()).add(page)
+    return refs, case_mismatch
+
+
+def site_files(exts, root=BASE):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames
+                       if not excluded((Path(dirpath) / d).relative_to(BASE).as_posix() + '/')]
+        for name in filenames:
+            p = Path(dirpath) / name
+            if p.suffix.lower() in exts and not excluded(p.relative_to(BASE).as_posix()):
+                yield p
+
+
+def flag(info, referenced_by, siblings, max_bytes=MAX_BYTES, max_width=MAX_WIDTH):
+    flags = []
+    ext = Path(info['path']).suffix.lower()
+    if info['bytes'] > max_bytes:
+        flags.append('oversized-bytes')
+    if info['width'] and info['width'] > max_width:
+        flags.append('oversized-dimensions')
+    if not referenced_by and not excluded(info['path'], SOURCE_DIRS):
+        flags.append('unreferenced')
+    stem = info['path'][:-len(ext)]
+    if ext not in MODERN_EXTS and not any(stem + e in siblings for e in ('.webp', '.avif')):
+        flags.append('not-webp')
+    return flags
+
+
+def recompress(info, max_width=MAX_WIDTH):
+    """Write a downscaled WebP for one flagged image; JPG/PNG get a .webp sibling, WebP is replaced in place"""
+    from webopt_canva import load_image, encode
+    src = BASE / info['path']
+    target = src if src.suffix.lower() == '.webp' else src.with_suffix('.webp')
+    try:
+        size = (max_width, max_width * 4)
+        data, seconds = encode(load_image(src, size), 'webp')
+    except Exception as e:
+        return {'path': info['path'], 'error': str(e)}
+    if len(data) >= info['bytes']:
+        return {'path': info['path'], 'skipped': 'WebP would not be smaller'}
+    tmp = target.with_name(target.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+    return {'path': info['path'], 'output': target.relative_to(BASE).as_posix(),
+            'before': info['bytes'], 'after': len(data), 'seconds': seconds}
+
+
+def _kb(n):
+    return f"{n / 1024:.0f} KB"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', metavar='PATH', help='also write the full inventory as JSON')
+    parser.add_argument('--max-bytes', type=int, default=MAX_BYTES, help='flag images larger than this many bytes')
+    parser.add_argument('--max-width', type=int, default=MAX_WIDTH, help='flag images wider than this')
+    parser.add_argument('--recompress', action='store_true',
+                        help='write WebP versions of referenced images flagged oversized or not-webp')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--verbose', action='store_true', help='list every image, not only flagged ones')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not IMAGES_DIR.exists():
+        print(f"Images directory not found: {IMAGES_DIR}")
+        sys.exit(2)
+
+    images = list(site_files(IMAGE_EXTS, IMAGES_DIR))
+    index = SiteIndex(BASE)
+    refs, case_mismatch = scan_references(site_files(TEXT_EXTS), index)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        inventory = list(pool.map(read_header, images, chunksize=32))
+
+    siblings = {i['path'] for i in inventory}
+    for info in inventory:
+        info['referenced_by'] = sorted(refs.get(info['path'], ()))
+        info['flags'] = flag(info, info['referenced_by'], siblings, args.max_bytes, args.max_width)
+
+    print('Site Image Audit')
+    print('Base:', BASE)
+    total = sum(i['bytes'] for i in inventory)
+    print(f"Images: {len(inventory)} ({total / 1024 / 1024:.1f} MB)")
+    for name in ('oversized-bytes', 'oversized-dimensions', 'unreferenced', 'not-webp'):
+        hits = [i for i in inventory if name in i['flags']]
+        print(f"  {name}: {len(hits)} ({sum(i['bytes'] for i in hits) / 1024 / 1024:.1f} MB)")
+    print()
+    for info in sorted(inventory, key=lambda i: -i['bytes']):
+        if info['flags'] or args.verbose:
+            dims = f"{info['width']}x{info['height']}" if info['width'] else '-'
+            print(f"- {info['path']}\t{_kb(info['bytes'])}\t{dims}\t{info['format']}\t"
+                  f"refs={len(info['referenced_by'])}\t{','.join(info['flags'])}")
+            if info.get('error'):
+                print('   ERROR:', info['error'])
+
+    missing = sorted(p for p in refs if p.startswith('images/') and not index.exists(p))
+    if missing:
+        print(f"\nReferenced but missing: {len(missing)}")
+        for p in missing:
+            print(' -', p, '<-', ', '.join(sorted(refs[p])[:3]))
+    if case_mismatch:
+        print(f"\nCase mismatches (work on Windows, 404 on Netlify): {sum(map(len, case_mismatch.values()))}")
+        for src, pairs in sorted(case_mismatch.items()):
+            for ref, actual in sorted(pairs):
+                print(f" - {src}: {ref} (file is {actual})")
+
+    report = {'base': str(BASE), 'images': inventory, 'missing': missing, 'case_mismatch': case_mismatch}
+    if args.recompress:
+        if not PIL_AVAILABLE:
+            print('\nPillow is required for --recompress (pip install pillow)')
+            sys.exit(2)
+        todo = [i for i in inventory
+                if i['referenced_by'] and Path(i['path']).suffix.lower() in {'.jpg', '.jpeg', '.png', '.webp'}
+                and ({'oversized-bytes', 'oversized-dimensions', 'not-webp'} & set(i['flags']))]
+        print(f"\nRecompressing {len(todo)} image(s)...")
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            done = list(pool.map(recompress, todo, [args.max_width] * len(todo)))
+        saved = 0
+        for r in done:
+            if 'after' in r:
+                saved += r['before'] - r['after']
+                print(f"  {r['path']} -> {r['output']}: {_kb(r['before'])} -> {_kb(r['after'])}")
+            else:
+                print(f"  {r['path']}: {r.get('error') or r.get('skipped')}")
+        print(f"Saved {saved / 1024 / 1024:.1f} MB; point pages at the .webp files (or a <picture>) to benefit")
+        report['recompressed'] = done
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print('\nWrote', args.json)
+
+if __name__ == '__main__':
+    main()
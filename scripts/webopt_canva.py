@@ -1,22 +1,40 @@
 #!/usr/bin/env python3
-"""Web-optimize Canva originals: produce JPG + WebP outputs.
-Usage: python webopt_canva.py
+"""Web-optimize Canva originals: produce JPG + WebP (and AVIF where supported) outputs.
+Each mapping is also emitted at a ladder of narrower widths for srcset, and
+images/canva/manifest.json records every variant with its dimensions and size.
+Outputs get content-hashed names (hero-home-480w.1a2b3c4d5e.webp) and a build
+cache skips anything whose source and settings are unchanged.
+Usage: python webopt_canva.py [--formats jpg,webp,avif] [--widths 480,800,1200] [--workers N] [--prune]
 """
 try:
-    from PIL import Image, ImageOps
+    from PIL import Image, ImageOps, features
     PIL_AVAILABLE = True
 except Exception:
     PIL_AVAILABLE = False
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import argparse
+import hashlib
+import html
+import io
+import json
+import os
+import re
 import sys
 import shutil
+import time
 
 BASE = Path(__file__).resolve().parents[1]
 ORIG_DIR = BASE / 'images' / 'canva' / 'originals'
 OUT_DIR = BASE / 'images' / 'canva'
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+MANIFEST_FILE = OUT_DIR / 'manifest.json'
+CACHE_FILE = OUT_DIR / '.webopt-cache.json'
+
+# bump when the processing pipeline changes in a way that alters output bytes
+PIPELINE_VERSION = 1
 
 # mapping: source filename (case-insensitive substring) -> output base name, target size (w,h)
+# an optional fourth element overrides WIDTHS for that mapping
 MAPPINGS = [
     ("Home Page cover image", "hero-home", (1600,900)),
     ("phuket beach2", "hero-pickleball", (1600,900)),
@@ -25,73 +43,460 @@ MAPPINGS = [
     ("pickleball 4", "pickleball-3", (1200,800)),
 ]
 
+# output format: extension -> (PIL format name, save options)
+FORMATS = {
+    'jpg': ('JPEG', {'quality': 75, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 75, 'method': 6}),
+    'avif': ('AVIF', {'quality': 60, 'speed': 6}),
+}
+DEFAULT_FORMATS = ['jpg', 'webp', 'avif']
+
+# responsive widths emitted below each mapping's target width (the target itself is always kept)
+WIDTHS = [480, 800, 1200]
+
+
+def available_formats(requested):
+    """Drop formats this Pillow build cannot encode (AVIF needs Pillow 11.3+ or pillow-avif-plugin)"""
+    if not PIL_AVAILABLE:
+        return [f for f in requested if f in ('jpg', 'webp')]
+    if 'avif' in requested and not features.check('avif'):
+        try:
+            import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+        except ImportError:
+            print("AVIF encoder not available; skipping avif outputs")
+            requested = [f for f in requested if f != 'avif']
+    return requested
+
+
+def index_sources(orig_dir=ORIG_DIR):
+    """List the originals directory once: [(lowercase name, path)] in name order"""
+    return sorted((p.name.lower(), p) for p in orig_dir.iterdir() if p.is_file())
+
+
 # helper to find a matching file
-def find_source(substring):
+def find_source(substring, index=None):
     s = substring.lower()
-    for p in ORIG_DIR.iterdir():
-        if p.is_file() and s in p.name.lower():
+    for name, p in (index if index is not None else index_sources()):
+        if s in name:
             return p
     return None
 
 
-def process(src_path: Path, out_base: Path, size):
-    jpg_path = out_base.with_suffix('.jpg')
-    webp_path = out_base.with_suffix('.webp')
+def load_image(src_path: Path, size):
+    """Decode a source once, upright and flattened to RGB, scaled to fit size"""
+    im = Image.open(src_path)
+    # let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding
+    im.draft('RGB', size)
+    try:
+        im = ImageOps.exif_transpose(im)
+    except Exception:
+        pass
+    if im.mode in ("RGBA", "LA"):
+        bg = Image.new("RGB", im.size, (255,255,255))
+        bg.paste(im, mask=im.split()[-1])
+        im = bg
+    else:
+        im = im.convert("RGB")
+    im.thumbnail(size, Image.LANCZOS)
+    return im
+
+
+def encode(im, fmt):
+    """Encode one output in memory; returns (encoded bytes, seconds)"""
+    pil_format, options = FORMATS[fmt]
+    start = time.perf_counter()
+    buf = io.BytesIO()
+    im.save(buf, format=pil_format, **options)
+    return buf.getvalue(), time.perf_counter() - start
+
+
+def write_fingerprinted(data: bytes, base: Path, fmt):
+    """Write data as <base>.<content hash>.<fmt>; an existing file with that name already holds these bytes"""
+    out_path = base.with_name(f"{base.name}.{hashlib.sha256(data).hexdigest()[:10]}.{fmt}")
+    if not out_path.exists():
+        tmp = out_path.with_name(out_path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, out_path)
+    return out_path
+
+
+def write_if_changed(data: bytes, path: Path):
+    """Write path only when its bytes differ, so unchanged outputs keep their mtime"""
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def _rel(path: Path):
+    """Repo-relative path, or the absolute path for outputs outside the repo (--out elsewhere)"""
+    path = path.resolve()
+    try:
+        return path.relative_to(BASE).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_digest(path: Path):
+    """sha256 of a file, read in 1 MB chunks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BuildCache:
+    """Content-addressed record of finished outputs, persisted between runs
+
+    Source digests are memoized by (size, mtime) so an unchanged tree is only
+    stat'ed, never re-read. Outputs are keyed by the source digest plus every
+    setting that affects the encoded bytes, so changing a quality, width or
+    format rebuilds exactly the affected outputs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or CACHE_FILE
+        data = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+            except ValueError:
+                data = {}
+        if data.get('version') != PIPELINE_VERSION:
+            data = {}
+        self.sources = data.get('sources', {})
+        self.outputs = data.get('outputs', {})
+        self.used = set()
+        self.dirty = False
+
+    def source_digest(self, path: Path):
+        st = path.stat()
+        rel = _rel(path)
+        memo = self.sources.get(rel)
+        if memo and memo['size'] == st.st_size and memo['mtime_ns'] == st.st_mtime_ns:
+            return memo['sha256']
+        digest = file_digest(path)
+        self.sources[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        self.dirty = True
+        return digest
+
+    @staticmethod
+    def output_key(digest, size, widths, fmt):
+        params = {
+            'size': list(size),
+            'widths': sorted(widths),
+            'format': fmt,
+            'options': FORMATS[fmt][1],
+            'version': PIPELINE_VERSION,
+        }
+        return hashlib.sha256(f"{digest}:{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+    def lookup(self, key):
+        """Cached record for key, provided every file it lists is still on disk"""
+        record = self.outputs.get(key)
+        if record and all((BASE / p).exists() for p in _record_paths(record)):
+            self.used.add(key)
+            return record
+        return None
+
+    def store(self, key, record):
+        self.outputs[key] = record
+        self.used.add(key)
+        self.dirty = True
+
+    def forget_unused(self):
+        """Drop records not looked up or stored this run; returns the paths still referenced"""
+        stale = set(self.outputs) - self.used
+        for key in stale:
+            del self.outputs[key]
+        self.dirty = self.dirty or bool(stale)
+        return {p for record in self.outputs.values() for p in _record_paths(record)}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({'version': PIPELINE_VERSION, 'sources': self.sources,
+                                   'outputs': self.outputs}), encoding='utf-8')
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def _record_paths(record):
+    return [v['path'] for v in record['variants']] + ([record['alias']] if record.get('alias') else [])
+
+
+def ladder(size, widths=WIDTHS):
+    """Widths to emit for a target size: the ladder steps narrower than the target, plus the target"""
+    return sorted({w for w in widths if w < size[0]} | {size[0]})
+
+
+def process(src_path: Path, out_base: Path, size, formats=DEFAULT_FORMATS, widths=WIDTHS):
+    """Optimize one source into every requested format and width; returns a result dict for the report
+
+    Variants are written under content-hashed names (hero-home-480w.<hash>.webp)
+    that can be cached forever. The full target size is also kept under the
+    plain name (hero-home.jpg) that existing pages reference.
+    """
+    result = {
+        'source': src_path.name,
+        'output': out_base.name,
+        'source_bytes': src_path.stat().st_size,
+        'outputs': [],
+        'errors': [],
+    }
     if PIL_AVAILABLE:
+        start = time.perf_counter()
         try:
-            im = Image.open(src_path)
+            im = load_image(src_path, size)
         except Exception as e:
-            print(f"ERROR opening {src_path}: {e}")
-            return False
-        try:
-            im = ImageOps.exif_transpose(im)
-        except Exception:
-            pass
-        if im.mode in ("RGBA", "LA"):
-            bg = Image.new("RGB", im.size, (255,255,255))
-            bg.paste(im, mask=im.split()[-1])
-            im = bg
-        else:
-            im = im.convert("RGB")
-        im.thumbnail(size, Image.LANCZOS)
-        try:
-            im.save(jpg_path, format='JPEG', quality=75, optimize=True)
-            print(f"Wrote {jpg_path}")
-        except Exception as e:
-            print(f"ERROR saving JPG {jpg_path}: {e}")
-        try:
-            im.save(webp_path, format='WEBP', quality=75, method=6)
-            print(f"Wrote {webp_path}")
-        except Exception as e:
-            print(f"ERROR saving WEBP {webp_path}: {e}")
-        return True
+            result['errors'].append(f"ERROR opening {src_path}: {e}")
+            return result
+        result['decode_seconds'] = time.perf_counter() - start
+        result['size'] = im.size
+        for width in ladder(im.size, widths):
+            if width == im.size[0]:
+                variant, base = im, out_base
+            else:
+                height = max(1, round(im.size[1] * width / im.size[0]))
+                variant = im.resize((width, height), Image.LANCZOS)
+                base = out_base.with_name(f"{out_base.name}-{width}w")
+            for fmt in formats:
+                try:
+                    data, seconds = encode(variant, fmt)
+                    out_path = write_fingerprinted(data, base, fmt)
+                    output = {
+                        'format': fmt, 'path': _rel(out_path), 'width': variant.size[0],
+                        'height': variant.size[1], 'bytes': len(data), 'seconds': seconds,
+                    }
+                    if variant is im:
+                        alias = out_base.with_suffix('.' + fmt)
+                        write_if_changed(data, alias)
+                        output['alias'] = _rel(alias)
+                    result['outputs'].append(output)
+                except Exception as e:
+                    result['errors'].append(f"ERROR saving {fmt.upper()} {base}: {e}")
+        return result
     else:
-        # Fallback: copy source file to jpg path (no conversion) and duplicate as webp if possible
+        # Fallback: copy source file to each output path (no conversion, not a true webp, no ladder)
         try:
             OUT_DIR.mkdir(parents=True, exist_ok=True)
-            # copy original to jpg_path if original is already jpg-like
-            shutil.copyfile(src_path, jpg_path)
-            print(f"Copied {src_path.name} -> {jpg_path.name} (fallback)")
-            # also create a copy for webp using same bytes (not a true webp)
-            shutil.copyfile(src_path, webp_path)
-            print(f"Copied {src_path.name} -> {webp_path.name} (fallback)")
-            return True
+            for fmt in formats:
+                out_path = out_base.with_suffix('.' + fmt)
+                shutil.copyfile(src_path, out_path)
+                result['outputs'].append({'format': fmt, 'path': _rel(out_path), 'bytes': out_path.stat().st_size, 'seconds': 0.0})
         except Exception as e:
-            print(f"FALLBACK ERROR copying {src_path}: {e}")
-            return False
+            result['errors'].append(f"FALLBACK ERROR copying {src_path}: {e}")
+        return result
+
+
+def cache_records(result):
+    """Split a result's outputs into one cache record per format"""
+    records = {}
+    for o in result['outputs']:
+        record = records.setdefault(o['format'], {'size': list(result.get('size') or ()), 'variants': []})
+        record['variants'].append({k: o[k] for k in ('format', 'path', 'width', 'height', 'bytes') if k in o})
+        if o.get('alias'):
+            record['alias'] = o['alias']
+    return records
+
+
+def cached_outputs(record):
+    """Rebuild report outputs from a cache record"""
+    outputs = [dict(v, seconds=0.0, cached=True) for v in record['variants']]
+    full = max(outputs, key=lambda o: o.get('width') or 0)
+    if record.get('alias'):
+        full['alias'] = record['alias']
+    return outputs
+
+
+def manifest_entry(r):
+    """Manifest record for one processed mapping; paths are site-relative for use in HTML"""
+    variants = []
+    for o in sorted(r['outputs'], key=lambda o: (o['format'], o.get('width') or 0)):
+        variants.append({
+            'format': o['format'],
+            'path': o['path'],
+            'width': o.get('width'),
+            'height': o.get('height'),
+            'bytes': o['bytes'],
+        })
+    width, height = r.get('size') or (None, None)
+    return {'source': r['source'], 'width': width, 'height': height, 'variants': variants}
+
+
+def load_manifest(path=None):
+    path = path or MANIFEST_FILE
+    if path.exists():
+        return json.loads(path.read_text(encoding='utf-8'))
+    return {}
+
+
+def write_manifest(results, path=None):
+    """Merge processed mappings into the manifest (mappings not processed this run are kept)"""
+    path = path or MANIFEST_FILE
+    manifest = load_manifest(path)
+    for r in results:
+        if r['outputs']:
+            manifest[r['output']] = manifest_entry(r)
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(dict(sorted(manifest.items())), indent=2), encoding='utf-8')
+    os.replace(tmp, path)
+    return manifest
+
+
+def srcset(entry, fmt, prefix=''):
+    """srcset attribute value for one format of a manifest entry"""
+    return ', '.join(f"{prefix}{v['path']} {v['width']}w"
+                     for v in entry['variants'] if v['format'] == fmt and v['width'])
+
 
+def picture_html(entry, alt, sizes='100vw', prefix='', fallback='jpg', **img_attrs):
+    """<picture> markup for a manifest entry: modern formats as <source>, fallback format on <img>"""
+    order = [f for f in ('avif', 'webp') if any(v['format'] == f for v in entry['variants'])]
+    lines = ['<picture>']
+    for fmt in order:
+        lines.append(f'  <source type="image/{fmt}" srcset="{srcset(entry, fmt, prefix)}" sizes="{sizes}">')
+    largest = max((v for v in entry['variants'] if v['format'] == fallback), key=lambda v: v['width'] or 0)
+    attrs = {
+        'src': prefix + largest['path'],
+        'srcset': srcset(entry, fallback, prefix),
+        'sizes': sizes,
+        'width': entry['width'],
+        'height': entry['height'],
+        'alt': alt,
+        **img_attrs,
+    }
+    rendered = ' '.join(f'{k}="{html.escape(str(v), quote=True)}"' for k, v in attrs.items() if v is not None)
+    lines.append(f'  <img {rendered}>')
+    lines.append('</picture>')
+    return '\n'.join(lines)
 
-def main():
+
+def _kb(n):
+    return f"{n / 1024:.0f} KB"
+
+
+def _full_size(r):
+    width = (r.get('size') or (None,))[0]
+    return [o for o in r['outputs'] if o.get('width') in (None, width)]
+
+
+def prune(cache: BuildCache, names):
+    """Delete fingerprinted outputs for these mappings that this run's outputs do not reference"""
+    keep = cache.forget_unused()
+    pattern = re.compile(r'^(%s)(-\d+w)?\.[0-9a-f]{10}\.\w+$' % '|'.join(re.escape(n) for n in names))
+    removed = 0
+    for p in OUT_DIR.iterdir():
+        if p.is_file() and pattern.match(p.name) and _rel(p) not in keep:
+            p.unlink()
+            removed += 1
+    return removed
+
+
+def print_result(r):
+    for err in r['errors']:
+        print(err)
+    if not r['outputs']:
+        return
+    full = _full_size(r)
+    parts = [f"{o['format']} {_kb(o['bytes'])} " + ('(cached)' if o.get('cached') else f"({o['seconds']:.2f}s)")
+             for o in full]
+    if len(full) < len(r['outputs']):
+        parts.append(f"+{len(r['outputs']) - len(full)} narrower variants")
+    smallest = min(o['bytes'] for o in full)
+    saved = 100 * (1 - smallest / r['source_bytes']) if r['source_bytes'] else 0
+    print(f"{r['output']}: {r['source']} {_kb(r['source_bytes'])} -> " + ', '.join(parts) + f" | best saves {saved:.0f}%")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS),
+                        help='comma-separated output formats (jpg, webp, avif)')
+    parser.add_argument('--widths', default=','.join(str(w) for w in WIDTHS),
+                        help='comma-separated responsive widths below each target width')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the build cache and re-encode everything')
+    parser.add_argument('--prune', action='store_true',
+                        help='delete fingerprinted outputs no longer referenced by the cache')
+    args = parser.parse_args(argv)
+    args.formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    args.widths = [int(w) for w in args.widths.split(',') if w.strip()]
+    unknown = [f for f in args.formats if f not in FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
     if not ORIG_DIR.exists():
         print(f"Originals directory not found: {ORIG_DIR}")
         sys.exit(2)
-    for src_sub, out_name, size in MAPPINGS:
-        src = find_source(src_sub)
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    formats = available_formats(args.formats)
+    if not formats:
+        print(f"None of the requested formats ({', '.join(args.formats) or 'none'}) can be encoded here")
+        sys.exit(2)
+    index = index_sources()
+
+    cache = BuildCache()
+
+    start = time.perf_counter()
+    results = []
+    jobs = []
+    for src_sub, out_name, size, *override in MAPPINGS:
+        src = find_source(src_sub, index)
         if not src:
             print(f"Source for '{src_sub}' not found in {ORIG_DIR}")
             continue
-        out_base = OUT_DIR / out_name
-        process(src, out_base, size)
+        widths = override[0] if override else args.widths
+        digest = cache.source_digest(src)
+        keys = {fmt: cache.output_key(digest, size, widths, fmt) for fmt in formats}
+        cached = {} if args.force else {fmt: cache.lookup(key) for fmt, key in keys.items()}
+        todo = [fmt for fmt in formats if not cached.get(fmt)]
+        if not todo and cached:
+            any_record = next(iter(cached.values()))
+            r = {'source': src.name, 'output': out_name, 'source_bytes': src.stat().st_size,
+                 'size': tuple(any_record['size']) or None, 'errors': [],
+                 'outputs': [o for fmt in formats for o in cached_outputs(cached[fmt])]}
+            print_result(r)
+            results.append(r)
+            continue
+        jobs.append((src, OUT_DIR / out_name, size, widths, todo, keys, cached))
+
+    workers = min(args.workers or os.cpu_count() or 1, len(jobs)) or 1
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process, src, out_base, size, todo, widths): (keys, cached)
+                       for src, out_base, size, widths, todo, keys, cached in jobs}
+            for fut in as_completed(futures):
+                keys, cached = futures[fut]
+                r = fut.result()
+                for fmt, record in cache_records(r).items():
+                    if r.get('size'):
+                        cache.store(keys[fmt], record)
+                for fmt, record in cached.items():
+                    if record:
+                        r['outputs'].extend(cached_outputs(record))
+                print_result(r)
+                results.append(r)
+
+    write_manifest(results)
+    print(f"Wrote manifest {MANIFEST_FILE.relative_to(BASE)}")
+    if args.prune:
+        print(f"Pruned {prune(cache, [r['output'] for r in results])} stale fingerprinted file(s)")
+    cache.save()
+
+    built = [r for r in results if r['outputs'] and not all(o.get('cached') for o in r['outputs'])]
+    src_total = sum(r['source_bytes'] for r in results if r['outputs'])
+    out_total = sum(min(o['bytes'] for o in _full_size(r)) for r in results if r['outputs'])
+    print(f"\nProcessed {len(results)} image(s) ({len(built)} rebuilt, {len(results) - len(built)} cached) "
+          f"on {workers} worker(s) in {time.perf_counter() - start:.2f}s; "
+          f"smallest outputs total {_kb(out_total)} vs {_kb(src_total)} of originals")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,386 @@
+"""
+FORA Guide Sheet Sync
+Pulls the FORA guide sheet straight from Google Sheets instead of waiting for
+someone to export fora_guides.csv by hand, and publishes only the rows that
+changed since the last pull.
+
+- The sheet is downloaded as its CSV export (FORA_SHEET_ID / FORA_SHEET_GID or
+  FORA_SHEET_URL in fora_guides_config.txt), or read through the Sheets API
+  values endpoint when FORA_SHEETS_API_KEY is set. Requests are conditional
+  (If-None-Match / If-Modified-Since from the last pull), and a body identical
+  to the last one counts as unchanged too, so a daily run that finds nothing
+  new costs one request.
+- Rows are keyed by guide name (the key the publishers already use; repeated
+  names get '#2', '#3', ...) and hashed; the hashes of the last pull are kept in
+  the catalog database (sheet_rows), so each pull yields the rows added,
+  changed and removed since (removed rows are reported; their pages stay).
+- New and changed rows go to the Google Sheets publisher
+  (fora_google_sheets_automation.py) and the resources page is regenerated;
+  nothing runs when no row changed. The snapshot and validators are saved only
+  after that succeeds, so a failed run is retried on the next pull; rows whose
+  page failed to render are left out of the snapshot (and the validators are
+  not saved), so the next pull retries them too.
+
+For local runs and tests, --serve answers like Google does (ETag,
+Last-Modified, 304) from a CSV file:
+
+    python sheet_sync.py --serve fora_guides.csv --port 8765
+    python sheet_sync.py --url http://127.0.0.1:8765/fora_guides.csv --dry-run
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import requests
+
+from catalog_artifacts import replace_file
+from catalog_db import CatalogDB
+from guide_sheet import SheetReader, normalize_header
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CSV_FILE = 'fora_guides.csv'
+CONFIG_FILE = 'fora_guides_config.txt'
+EXPORT_URL = 'https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}'
+VALUES_URL = 'https://sheets.googleapis.com/v4/spreadsheets/{sheet_id}/values/{range}?key={api_key}'
+
+# meta keys (catalog_db) holding the last pull
+META_URL = 'sheet_url'
+META_ETAG = 'sheet_etag'
+META_LAST_MODIFIED = 'sheet_last_modified'
+META_SHA256 = 'sheet_sha256'
+
+
+def load_config(config_file=CONFIG_FILE) -> Dict[str, str]:
+    """KEY=VALUE lines of the automation config (same format ConfigManager reads)"""
+    config = {}
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    config[key.strip()] = value.strip()
+    return config
+
+
+def sheet_url(config: Dict[str, str]) -> Optional[str]:
+    """Where to pull the sheet from, or None if the config names no sheet"""
+    if config.get('FORA_SHEET_URL'):
+        return config['FORA_SHEET_URL']
+    sheet_id = config.get('FORA_SHEET_ID')
+    if not sheet_id:
+        return None
+    if config.get('FORA_SHEETS_API_KEY'):
+        return VALUES_URL.format(sheet_id=sheet_id, range=quote(config.get('FORA_SHEET_RANGE', 'A:T')),
+                                 api_key=config['FORA_SHEETS_API_KEY'])
+    return EXPORT_URL.format(sheet_id=sheet_id, gid=config.get('FORA_SHEET_GID', '0'))
+
+
+def values_to_csv(document: Dict) -> bytes:
+    """CSV bytes for a Sheets API values response ({'values': [[...], ...]})"""
+    out = io.StringIO()
+    csv.writer(out, lineterminator='\n').writerows(document.get('values', []))
+    return out.getvalue().encode('utf-8')
+
+
+class SheetFetcher:
+    """Conditional download of the guide sheet; validators are kept in the catalog database"""
+
+    def __init__(self, url: str, db: CatalogDB, csv_file=CSV_FILE, timeout: int = 30):
+        self.url = url
+        self.db = db
+        self.csv_file = Path(csv_file)
+        self.timeout = timeout
+        self.validators = {}  # validators of the body fetch() returned, saved by commit()
+
+    def fetch(self, force: bool = False) -> Optional[bytes]:
+        """The sheet as CSV bytes, or None if it has not changed since the last pull"""
+        headers = {}
+        same_url = self.db.get_meta(META_URL) == self.url
+        if not force and same_url and self.csv_file.exists():
+            etag = self.db.get_meta(META_ETAG)
+            last_modified = self.db.get_meta(META_LAST_MODIFIED)
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        data = response.content
+        if 'json' in response.headers.get('Content-Type', ''):
+            data = values_to_csv(response.json())
+        digest = hashlib.sha256(data).hexdigest()
+        self.validators = {
+            META_URL: self.url,
+            META_ETAG: response.headers.get('ETag'),
+            META_LAST_MODIFIED: response.headers.get('Last-Modified'),
+            META_SHA256: digest,
+        }
+        # the CSV export often ignores conditional headers; an identical body is unchanged too
+        if not force and same_url and self.csv_file.exists() and digest == self.db.get_meta(META_SHA256):
+            self.commit()
+            return None
+        return data
+
+    def save(self, data: bytes):
+        """Replace the local CSV (atomically) with a pulled sheet"""
+        replace_file(self.csv_file, data)
+
+    def commit(self):
+        """Remember the last pull's validators for the next conditional request"""
+        for key, value in self.validators.items():
+            self.db.set_meta(key, value)
+
+
+class SheetDelta:
+    """Rows added, changed and removed since the last snapshot"""
+
+    def __init__(self, added: List[str], changed: List[str], removed: List[str], unchanged: int,
+                 names: Dict[str, str], first_pull: bool):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.unchanged = unchanged
+        self.first_pull = first_pull
+        self._names = names
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def names(self) -> List[str]:
+        """Guide names of the new and changed rows"""
+        return [self._names[key] for key in self.added + self.changed]
+
+    def summary(self, limit: int = 20) -> List[str]:
+        lines = [f"Sheet delta: {len(self.added)} new, {len(self.changed)} changed, "
+                 f"{len(self.removed)} removed, {self.unchanged} unchanged"]
+        rows = ([f"    new     {self._names[key]}" for key in self.added] +
+                [f"    changed {self._names[key]}" for key in self.changed] +
+                [f"    removed {key}" for key in self.removed])
+        lines.extend(rows[:limit])
+        if len(rows) > limit:
+            lines.append(f"    ... and {len(rows) - limit} more")
+        return lines
+
+
+def row_hashes(rows: List[Dict]) -> List[Tuple[str, str, str]]:
+    """(key, sha256, name) per row; the key is the normalized guide name"""
+    seen = {}
+    hashes = []
+    for row in rows:
+        key = normalize_header(row['name'])
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        digest = hashlib.sha256(json.dumps(row, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+        hashes.append((key, digest, row['name']))
+    return hashes
+
+
+def compute_delta(hashes: List[Tuple[str, str, str]], previous: Dict[str, str]) -> SheetDelta:
+    current = {key: digest for key, digest, _ in hashes}
+    added = [key for key, _, _ in hashes if key not in previous]
+    changed = [key for key, digest, _ in hashes if key in previous and previous[key] != digest]
+    removed = sorted(key for key in previous if key not in current)
+    return SheetDelta(added, changed, removed, len(hashes) - len(added) - len(changed),
+                      {key: name for key, _, name in hashes}, first_pull=not previous)
+
+
+def read_rows(data: bytes) -> List[Dict]:
+    """Typed rows of a pulled sheet (validated the way the generators read it)"""
+    fd, tmp = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        reader = SheetReader(tmp)
+        rows = reader.read()
+        reader.report(logger)
+        return rows
+    finally:
+        os.unlink(tmp)
+
+
+def publish_delta(delta: SheetDelta, dry_run: bool = False, csv_file=CSV_FILE) -> List[str]:
+    """Hand the new and changed rows to the publisher and regenerate the resources
+    page; returns the names of the guides that failed to publish"""
+    # imported here: both set up their own log files on import
+    from fora_google_sheets_automation import AutomationManager
+    import generate_resources_page
+
+    # on the first pull every row is new; publish what was never published instead
+    only = None if delta.first_pull else delta.names()
+    failed = []
+    if only != []:
+        automation = AutomationManager()
+        automation.sheets_reader.csv_file = str(csv_file)
+        plan = automation.run(dry_run=dry_run, only=only)
+        if plan is not None:
+            failed = [f['guide'] for f in plan.failed]
+    if not dry_run:
+        generate_resources_page.main()
+    return failed
+
+
+def sync(url: str, csv_file=CSV_FILE, dry_run: bool = False, force: bool = False,
+         publish: bool = True) -> Optional[SheetDelta]:
+    """Pull the sheet and publish what changed; returns the delta (None if the sheet is unchanged)"""
+    with CatalogDB() as db:
+        fetcher = SheetFetcher(url, db, csv_file)
+        logger.info(f"Pulling the guide sheet from {url.split('?key=')[0]}")
+        data = fetcher.fetch(force=force)
+        if data is None:
+            logger.info("Sheet unchanged since the last pull - nothing to do")
+            return None
+
+        hashes = row_hashes(read_rows(data))
+        delta = compute_delta(hashes, db.sheet_row_hashes())
+        for line in delta.summary():
+            logger.info(line)
+        if dry_run:
+            if publish and delta:
+                with tempfile.TemporaryDirectory() as tmp:
+                    pulled = Path(tmp) / Path(csv_file).name
+                    pulled.write_bytes(data)
+                    publish_delta(delta, dry_run=True, csv_file=pulled)
+            logger.info(f"Dry run - {csv_file} and the snapshot were left as they were")
+            return delta
+
+        fetcher.save(data)
+        failed = set(publish_delta(delta)) if publish and delta else set()
+        if failed:
+            # not in the snapshot, so the next pull sees them as new and retries them
+            logger.warning(f"{len(failed)} guide(s) failed to publish; they will be retried on the next pull")
+            hashes = [h for h in hashes if h[2] not in failed]
+        db.replace_sheet_rows(hashes)
+        if not failed:
+            fetcher.commit()
+        return delta
+
+
+class LocalSheetServer:
+    """Serves a CSV file the way the Google Sheets export does (ETag,
+    Last-Modified, 304 on a conditional request), for local runs and tests"""
+
+    def __init__(self, csv_file=CSV_FILE, host: str = '127.0.0.1', port: int = 0):
+        self.csv_file = Path(csv_file)
+        self.requests = 0  # requests served (304s included)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{quote(self.csv_file.name)}"
+
+    def _handler(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                owner.requests += 1
+                try:
+                    data = owner.csv_file.read_bytes()
+                    mtime = owner.csv_file.stat().st_mtime
+                except OSError:
+                    self.send_error(404)
+                    return
+                etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+                last_modified = formatdate(int(mtime), usegmt=True)
+                if self._not_modified(etag, mtime):
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_modified(self, etag: str, mtime: float) -> bool:
+                if 'If-None-Match' in self.headers:
+                    return etag in [t.strip() for t in self.headers['If-None-Match'].split(',')]
+                since = self.headers.get('If-Modified-Since')
+                if since:
+                    try:
+                        return int(mtime) <= parsedate_to_datetime(since).timestamp()
+                    except (TypeError, ValueError):
+                        return False
+                return False
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> 'LocalSheetServer':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pull the FORA guide sheet and publish the rows that changed')
+    parser.add_argument('--url', help='sheet CSV URL (default: FORA_SHEET_URL / FORA_SHEET_ID in the config)')
+    parser.add_argument('--csv', default=CSV_FILE, help=f'local copy of the sheet (default: {CSV_FILE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='show the delta and what publishing it would change; write nothing')
+    parser.add_argument('--force', action='store_true', help='download even if the sheet looks unchanged')
+    parser.add_argument('--no-publish', action='store_true', help='only pull the sheet and record the delta')
+    parser.add_argument('--serve', metavar='CSV', help='serve CSV like the Google export instead of syncing')
+    parser.add_argument('--port', type=int, default=8765, help='port for --serve (default: 8765)')
+    args = parser.parse_args()
+
+    if args.serve:
+        server = LocalSheetServer(args.serve, port=args.port)
+        logger.info(f"Serving {args.serve} at {server.url} (Ctrl+C to stop)")
+        try:
+            server.server.serve_forever()
+        except KeyboardInterrupt:
+            server.server.server_close()
+        return
+
+    url = args.url or sheet_url(load_config())
+    if not url:
+        logger.error(f"No sheet configured: set FORA_SHEET_ID (or FORA_SHEET_URL) in {CONFIG_FILE} or pass --url")
+        return
+    sync(url, args.csv, dry_run=args.dry_run, force=args.force, publish=not args.no_publish)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info("\nSync interrupted by user")
+    except Exception as e:
+        logger.error(f"Sync failed: {str(e)}", exc_info=True)
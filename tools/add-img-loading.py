@@ -1,16 +1,193 @@
 #!/usr/bin/env python3
-import re
+"""Add loading/decoding hints and intrinsic width/height to <img> tags.
+
+Pages are tokenized with html.parser and only the <img> tags that need a change
+are rewritten; every other byte of the file is left as it was, and a second run
+changes nothing. The first --eager images on a page are treated as above the
+fold: they are not lazy-loaded, and the largest of them (the likely LCP image)
+gets fetchpriority="high". width/height come from the image files themselves.
+
+Usage:
+    python tools/add-img-loading.py --dry-run            # show a diff, write nothing
+    python tools/add-img-loading.py index.html --eager 1
+"""
+from html.parser import HTMLParser
 from pathlib import Path
+import argparse
+import difflib
+import re
+import sys
+
+from html_audit import EXCLUDE, INCLUDE, discover_pages
+from site_index import OK, shared_index
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except Exception:
+    PIL_AVAILABLE = False
 
 root = Path(__file__).resolve().parents[1]
-files = list(root.rglob('*.html')) + list(root.rglob('*.htm'))
-changed = 0
-for f in files:
-    s = f.read_text(encoding='utf8', errors='replace')
-    orig = s
-    s = re.sub(r'<img((?![^>]*\bloading=)[^>]*?)>', r'<img\1 loading="lazy">', s, flags=re.IGNORECASE)
-    if s != orig:
-        f.write_text(s, encoding='utf8')
+EAGER_COUNT = 2
+# smaller than this (logos, icons) is never the LCP candidate
+LCP_MIN_AREA = 150 * 150
+SVG_SIZE_RE = re.compile(r'''<svg\b[^>]*>''', re.I | re.S)
+SVG_ATTR_RE = re.compile(r'''\b(width|height|viewBox)\s*=\s*["']([^"']+)["']''', re.I)
+
+_sizes = {}
+
+
+def _svg_size(path: Path):
+    m = SVG_SIZE_RE.search(path.read_text(encoding='utf-8', errors='ignore')[:4096])
+    if not m:
+        return None
+    attrs = {k.lower(): v for k, v in SVG_ATTR_RE.findall(m.group(0))}
+    try:
+        if 'width' in attrs and 'height' in attrs and not attrs['width'].endswith('%'):
+            return round(float(re.sub(r'px$', '', attrs['width']))), round(float(re.sub(r'px$', '', attrs['height'])))
+        if 'viewbox' in attrs:
+            _, _, w, h = (float(v) for v in attrs['viewbox'].replace(',', ' ').split())
+            return round(w), round(h)
+    except ValueError:
+        pass
+    return None
+
+
+def image_size(rel):
+    """(width, height) of a site image from its header, or None"""
+    if rel not in _sizes:
+        path = root / rel
+        size = None
+        try:
+            if path.suffix.lower() == '.svg':
+                size = _svg_size(path)
+            elif PIL_AVAILABLE:
+                with Image.open(path) as im:
+                    size = im.size
+        except Exception:
+            size = None
+        _sizes[rel] = size
+    return _sizes[rel]
+
+
+class ImgTagParser(HTMLParser):
+    """Records each <img> start tag with its character offset and raw text"""
+
+    def __init__(self, text):
+        super().__init__(convert_charrefs=True)
+        self.line_starts = [0]
+        for i, ch in enumerate(text):
+            if ch == '\n':
+                self.line_starts.append(i + 1)
+        self.imgs = []  # (offset, raw tag, attrs)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            line, col = self.getpos()
+            self.imgs.append((self.line_starts[line - 1] + col, self.get_starttag_text(), dict(attrs)))
+
+    handle_startendtag = handle_starttag
+
+
+def set_attrs(raw, add, replace=None):
+    """Raw tag text with attributes appended (before '>' or '/>') and existing values replaced"""
+    # the old regex version left '<img ... / loading="lazy">'; drop the stray slash while here
+    raw = re.sub(r'\s/(?=\s+[\w-]+\s*=)', '', raw)
+    for name, value in (replace or {}).items():
+        raw = re.sub(r'''(\s%s\s*=\s*)(["']?)[^"'\s>]*\2''' % re.escape(name),
+                     lambda m: f'{m.group(1)}"{value}"', raw, count=1, flags=re.I)
+    if not add:
+        return raw
+    extra = ''.join(f' {name}="{value}"' for name, value in add.items())
+    end = -2 if raw.endswith('/>') else -1
+    head = raw[:end].rstrip() if end == -2 else raw[:end]
+    return head + extra + (' />' if end == -2 else '>')
+
+
+def rewrite(text, page: Path, eager=EAGER_COUNT, dimensions=True):
+    """(new text, number of tags changed) for one page"""
+    parser = ImgTagParser(text)
+    parser.feed(text)
+    parser.close()
+    index = shared_index(root)
+    from_dir = page.parent.relative_to(root).as_posix() if page.is_relative_to(root) else None
+    if from_dir == '.':
+        from_dir = ''
+
+    plans = []
+    for n, (offset, raw, attrs) in enumerate(parser.imgs):
+        size = None
+        if from_dir is not None and attrs.get('src'):
+            status, rel = index.resolve(attrs['src'], from_dir)
+            size = image_size(rel) if status == OK else None
+        plans.append({'offset': offset, 'raw': raw, 'attrs': attrs, 'size': size, 'eager': n < eager})
+
+    # LCP candidate: the largest sizeable above-the-fold image
+    candidates = [p for p in plans if p['eager'] and p['size'] and p['size'][0] * p['size'][1] >= LCP_MIN_AREA]
+    lcp = max(candidates, key=lambda p: p['size'][0] * p['size'][1]) if candidates else None
+    if any('fetchpriority' in p['attrs'] for p in plans):
+        lcp = None  # the page already chose one
+
+    out, pos, changed = [], 0, 0
+    for p in plans:
+        attrs, add, replace = p['attrs'], {}, {}
+        loading = (attrs.get('loading') or '').lower()
+        if p['eager']:
+            if loading == 'lazy':
+                replace['loading'] = 'eager'
+        elif 'loading' not in attrs:
+            add['loading'] = 'lazy'
+        if 'decoding' not in attrs:
+            add['decoding'] = 'async'
+        if dimensions and p['size'] and 'width' not in attrs and 'height' not in attrs:
+            add['width'], add['height'] = p['size']
+        if p is lcp:
+            add['fetchpriority'] = 'high'
+        if not add and not replace:
+            continue
+        start = p['offset']
+        if text[start:start + len(p['raw'])] != p['raw']:
+            continue  # offsets disagree (unusual markup); leave the tag alone
+        out.append(text[pos:start])
+        out.append(set_attrs(p['raw'], add, replace))
+        pos = start + len(p['raw'])
         changed += 1
+    out.append(text[pos:])
+    return ''.join(out), changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Add loading/decoding/width/height to <img> tags')
+    parser.add_argument('pages', nargs='*', help='pages to rewrite (default: every published page)')
+    parser.add_argument('--eager', type=int, default=EAGER_COUNT,
+                        help=f'leading images per page treated as above the fold (default: {EAGER_COUNT})')
+    parser.add_argument('--no-dimensions', action='store_true', help='do not add width/height')
+    parser.add_argument('--dry-run', action='store_true', help='print a unified diff instead of writing')
+    args = parser.parse_args(argv)
+
+    files = [Path(p).resolve() for p in args.pages] if args.pages else discover_pages(root, INCLUDE, EXCLUDE)
+    if not PIL_AVAILABLE and not args.no_dimensions:
+        print('Pillow not installed: only SVG dimensions will be added (pip install pillow)')
+    changed_files = changed_tags = 0
+    for f in files:
+        data = f.read_bytes()
+        # surrogateescape round-trips any bytes that are not valid UTF-8
+        s = data.decode('utf-8', errors='surrogateescape')
+        new, n = rewrite(s, f, args.eager, not args.no_dimensions)
+        if not n:
+            continue
+        changed_files += 1
+        changed_tags += n
+        if args.dry_run:
+            name = f.relative_to(root).as_posix() if f.is_relative_to(root) else str(f)
+            sys.stdout.writelines(difflib.unified_diff(
+                s.splitlines(keepends=True), new.splitlines(keepends=True), f'a/{name}', f'b/{name}', n=0))
+        else:
+            f.write_bytes(new.encode('utf-8', errors='surrogateescape'))
+
+    verb = 'would update' if args.dry_run else 'updated'
+    print(f"Processed {len(files)} files, {verb} {changed_tags} <img> tags in {changed_files} files.")
+
 
-print(f"Processed {len(files)} files, updated {changed} files.")
+if __name__ == '__main__':
+    main()
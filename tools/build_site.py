@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Build the deployable site into dist/.
+
+Published pages and everything they reference (per tools/ref_graph.py) are
+copied to dist/. HTML, CSS and JS are minified, and files under css/, js/ and
+images/ (the paths netlify.toml serves as immutable) get content-hashed names
+(styles.3f2a9c1b0d.css). References in pages and stylesheets are rewritten to
+match, and dist/asset-manifest.json maps each source path to its output.
+
+Builds are incremental: tools/.build-cache.json remembers each output's inputs
+(its source hash plus the hashed names of what it references), so a rebuild
+only redoes files whose inputs changed and removes outputs that went away.
+
+Stylesheets under css/ lose the rules no published page can match
+(tools/prune_css.py), and the primary pages (tools/critical_css.py) get their
+above-the-fold CSS inlined in <head> and load the full stylesheets without
+blocking first paint.
+
+Usage:
+    python tools/build_site.py            # build dist/
+    python tools/build_site.py --force    # rebuild everything
+    python tools/build_site.py --no-critical --no-prune
+"""
+from fnmatch import fnmatch
+from html import unescape
+from pathlib import Path
+from urllib.parse import quote
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import time
+
+from critical_css import PRIMARY_PAGES, inline_critical, print_report
+from html_audit import EXCLUDE
+from minify import minify_css, minify_html, minify_js
+from prune_css import ALLOWLIST, CSS_DIR, GENERATORS, Pruner
+from prune_css import print_report as print_prune_report
+from ref_graph import CSS_URL_RE, PAGE_EXTS, URL_ATTRS, RefGraph
+from site_index import OK
+
+ROOT = Path(__file__).resolve().parents[1]
+DIST = ROOT / 'dist'
+CACHE_FILE = ROOT / 'tools' / '.build-cache.json'
+MANIFEST_NAME = 'asset-manifest.json'
+# bump when output for the same input changes (minifier, rewriting)
+BUILD_VERSION = 4
+FINGERPRINT_DIRS = ('css/', 'js/', 'images/')
+# tooling and test pages are never deployed
+BUILD_EXCLUDE = EXCLUDE + ['tools/*', 'scripts/*', 'tests/*']
+# served without being referenced from a page (globs)
+EXTRA_FILES = ['CNAME', 'favicon.ico', 'robots.txt', 'sitemap.xml',
+               'travel-guides/index.*', 'travel-guides/index-by-continent/*',
+               'fora_guides_catalog.*', 'fora_guides_catalog-by-continent/*', 'fora_guides_search.json*']
+FINGERPRINTED_RE = re.compile(r'\.[0-9a-f]{10}\.[^./]+$')
+ATTR_RE = re.compile(r'''(\s)([\w:-]+)(\s*=\s*)(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+START_TAG_RE = re.compile(r'<[a-zA-Z][^\s/>]*(?:\s[^>]*)?>', re.S)
+RAW_BLOCK_RE = re.compile(r'<(script|style|textarea|pre)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.I | re.S)
+SRCSET_ATTRS = {'srcset', 'data-srcset', 'imagesrcset'}
+
+
+def _excluded(rel):
+    return any(fnmatch(rel, pat) for pat in BUILD_EXCLUDE)
+
+
+def fingerprinted_name(rel, data):
+    if not rel.startswith(FINGERPRINT_DIRS) or FINGERPRINTED_RE.search(rel):
+        return rel
+    stem, ext = posixpath.splitext(rel)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+
+
+class Builder:
+    def __init__(self, force=False, critical=True, prune=True):
+        self.graph = RefGraph()
+        self.graph.update()
+        self.index = self.graph.index
+        try:
+            self.cache = {} if force else json.loads(CACHE_FILE.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.cache = {}
+        if self.cache.get('version') != BUILD_VERSION:
+            self.cache = {'version': BUILD_VERSION, 'files': {}}
+        self.outputs = {}  # source rel -> output rel
+        self.built = self.reused = 0
+        self.critical = set(PRIMARY_PAGES) if critical else set()
+        self.critical_reports = []
+        self.prune = prune
+        self.pruner = None  # created on first use; parsing every page is the slow part
+        self.prune_key = None
+        self.prune_reports = []
+
+    # -- inputs ---------------------------------------------------------------
+    def sources(self):
+        """(pages, assets): published pages and every non-page file they load or link to"""
+        pages = sorted(r for r in self.graph.files if r.lower().endswith(PAGE_EXTS) and not _excluded(r))
+        assets, stack = set(), list(pages)
+        seen = set(pages)
+        while stack:
+            for target in self.graph.edges.get(stack.pop(), {}):
+                if target in seen or target.lower().endswith(PAGE_EXTS):
+                    continue
+                seen.add(target)
+                assets.add(target)
+                stack.append(target)
+        assets.update(r for r in self.index.sizes if any(fnmatch(r, pat) for pat in EXTRA_FILES))
+        return pages, assets
+
+    def source_digest(self, rel):
+        st = (ROOT / rel).stat()
+        entry = self.cache['files'].get(rel, {})
+        if entry.get('stat') == [st.st_size, st.st_mtime_ns]:
+            return entry['source_digest']
+        return hashlib.sha256((ROOT / rel).read_bytes()).hexdigest()
+
+    # -- reference rewriting ----------------------------------------------------
+    def map_url(self, ref, from_dir):
+        value = unescape(ref).strip()
+        status, rel = self.index.resolve(value, from_dir)
+        if status != OK or self.outputs.get(rel, rel) == rel:
+            return ref
+        path = value.split('#')[0].split('?')[0]
+        new = self.outputs[rel]
+        new = '/' + new if path.startswith('/') else posixpath.relpath(new, from_dir or '.')
+        if '%' in path:
+            new = quote(new, safe="/:@!$&'()*+,;=-._~")
+        return new + value[len(path):]
+
+    def rewrite_css(self, css, from_dir):
+        def repl(m):
+            ref = m.group(2) or m.group(4)
+            new = self.map_url(ref, from_dir)
+            return m.group(0).replace(ref, new, 1) if new != ref else m.group(0)
+        return CSS_URL_RE.sub(repl, css)
+
+    def rewrite_tag(self, tag, from_dir):
+        def repl(m):
+            name = m.group(2).lower()
+            value = next(v for v in (m.group(4), m.group(5), m.group(6)) if v is not None)
+            if name in URL_ATTRS:
+                new = self.map_url(value, from_dir)
+            elif name in SRCSET_ATTRS:
+                parts = []
+                for candidate in value.split(','):
+                    bits = candidate.strip().split(None, 1)
+                    if bits:
+                        bits[0] = self.map_url(bits[0], from_dir)
+                    parts.append(' '.join(bits))
+                new = ', '.join(parts)
+            elif name == 'style':
+                new = self.rewrite_css(value, from_dir)
+            else:
+                return m.group(0)
+            if new == value:
+                return m.group(0)
+            quote_char = "'" if m.group(5) is not None else '"'
+            return f'{m.group(1)}{m.group(2)}{m.group(3)}{quote_char}{new}{quote_char}'
+        return ATTR_RE.sub(repl, tag)
+
+    def rewrite_html(self, html, from_dir):
+        out, pos = [], 0
+        for m in RAW_BLOCK_RE.finditer(html):
+            out.append(START_TAG_RE.sub(lambda t: self.rewrite_tag(t.group(0), from_dir), html[pos:m.start()]))
+            block = m.group(0)
+            if block.startswith('<!--'):
+                out.append(block)
+            else:
+                # rewrite the opening tag (script src=...) and CSS inside <style>
+                open_end = block.index('>') + 1
+                body = block[open_end:]
+                if m.group(1).lower() == 'style':
+                    body = self.rewrite_css(body, from_dir)
+                out.append(self.rewrite_tag(block[:open_end], from_dir) + body)
+            pos = m.end()
+        out.append(START_TAG_RE.sub(lambda t: self.rewrite_tag(t.group(0), from_dir), html[pos:]))
+        return ''.join(out)
+
+    # -- outputs ----------------------------------------------------------------
+    def deps_key(self, rel, digest):
+        """Everything an output depends on: its source and the output names of what it references"""
+        deps = sorted((t, self.outputs.get(t, t)) for t in self.graph.edges.get(rel, {}))
+        extra = self.prune_key if self.prunes(rel) else rel in self.critical
+        return hashlib.sha256(json.dumps([BUILD_VERSION, digest, deps, extra]).encode()).hexdigest()
+
+    def prunes(self, rel):
+        return self.prune and rel.startswith(CSS_DIR) and rel.lower().endswith('.css')
+
+    def compute_prune_key(self, pages, assets):
+        """Pruned stylesheets depend on every page, generator and script, not just their own source"""
+        inputs = pages + [g for g in GENERATORS if (ROOT / g).exists()] + sorted(a for a in assets if a.endswith('.js'))
+        digests = [(rel, self.source_digest(rel)) for rel in inputs]
+        return hashlib.sha256(json.dumps([digests, sorted(ALLOWLIST)]).encode()).hexdigest()
+
+    def read_built_stylesheet(self, href, page_rel):
+        """Minified stylesheet text for critical_css.inline_critical, read back from dist/"""
+        rel = self.index.rel_path(href, posixpath.dirname(page_rel))
+        if rel is None or not rel.lower().endswith('.css') or not (DIST / rel).is_file():
+            return None
+        return (DIST / rel).read_text(encoding='utf-8', errors='ignore'), rel
+
+    def build_file(self, rel):
+        digest = self.source_digest(rel)
+        key = self.deps_key(rel, digest)
+        entry = self.cache['files'].get(rel)
+        if entry and entry['key'] == key and all((DIST / o).exists() for o in entry['outputs']):
+            self.outputs[rel] = entry['outputs'][0]
+            if entry.get('critical'):
+                self.critical_reports.append(entry['critical'])
+            if entry.get('pruned'):
+                self.prune_reports.append(entry['pruned'])
+            self.reused += 1
+            return
+
+        src = ROOT / rel
+        ext = src.suffix.lower()
+        from_dir = posixpath.dirname(rel)
+        report = pruned = None
+        if ext in PAGE_EXTS + ('.css', '.js'):
+            text = src.read_bytes().decode('utf-8', errors='surrogateescape')
+            if ext in PAGE_EXTS:
+                text = self.rewrite_html(text, from_dir)
+                if rel in self.critical:
+                    text, report = inline_critical(text, rel, self.read_built_stylesheet)
+                text = minify_html(text)
+            elif ext == '.css':
+                if self.prunes(rel):
+                    if self.pruner is None:
+                        self.pruner = Pruner(self.graph, self.sources()[0])
+                    text, pruned = self.pruner.prune(rel, text)
+                text = minify_css(self.rewrite_css(text, from_dir))
+            elif not rel.endswith('.min.js'):
+                text = minify_js(text)
+            data = text.encode('utf-8', errors='surrogateescape')
+        else:
+            data = None
+        out = rel if ext in PAGE_EXTS else fingerprinted_name(rel, data if data is not None else src.read_bytes())
+        outputs = [out]
+        if out != rel and self.loaded_by_script(rel):
+            # scripts build their own URLs, so they need the original name too
+            outputs.append(rel)
+        for o in outputs:
+            target = DIST / o
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + '.tmp')
+            if data is None:
+                shutil.copy2(src, tmp)
+            else:
+                tmp.write_bytes(data)
+            os.replace(tmp, target)
+        st = src.stat()
+        self.cache['files'][rel] = {'key': key, 'outputs': outputs, 'source_digest': digest,
+                                    'stat': [st.st_size, st.st_mtime_ns]}
+        if report:
+            self.cache['files'][rel]['critical'] = report
+            self.critical_reports.append(report)
+        if pruned:
+            self.cache['files'][rel]['pruned'] = pruned
+            self.prune_reports.append(pruned)
+        self.outputs[rel] = out
+        self.built += 1
+
+    def loaded_by_script(self, rel):
+        return any(src.endswith('.js') and rel in edges for src, edges in self.graph.edges.items())
+
+    def css_order(self, stylesheets):
+        """Stylesheets with @import-ed ones first, so their hashed names are known"""
+        ordered, done = [], set()
+
+        def visit(rel, stack=()):
+            if rel in done or rel in stack:
+                return
+            for dep in self.graph.edges.get(rel, {}):
+                if dep in stylesheets:
+                    visit(dep, stack + (rel,))
+            done.add(rel)
+            ordered.append(rel)
+        for rel in sorted(stylesheets):
+            visit(rel)
+        return ordered
+
+    def build(self):
+        pages, assets = self.sources()
+        if self.prune:
+            self.prune_key = self.compute_prune_key(pages, assets)
+        css = {a for a in assets if a.lower().endswith('.css')}
+        js = {a for a in assets if a.lower().endswith('.js')}
+        for rel in sorted(assets - css - js):
+            self.build_file(rel)
+        for rel in self.css_order(css) + sorted(js) + pages:
+            self.build_file(rel)
+
+        built = set(pages) | assets
+        self.cache['files'] = {k: v for k, v in self.cache['files'].items() if k in built}
+        keep = {o for v in self.cache['files'].values() for o in v['outputs']} | {MANIFEST_NAME}
+        removed = 0
+        for dirpath, _, filenames in os.walk(DIST):
+            for name in filenames:
+                rel = (Path(dirpath) / name).relative_to(DIST).as_posix()
+                if rel not in keep:
+                    os.remove(Path(dirpath) / name)
+                    removed += 1
+
+        manifest = {rel: self.outputs[rel] for rel in sorted(self.outputs) if self.outputs[rel] != rel}
+        (DIST / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        tmp = CACHE_FILE.with_name(CACHE_FILE.name + '.tmp')
+        tmp.write_text(json.dumps(self.cache, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp, CACHE_FILE)
+        return {'pages': len(pages), 'assets': len(assets), 'built': self.built, 'reused': self.reused,
+                'removed': removed, 'fingerprinted': len(manifest)}
+
+
+def dir_bytes(root):
+    return sum(f.stat().st_size for f in Path(root).rglob('*') if f.is_file())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the minified, fingerprinted site into dist/')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache and rebuild everything')
+    parser.add_argument('--no-critical', action='store_true',
+                        help='keep stylesheets render-blocking instead of inlining critical CSS')
+    parser.add_argument('--no-prune', action='store_true', help='ship stylesheets without removing unused rules')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    DIST.mkdir(exist_ok=True)
+    builder = Builder(force=args.force, critical=not args.no_critical, prune=not args.no_prune)
+    stats = builder.build()
+    print(f"Built {stats['pages']} pages and {stats['assets']} assets into {DIST} "
+          f"({stats['built']} written, {stats['reused']} unchanged, {stats['removed']} stale removed) "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"{stats['fingerprinted']} fingerprinted assets listed in {DIST / MANIFEST_NAME}; "
+          f"dist/ is {dir_bytes(DIST) / 1024 / 1024:.1f} MB")
+    if builder.prune_reports:
+        print()
+        print_prune_report(sorted(builder.prune_reports, key=lambda r: r['stylesheet']))
+    if builder.critical_reports:
+        print()
+        print_report(sorted(builder.critical_reports, key=lambda r: r['page']))
+
+
+if __name__ == '__main__':
+    main()
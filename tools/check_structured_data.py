@@ -1,94 +1,299 @@
-import re
+"""Validate the JSON-LD structured data on every published page.
+
+Blocks are extracted with html.parser and every node in them is checked
+against the rule table for its @type (RULES). Pages are validated in parallel
+and results are cached in tools/.structured-data-cache.json by file hash, so a
+re-run only re-validates pages that changed.
+
+Usage:
+    python tools/check_structured_data.py                 # every published page
+    python tools/check_structured_data.py index.html      # specific pages
+    python tools/check_structured_data.py --json sd.json
+    python tools/check_structured_data.py --sample-guides # pages the guide generators render
+"""
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+import argparse
+import hashlib
 import json
+import os
 import sys
-from pathlib import Path
+import tempfile
+from urllib.parse import urlparse
+
+from html_audit import EXCLUDE, INCLUDE, discover_pages
 
 ROOT = Path(__file__).resolve().parents[1]
-INDEX = ROOT / 'Index.html'
+CACHE_FILE = ROOT / 'tools' / '.structured-data-cache.json'
+# the pages use www.sealenterprises.net; CNAME points the bare domain at the site too
+PRODUCTION_ORIGINS = ('https://www.sealenterprises.net', 'https://sealenterprise.net')
+
+# Per-@type rules: 'required' fields must be present and non-empty; 'production'
+# fields, when present, must be absolute production URLs; 'absolute' fields, when
+# present, must be absolute http(s) URLs on any host (guide images stay on FORA).
+# A field is a key, a dotted path into a nested object ('publisher.@id') or
+# 'list[].key' for every element of a list. Bump RULES_VERSION when this table changes.
+RULES_VERSION = 2
+RULES = {
+    'Organization': {
+        'required': ['@id', 'name', 'url'],
+        'production': ['@id', 'url', 'logo'],
+    },
+    'TravelAgency': {
+        'required': ['@id', 'name', 'url'],
+        'production': ['@id', 'url', 'logo', 'image'],
+    },
+    'WebSite': {
+        'required': ['url'],
+        'production': ['url', 'publisher.@id'],
+    },
+    'ItemList': {
+        'required': ['itemListElement'],
+        'production': ['itemListElement[].url', 'itemListElement[].image'],
+    },
+    'Article': {
+        'required': ['headline', 'url', 'datePublished', 'publisher'],
+        'production': ['@id', 'url', 'mainEntityOfPage', 'publisher.@id', 'author.@id'],
+        'absolute': ['image'],
+        'max_length': {'headline': 110},
+    },
+}
+
+
+class JsonLdParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.blocks = []
+        self.current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script' and (dict(attrs).get('type') or '').strip().lower() == 'application/ld+json':
+            self.current = []
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self.current is not None:
+            self.blocks.append(''.join(self.current))
+            self.current = None
+
+    def handle_data(self, data):
+        if self.current is not None:
+            self.current.append(data)
+
 
 def extract_jsonld(html_text):
-    pattern = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S|re.I)
-    return pattern.findall(html_text)
+    parser = JsonLdParser()
+    parser.feed(html_text)
+    parser.close()
+    return parser.blocks
+
+
+def field_values(node, path):
+    """Values at a rule path in a JSON-LD node (see RULES)"""
+    values = [node]
+    for part in path.split('.'):
+        nxt = []
+        for v in values:
+            if not isinstance(v, dict):
+                continue
+            if part.endswith('[]'):
+                items = v.get(part[:-2])
+                nxt.extend(items if isinstance(items, list) else [])
+            elif part in v:
+                nxt.append(v[part])
+        values = nxt
+    return values
+
+
+def node_types(node):
+    t = node.get('@type')
+    return t if isinstance(t, list) else [t]
+
+
+def validate_node(node):
+    errors = []
+    for t in node_types(node):
+        rules = RULES.get(t)
+        if not rules:
+            continue
+        for path in rules.get('required', []):
+            if not any(v not in (None, '', [], {}) for v in field_values(node, path)):
+                errors.append(f'{t} missing {path}')
+        for path in rules.get('production', []):
+            for v in field_values(node, path):
+                if isinstance(v, str) and v and not v.startswith(PRODUCTION_ORIGINS):
+                    errors.append(f'{t} {path} not using production domain: {v}')
+        for path in rules.get('absolute', []):
+            for v in field_values(node, path):
+                if isinstance(v, str) and v:
+                    url = urlparse(v)
+                    if url.scheme not in ('http', 'https') or not url.netloc:
+                        errors.append(f'{t} {path} not an absolute http(s) URL: {v}')
+        for path, limit in rules.get('max_length', {}).items():
+            for v in field_values(node, path):
+                if isinstance(v, str) and len(v) > limit:
+                    errors.append(f'{t} {path} longer than {limit} characters')
+    return errors
+
 
 def validate_block(block_text):
     try:
         data = json.loads(block_text)
     except json.JSONDecodeError as e:
-        return False, f'JSON decode error: {e}'
+        return False, f'JSON decode error: {e}', []
 
     if not isinstance(data, dict):
-        return False, 'Top-level JSON-LD is not an object'
+        return False, 'Top-level JSON-LD is not an object', []
 
     ctx = data.get('@context')
-    if not ctx or 'schema.org' not in ctx:
-        return False, f'@context looks wrong: {ctx}'
+    if not ctx or 'schema.org' not in str(ctx):
+        return False, f'@context looks wrong: {ctx}', []
 
-    graph = data.get('@graph')
+    graph = data.get('@graph', [data] if '@type' in data else None)
     if not graph or not isinstance(graph, list):
-        return False, '@graph missing or not a list'
+        return False, '@graph missing or not a list', []
 
     errors = []
+    types = []
     for item in graph:
-        t = item.get('@type')
-        if t == 'Organization':
-            _id = item.get('@id','')
-            url = item.get('url','')
-            logo = item.get('logo','')
-            if not _id.startswith('https://sealenterprise.net'):
-                errors.append(f'Organization @id not using production domain: {_id}')
-            if not url.startswith('https://sealenterprise.net'):
-                errors.append(f'Organization url not using production domain: {url}')
-            if logo and not logo.startswith('https://sealenterprise.net'):
-                errors.append(f'Organization logo not absolute production URL: {logo}')
-        if t == 'WebSite':
-            url = item.get('url','')
-            if not url.startswith('https://sealenterprise.net'):
-                errors.append(f'WebSite url not using production domain: {url}')
-            pub = item.get('publisher',{})
-            pid = pub.get('@id','') if isinstance(pub, dict) else ''
-            if pid and not pid.startswith('https://sealenterprise.net'):
-                errors.append(f'publisher @id not using production domain: {pid}')
-        if t == 'ItemList':
-            elems = item.get('itemListElement',[])
-            for li in elems:
-                url = li.get('url','')
-                img = li.get('image','')
-                if url and not url.startswith('https://sealenterprise.net'):
-                    errors.append(f'ListItem url not using production domain: {url}')
-                if img and not img.startswith('https://sealenterprise.net'):
-                    errors.append(f'ListItem image not using production domain: {img}')
+        if not isinstance(item, dict):
+            errors.append('@graph entry is not an object')
+            continue
+        types.extend(t for t in node_types(item) if t)
+        errors.extend(validate_node(item))
 
     if errors:
-        return False, '\n'.join(errors)
-    return True, 'OK'
-
-def main():
-    if not INDEX.exists():
-        print('Index.html not found at', INDEX)
-        sys.exit(2)
-
-    html = INDEX.read_text(encoding='utf-8')
-    blocks = extract_jsonld(html)
-    if not blocks:
-        print('No JSON-LD blocks found in Index.html')
+        return False, '\n'.join(errors), types
+    return True, 'OK', types
+
+
+def validate_page(path: Path):
+    """(sha256, result) for one page; result lists each block's verdict"""
+    data = path.read_bytes()
+    blocks = extract_jsonld(data.decode('utf-8', errors='ignore'))
+    results = []
+    for block in blocks:
+        ok, msg, types = validate_block(block.strip())
+        results.append({'ok': ok, 'message': msg, 'types': types})
+    return hashlib.sha256(data).hexdigest(), {'blocks': results}
+
+
+def load_cache():
+    try:
+        cache = json.loads(CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return cache.get('pages', {}) if cache.get('rules_version') == RULES_VERSION else {}
+
+
+def save_cache(pages):
+    tmp = CACHE_FILE.with_name(CACHE_FILE.name + '.tmp')
+    tmp.write_text(json.dumps({'rules_version': RULES_VERSION, 'pages': pages}, separators=(',', ':')),
+                   encoding='utf-8')
+    os.replace(tmp, CACHE_FILE)
+
+
+def validate_pages(pages, workers=None, use_cache=True):
+    """{rel path: result} for pages, validating only those whose hash changed"""
+    cache = load_cache() if use_cache else {}
+    results, todo = {}, []
+    for page in pages:
+        rel = page.relative_to(ROOT).as_posix() if page.is_relative_to(ROOT) else str(page)
+        entry = cache.get(rel)
+        if entry and hashlib.sha256(page.read_bytes()).hexdigest() == entry['digest']:
+            results[rel] = entry['result']
+        else:
+            todo.append((rel, page))
+    if len(todo) < 2 or workers == 1:
+        fresh = [validate_page(p) for _, p in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(validate_page, [p for _, p in todo], chunksize=8))
+    for (rel, _), (digest, result) in zip(todo, fresh):
+        results[rel] = result
+        cache[rel] = {'digest': digest, 'result': result}
+    if use_cache and todo:
+        save_cache(cache)
+    return results
+
+
+def render_sample_guides(out_dir: Path):
+    """Render one guide page per generator into out_dir and return their paths"""
+    sys.path.insert(0, str(ROOT))
+    from fora_automation import ContentPublisher
+    from fora_google_sheets_automation import ContentPublisher as SheetPublisher
+
+    from guide_sheet import EMPTY, SCHEMA
+
+    guide = {c.field: EMPTY[c.kind] for c in SCHEMA}
+    guide.update(name='Sample Guide: Lisbon', description='Three days in Lisbon', region='Lisbon',
+                 country='Portugal', continent='Europe', budget_friendly=True, style='City',
+                 date='31-January-2025', magic_content_url='https://www.foratravel.com/guides/lisbon')
+    sheet_page = out_dir / 'sample-sheet-guide.html'
+    sheet_page.write_text(SheetPublisher._create_html_page(guide, sheet_page.name, '<p>Guide</p>', '2025-01-31'),
+                          encoding='utf-8')
+    # a portal guide whose first image is relative to the FORA page it came from
+    content = {'url': 'https://www.foratravel.com/guides/lisbon', 'content': '<p>Guide</p>',
+               'images': ['/images/lisbon/hero.jpg']}
+    portal_page = out_dir / 'sample-portal-guide.html'
+    portal_page.write_text(ContentPublisher._rebrand_content(content, guide['name'], portal_page.name,
+                                                             '2025-01-31T09:00:00'),
+                           encoding='utf-8')
+    return [sheet_page, portal_page]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate JSON-LD structured data')
+    parser.add_argument('pages', nargs='*', help='pages to check (default: every published page)')
+    parser.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true', help='re-validate every page')
+    parser.add_argument('--sample-guides', action='store_true',
+                        help='check pages rendered by the guide generators instead of the site')
+    args = parser.parse_args(argv)
+
+    if args.sample_guides:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = validate_pages(render_sample_guides(Path(tmp)), workers=1, use_cache=False)
+    else:
+        if args.pages:
+            pages = [Path(p).resolve() for p in args.pages]
+            for p in pages:
+                if not p.exists():
+                    print('Page not found:', p)
+                    sys.exit(2)
+        else:
+            pages = discover_pages(ROOT, INCLUDE, EXCLUDE)
+        results = validate_pages(pages, args.workers, not args.no_cache)
+    with_data = {rel: r for rel, r in results.items() if r['blocks']}
+    if not with_data:
+        print('No JSON-LD blocks found in', ', '.join(results) if args.pages or args.sample_guides else 'any page')
         sys.exit(3)
 
     all_ok = True
-    for i,b in enumerate(blocks,1):
-        print(f'--- JSON-LD block #{i} ---')
-        ok, msg = validate_block(b.strip())
-        if ok:
-            print('VALID:', msg)
-        else:
-            print('INVALID:', msg)
-            all_ok = False
+    for rel, r in with_data.items():
+        for i, b in enumerate(r['blocks'], 1):
+            types = ', '.join(b['types']) or '-'
+            if b['ok']:
+                print(f'VALID:   {rel} #{i} ({types})')
+            else:
+                all_ok = False
+                print(f'INVALID: {rel} #{i} ({types})')
+                for line in b['message'].splitlines():
+                    print('   ', line)
+    print(f'\n{len(with_data)} of {len(results)} page(s) have JSON-LD.')
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print('Wrote', args.json)
 
     if all_ok:
-        print('\nAll checks passed.')
+        print('All checks passed.')
         sys.exit(0)
     else:
-        print('\nOne or more checks failed.')
+        print('One or more checks failed.')
         sys.exit(4)
 
+
 if __name__ == '__main__':
     main()
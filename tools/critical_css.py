@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Critical-CSS extraction and inlining for the primary pages.
+
+The "fold" of a page is approximated statically as its first FOLD_ELEMENTS
+elements in document order (header, navigation and the hero on this site)
+plus their ancestors. Every rule in the page's stylesheets whose selectors
+match one of those elements is critical; the build (tools/build_site.py)
+inlines those rules in <head> and loads the full stylesheets without blocking
+rendering. Run this script directly for the per-page report.
+
+Usage:
+    python tools/critical_css.py                     # report for the primary pages
+    python tools/critical_css.py about.html --fold 60 --json critical.json
+"""
+from pathlib import Path
+import argparse
+import gzip
+import json
+import posixpath
+import re
+
+from css_select import Matcher, Unresolved, drop_unused_at_rules, parse_css, parse_dom, serialize, split_selectors
+from site_index import OK, shared_index
+
+ROOT = Path(__file__).resolve().parents[1]
+PRIMARY_PAGES = ['index.html', 'about.html', 'contact.html', 'families.html', 'retirees.html', 'groups.html',
+                 'how-It-works.html', 'incentives.htm', 'pickleball-passport.html', 'resources.html']
+FOLD_ELEMENTS = 80
+# Lighthouse's simulated mobile connection, used to estimate blocking time
+RTT_MS = 150
+THROUGHPUT_KBPS = 1638.4
+
+STYLESHEET_LINK_RE = re.compile(r'''<link\b[^>]*\brel\s*=\s*["']?stylesheet["']?[^>]*>''', re.I)
+HREF_RE = re.compile(r'''\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.I)
+MEDIA_RE = re.compile(r'''\bmedia\s*=\s*["']([^"']*)["']''', re.I)
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''', re.I)
+
+
+def fold_elements(elements, count=FOLD_ELEMENTS):
+    """The first count elements of <body> plus their ancestors"""
+    body = [el for el in elements if el.tag == 'body']
+    start = body[0].order + 1 if body else 0
+    fold = set(elements[start:start + count])
+    for el in list(fold):
+        p = el.parent
+        while p is not None and p.tag != '#document':
+            fold.add(p)
+            p = p.parent
+    return [el for el in elements if el in fold]
+
+
+def _critical(rules, matcher, fold, unresolved):
+    kept = []
+    for r in rules:
+        if r.kind == 'style':
+            for sel in split_selectors(r.prelude):
+                try:
+                    if matcher.matches_any(sel, fold):
+                        kept.append(r)
+                        break
+                except Unresolved:
+                    unresolved.add(sel)
+                    kept.append(r)  # better a few extra bytes than a flash of unstyled content
+                    break
+        elif r.kind == 'group':
+            children = _critical(r.children, matcher, fold, unresolved)
+            if children:
+                kept.append(type(r)('group', r.prelude, children=children))
+        elif r.kind == 'at' and (r.at_name == 'font-face' or r.at_name.endswith('keyframes')):
+            kept.append(r)  # dropped afterwards unless a kept rule uses them
+    return kept
+
+
+def critical_css(html, stylesheets, fold_count=FOLD_ELEMENTS):
+    """(critical CSS text, unresolved selectors) for a page given its stylesheets' text"""
+    root, elements = parse_dom(html)
+    matcher = Matcher(root, elements)
+    fold = fold_elements(elements, fold_count)
+    unresolved = set()
+    rules = []
+    for css in stylesheets:
+        rules.extend(_critical(parse_css(css), matcher, fold, unresolved))
+    return serialize(drop_unused_at_rules(rules)), sorted(unresolved)
+
+
+def rebase_urls(css, css_rel, page_rel):
+    """Rewrite relative url()s in a stylesheet so they work inlined in page_rel"""
+    css_dir, page_dir = posixpath.dirname(css_rel), posixpath.dirname(page_rel)
+
+    def repl(m):
+        ref = m.group(2).strip()
+        if ref.startswith(('/', 'data:', 'http:', 'https:', '//', '#')):
+            return m.group(0)
+        target = posixpath.normpath(posixpath.join(css_dir, ref))
+        return f'url({m.group(1)}{posixpath.relpath(target, page_dir or ".")}{m.group(1)})'
+    return CSS_URL_RE.sub(repl, css)
+
+
+def stylesheet_links(html):
+    """[(link tag, href)] for every render-blocking stylesheet <link>"""
+    links = []
+    for m in STYLESHEET_LINK_RE.finditer(html):
+        tag = m.group(0)
+        media = MEDIA_RE.search(tag)
+        if media and media.group(1).strip().lower() == 'print':
+            continue
+        href = HREF_RE.search(tag)
+        if href:
+            links.append((tag, next(g for g in href.groups() if g is not None)))
+    return links
+
+
+def inline_critical(html, page_rel, read_stylesheet, fold_count=FOLD_ELEMENTS):
+    """Inline the page's critical CSS and defer its stylesheets.
+
+    read_stylesheet(href, page_rel) returns (css text, stylesheet rel) or None
+    for stylesheets that cannot be read (external); those are left blocking.
+    Returns (new html, report dict)."""
+    links = []
+    for tag, href in stylesheet_links(html):
+        loaded = read_stylesheet(href, page_rel)
+        if loaded:
+            links.append((tag, href) + loaded)
+    if not links:
+        return html, None
+    css, unresolved = critical_css(html, [rebase_urls(text, rel, page_rel) for _, _, text, rel in links],
+                                   fold_count)
+    for i, (tag, href, _, _) in enumerate(links):
+        deferred = (f'<link rel="preload" href="{href}" as="style" '
+                    f'onload="this.onload=null;this.rel=\'stylesheet\'">'
+                    f'<noscript>{tag}</noscript>')
+        if i == 0:
+            deferred = f'<style id="critical-css">{css}</style>' + deferred
+        html = html.replace(tag, deferred, 1)
+    full = [text for _, _, text, _ in links]
+    return html, estimate(page_rel, css, full, unresolved)
+
+
+def _gz(text):
+    return len(gzip.compress(text.encode('utf-8')))
+
+
+def estimate(page_rel, critical, full, unresolved):
+    """Bytes and estimated render-blocking time removed for one page.
+    Blocking stylesheets cost a round trip plus their transfer before first
+    paint; inlined critical CSS only adds its own transfer to the HTML."""
+    full_gz = sum(_gz(t) for t in full)
+    crit_gz = _gz(critical) if critical else 0
+    ms_per_byte = 8 / THROUGHPUT_KBPS  # ms per byte at kbit/s
+    saved = RTT_MS + full_gz * ms_per_byte - crit_gz * ms_per_byte
+    return {'page': page_rel, 'stylesheets': len(full), 'full_bytes': sum(len(t.encode()) for t in full),
+            'full_gzip_bytes': full_gz, 'critical_bytes': len(critical.encode()), 'critical_gzip_bytes': crit_gz,
+            'estimated_ms_saved': round(max(saved, 0)), 'unresolved_selectors': unresolved}
+
+
+def read_source_stylesheet(href, page_rel):
+    status, rel = shared_index(ROOT).resolve(href, posixpath.dirname(page_rel))
+    if status != OK or not rel.lower().endswith('.css'):
+        return None
+    return (ROOT / rel).read_text(encoding='utf-8', errors='ignore'), rel
+
+
+def print_report(reports):
+    print(f"{'page':28} {'sheets':>6} {'full KB':>8} {'critical KB':>11} {'est. ms saved':>13}")
+    for r in reports:
+        print(f"{r['page']:28} {r['stylesheets']:>6} {r['full_bytes'] / 1024:>8.1f} "
+              f"{r['critical_bytes'] / 1024:>11.1f} {r['estimated_ms_saved']:>13}")
+        if r['unresolved_selectors']:
+            print(f"   kept {len(r['unresolved_selectors'])} selector(s) that could not be resolved statically, "
+                  f"e.g. {r['unresolved_selectors'][:3]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Critical-CSS report for the primary pages')
+    parser.add_argument('pages', nargs='*', help='site-relative pages (default: the primary pages)')
+    parser.add_argument('--fold', type=int, default=FOLD_ELEMENTS,
+                        help=f'elements counted as above the fold (default: {FOLD_ELEMENTS})')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    reports = []
+    for rel in args.pages or [p for p in PRIMARY_PAGES if (ROOT / p).exists()]:
+        html = (ROOT / rel).read_text(encoding='utf-8', errors='ignore')
+        _, report = inline_critical(html, rel, read_source_stylesheet, args.fold)
+        if report:
+            reports.append(report)
+    print_report(reports)
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2), encoding='utf-8')
+        print('Wrote', args.json)
+    return reports
+
+
+if __name__ == '__main__':
+    main()
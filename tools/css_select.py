@@ -0,0 +1,425 @@
+"""Static CSS parsing and selector matching against parsed pages.
+
+parse_css() splits a stylesheet into rules (style rules, grouping at-rules such
+as @media with nested rules, and opaque at-rules such as @font-face), and
+serialize() writes them back minified. parse_dom() builds a light element tree
+with html.parser, and Matcher answers "does this selector match anything on
+this page?" for the subset of selectors that can be decided statically.
+
+State pseudo-classes (:hover, :focus, :checked, ...) and pseudo-elements are
+treated as matching whenever the rest of the selector does, since the state can
+occur at runtime. Selectors that cannot be decided (:has(), unknown
+pseudo-classes, unparsable syntax) raise Unresolved so callers can keep them.
+"""
+from html.parser import HTMLParser
+import re
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+             'source', 'track', 'wbr'}
+# at-rules whose block holds more rules
+GROUPING_AT_RULES = {'media', 'supports', 'layer', 'container', 'document', '-moz-document'}
+# runtime state: may match at some point, so they never rule a selector out
+STATE_PSEUDOS = {'hover', 'focus', 'active', 'visited', 'link', 'any-link', 'focus-within', 'focus-visible',
+                 'target', 'checked', 'disabled', 'enabled', 'invalid', 'valid', 'required', 'optional',
+                 'placeholder-shown', 'default', 'indeterminate', 'read-only', 'read-write', 'autofill',
+                 '-webkit-autofill', 'in-range', 'out-of-range', 'user-invalid', 'user-valid', 'playing',
+                 'paused', 'fullscreen', 'popover-open', 'modal', 'open', 'closed', 'defined', 'scope'}
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+ANIMATION_RE = re.compile(r'animation(?:-name)?\s*:([^;]+)', re.I)
+FONT_FAMILY_RE = re.compile(r'font(?:-family)?\s*:([^;]+)', re.I)
+
+
+class Unresolved(Exception):
+    """A selector the static matcher cannot decide"""
+
+
+# -- stylesheet ------------------------------------------------------------------
+
+class Rule:
+    """kind is 'style' (prelude = selector list, body = declarations), 'group'
+    (@media etc. with children), 'at' (opaque block such as @font-face or
+    @keyframes) or 'statement' (@import/@charset, no block)"""
+
+    def __init__(self, kind, prelude, body='', children=None):
+        self.kind = kind
+        self.prelude = prelude
+        self.body = body
+        self.children = children or []
+
+    @property
+    def at_name(self):
+        return self.prelude[1:].split(None, 1)[0].lower() if self.prelude.startswith('@') else ''
+
+
+def _find_block_end(css, start):
+    """Index of the '}' closing the block opened just before start"""
+    depth, i, n = 1, start, len(css)
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and css[j] != c:
+                j += 2 if css[j] == '\\' else 1
+            i = j + 1
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return n
+
+
+def parse_css(css):
+    css = COMMENT_RE.sub('', css)
+    rules, i, n = [], 0, len(css)
+    while i < n:
+        while i < n and (css[i].isspace() or css[i] == ';'):
+            i += 1
+        if i >= n:
+            break
+        # prelude runs to the first '{' or (for statements) ';' outside strings
+        j = i
+        while j < n and css[j] not in '{;':
+            if css[j] in '"\'':
+                q, j = css[j], j + 1
+                while j < n and css[j] != q:
+                    j += 2 if css[j] == '\\' else 1
+            j += 1
+        prelude = ' '.join(css[i:j].split())
+        if j >= n or css[j] == ';':
+            if prelude:
+                rules.append(Rule('statement', prelude))
+            i = j + 1
+            continue
+        end = _find_block_end(css, j + 1)
+        body = css[j + 1:end]
+        if prelude.startswith('@'):
+            name = prelude[1:].split(None, 1)[0].lower() if len(prelude) > 1 else ''
+            if name in GROUPING_AT_RULES:
+                rules.append(Rule('group', prelude, children=parse_css(body)))
+            else:
+                rules.append(Rule('at', prelude, ' '.join(body.split())))
+        else:
+            rules.append(Rule('style', prelude, ' '.join(body.split())))
+        i = end + 1
+    return rules
+
+
+def serialize(rules):
+    out = []
+    for r in rules:
+        if r.kind == 'statement':
+            out.append(r.prelude + ';')
+        elif r.kind == 'group':
+            inner = serialize(r.children)
+            if inner:
+                out.append(f'{r.prelude}{{{inner}}}')
+        else:
+            out.append(f'{r.prelude}{{{r.body}}}')
+    return ''.join(out)
+
+
+def walk_style_rules(rules):
+    for r in rules:
+        if r.kind == 'style':
+            yield r
+        elif r.kind == 'group':
+            yield from walk_style_rules(r.children)
+
+
+def drop_unused_at_rules(rules):
+    """Remove @keyframes and @font-face blocks no remaining style rule refers to"""
+    bodies = ' '.join(r.body for r in walk_style_rules(rules))
+    animations = {w for m in ANIMATION_RE.finditer(bodies) for w in re.findall(r'[\w-]+', m.group(1))}
+    fonts = ' '.join(m.group(1).lower() for m in FONT_FAMILY_RE.finditer(bodies))  # also covers the font: shorthand
+
+    def keep(r):
+        if r.kind != 'at':
+            return True
+        if r.at_name.endswith('keyframes'):
+            return r.prelude.split(None, 1)[-1].strip() in animations
+        if r.at_name == 'font-face':
+            family = FONT_FAMILY_RE.search(r.body)
+            return not family or family.group(1).strip().strip('"\'').lower() in fonts
+        return True
+
+    def walk(rules):
+        out = []
+        for r in rules:
+            if r.kind == 'group':
+                r = Rule('group', r.prelude, children=walk(r.children))
+            if keep(r):
+                out.append(r)
+        return out
+    return walk(rules)
+
+
+def split_selectors(prelude):
+    """Split a selector list on top-level commas"""
+    parts, depth, cur = [], 0, []
+    for c in prelude:
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        if c == ',' and depth == 0:
+            parts.append(''.join(cur).strip())
+            cur = []
+        else:
+            cur.append(c)
+    parts.append(''.join(cur).strip())
+    return [p for p in parts if p]
+
+
+# -- page DOM --------------------------------------------------------------------
+
+class Element:
+    __slots__ = ('tag', 'attrs', 'id', 'classes', 'parent', 'children', 'order')
+
+    def __init__(self, tag, attrs, parent, order):
+        self.tag = tag
+        self.attrs = attrs
+        self.id = attrs.get('id')
+        self.classes = set((attrs.get('class') or '').split())
+        self.parent = parent
+        self.children = []
+        self.order = order
+
+
+class _DomBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element('#document', {}, None, -1)
+        self.stack = [self.root]
+        self.elements = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v if v is not None else '') for k, v in attrs}
+        el = Element(tag, attrs, self.stack[-1], len(self.elements))
+        self.stack[-1].children.append(el)
+        self.elements.append(el)
+        if tag not in VOID_TAGS:
+            self.stack.append(el)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        for k in range(len(self.stack) - 1, 0, -1):
+            if self.stack[k].tag == tag:
+                del self.stack[k:]
+                return
+
+
+def parse_dom(html):
+    """(document root, elements in document order)"""
+    builder = _DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root, builder.elements
+
+
+# -- selectors -------------------------------------------------------------------
+
+COMPOUND_TOKEN_RE = re.compile(r'''
+    (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \#(?P<id>(?:[\w-]|\\.)+)
+  | \.(?P<cls>(?:[\w-]|\\.)+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<val>"[^"]*"|'[^']*'|[^\]\s]+)\s*(?P<flag>[iIsS])?\s*)?\]
+  | (?P<pseudo>::?[\w-]+)(?P<args>\((?:[^()]|\([^()]*\))*\))?
+''', re.X)
+COMBINATOR_RE = re.compile(r'\s*([>+~])\s*|\s+')
+
+
+def _unescape(ident):
+    return re.sub(r'\\(.)', r'\1', ident)
+
+
+def parse_selector(selector):
+    """[(combinator, compound), ...] left to right; the first combinator is None.
+    A compound is a list of (kind, value...) tuples."""
+    parts, pos, comb, n = [], 0, None, len(selector)
+    selector = selector.strip()
+    n = len(selector)
+    while pos < n:
+        compound = []
+        while pos < n:
+            m = COMPOUND_TOKEN_RE.match(selector, pos)
+            if not m or m.end() == pos:
+                break
+            if m.group('tag'):
+                compound.append(('tag', m.group('tag').lower()))
+            elif m.group('id'):
+                compound.append(('id', _unescape(m.group('id'))))
+            elif m.group('cls'):
+                compound.append(('class', _unescape(m.group('cls'))))
+            elif m.group('attr'):
+                val = m.group('val')
+                if val and val[0] in '"\'':
+                    val = val[1:-1]
+                compound.append(('attr', m.group('attr').lower(), m.group('op'), val, bool(m.group('flag'))))
+            else:
+                args = m.group('args')
+                compound.append(('pseudo', m.group('pseudo').lower(), args[1:-1].strip() if args else None))
+            pos = m.end()
+        if not compound:
+            raise Unresolved(f'cannot parse selector: {selector}')
+        parts.append((comb, compound))
+        if pos >= n:
+            break
+        m = COMBINATOR_RE.match(selector, pos)
+        if not m or m.end() == pos:
+            raise Unresolved(f'cannot parse selector: {selector}')
+        comb = (m.group(1) or ' ')
+        pos = m.end()
+    if not parts:
+        raise Unresolved(f'empty selector: {selector!r}')
+    return parts
+
+
+def _nth(expr, index):
+    """Whether 1-based index satisfies an an+b expression"""
+    expr = expr.replace(' ', '').lower().split('of')[0]
+    if expr == 'odd':
+        a, b = 2, 1
+    elif expr == 'even':
+        a, b = 2, 0
+    elif 'n' in expr:
+        a_s, b_s = expr.split('n', 1)
+        a = -1 if a_s == '-' else 1 if a_s in ('', '+') else int(a_s)
+        b = int(b_s) if b_s else 0
+    else:
+        return index == int(expr)
+    if a == 0:
+        return index == b
+    return (index - b) % a == 0 and (index - b) // a >= 0
+
+
+def _siblings(el):
+    return [c for c in el.parent.children] if el.parent else [el]
+
+
+class Matcher:
+    """Selector matching against one page's elements, with memoised results"""
+
+    def __init__(self, root, elements):
+        self.root = root
+        self.elements = elements
+        self._parsed = {}
+
+    def parsed(self, selector):
+        if selector not in self._parsed:
+            try:
+                self._parsed[selector] = parse_selector(selector)
+            except Unresolved as e:
+                self._parsed[selector] = e
+        result = self._parsed[selector]
+        if isinstance(result, Unresolved):
+            raise result
+        return result
+
+    def matches_any(self, selector, elements=None):
+        """Whether selector matches at least one of elements (default: the whole page)"""
+        parts = self.parsed(selector)
+        return any(self._match(parts, len(parts) - 1, el) for el in (elements or self.elements))
+
+    def _match(self, parts, i, el):
+        comb, compound = parts[i]
+        if not self._compound(compound, el):
+            return False
+        if i == 0:
+            return True
+        prev_comb = comb
+        if prev_comb == '>':
+            return el.parent is not None and el.parent.tag != '#document' and self._match(parts, i - 1, el.parent)
+        if prev_comb == ' ':
+            p = el.parent
+            while p is not None and p.tag != '#document':
+                if self._match(parts, i - 1, p):
+                    return True
+                p = p.parent
+            return False
+        sibs = _siblings(el)
+        k = sibs.index(el)
+        if prev_comb == '+':
+            return k > 0 and self._match(parts, i - 1, sibs[k - 1])
+        return any(self._match(parts, i - 1, s) for s in sibs[:k])
+
+    def _compound(self, compound, el):
+        for token in compound:
+            kind = token[0]
+            if kind == 'tag':
+                if token[1] != '*' and token[1] != el.tag:
+                    return False
+            elif kind == 'id':
+                if el.id != token[1]:
+                    return False
+            elif kind == 'class':
+                if token[1] not in el.classes:
+                    return False
+            elif kind == 'attr':
+                if not self._attr(token, el):
+                    return False
+            elif not self._pseudo(token[1], token[2], el):
+                return False
+        return True
+
+    @staticmethod
+    def _attr(token, el):
+        _, name, op, val, insensitive = token
+        if name not in el.attrs:
+            return False
+        if op is None:
+            return True
+        actual = el.attrs[name]
+        if insensitive:
+            actual, val = actual.lower(), val.lower()
+        if op == '=':
+            return actual == val
+        if op == '~=':
+            return val in actual.split()
+        if op == '|=':
+            return actual == val or actual.startswith(val + '-')
+        if op == '^=':
+            return bool(val) and actual.startswith(val)
+        if op == '$=':
+            return bool(val) and actual.endswith(val)
+        return bool(val) and val in actual
+
+    def _pseudo(self, name, args, el):
+        bare = name.lstrip(':')
+        if name.startswith('::') or bare in ('before', 'after', 'first-line', 'first-letter', 'selection',
+                                              'placeholder', 'marker', 'backdrop', 'file-selector-button') \
+                or bare.startswith('-webkit-') or bare.startswith('-moz-') or bare.startswith('-ms-'):
+            return True  # pseudo-elements style part of the element
+        if bare in STATE_PSEUDOS:
+            return True
+        if bare == 'root':
+            return el.tag == 'html'
+        if bare in ('not', 'is', 'where', 'matches', '-webkit-any') and args is not None:
+            hit = any(self._match(self.parsed(s), len(self.parsed(s)) - 1, el) for s in split_selectors(args))
+            return not hit if bare == 'not' else hit
+        if bare == 'empty':
+            return not el.children
+        sibs = [s for s in _siblings(el)]
+        if bare in ('first-child', 'last-child', 'only-child'):
+            return {'first-child': sibs[0] is el, 'last-child': sibs[-1] is el,
+                    'only-child': len(sibs) == 1}[bare]
+        typed = [s for s in sibs if s.tag == el.tag]
+        if bare in ('first-of-type', 'last-of-type', 'only-of-type'):
+            return {'first-of-type': typed[0] is el, 'last-of-type': typed[-1] is el,
+                    'only-of-type': len(typed) == 1}[bare]
+        if bare in ('nth-child', 'nth-last-child', 'nth-of-type', 'nth-last-of-type') and args:
+            group = typed if 'type' in bare else sibs
+            if 'last' in bare:
+                group = group[::-1]
+            try:
+                return _nth(args, group.index(el) + 1)
+            except ValueError:
+                raise Unresolved(f'cannot parse :{bare}({args})')
+        raise Unresolved(f'unsupported pseudo-class :{bare}')
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""Single-pass HTML audit engine.
+
+Each page is tokenized once with html.parser and every enabled check sees the
+same stream of start tags, end tags and text. Checks are small visitor classes
+registered in CHECKS; pages are audited in parallel and reported as text or JSON.
+
+Per-page results are cached in tools/.html-audit-cache.json keyed by the
+page's content hash and each check's version, so a re-run only parses pages
+that changed.
+
+Usage:
+    python tools/html_audit.py                      # every published page, all checks
+    python tools/html_audit.py index.html --checks images,meta,headings
+    python tools/html_audit.py --json audit.json --text audit.txt
+"""
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import unquote
+import argparse
+import hashlib
+import json
+import os
+
+from site_index import CASE_MISMATCH, MISSING, shared_index
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_FILE = ROOT / 'tools' / '.html-audit-cache.json'
+INCLUDE = ['*.html', '*.htm']
+# saved captures, backups and reports that are not part of the published site
+EXCLUDE = ['.git/*', 'node_modules/*', 'dist/*', '*.bak', '*_files/*', '*.original.html', 'inspiration_pages/*',
+           'previews/*', 'lighthouse-*', 'pa11y-*', 'localhost_*', 'live-seal-home.html']
+
+
+class Check:
+    """A visitor over one page's token stream.
+
+    Subclasses override the handlers they need, then summarize in result()
+    (JSON-serializable) and turn that summary into readable issues().
+    """
+    name = ''
+    # bump when a check's logic changes so cached results are recomputed
+    version = 1
+
+    def start(self, tag, attrs):
+        pass
+
+    def end(self, tag):
+        pass
+
+    def data(self, text):
+        pass
+
+    def result(self, page: Path) -> dict:
+        return {}
+
+    @staticmethod
+    def finish(result, page: Path) -> dict:
+        """Add anything that depends on the site rather than the page's own
+        bytes; runs after the cache, so result() must stay content-only"""
+        return result
+
+    @staticmethod
+    def issues(result) -> list:
+        return []
+
+
+class ImagesCheck(Check):
+    name = 'images'
+
+    def __init__(self):
+        self.imgs = []  # tuples (src, alt)
+
+    def start(self, tag, attrs):
+        if tag == 'img':
+            self.imgs.append((attrs.get('src') or '', attrs.get('alt')))
+
+    def result(self, page):
+        return {
+            'img_count': len(self.imgs),
+            'missing_alt': [src for src, alt in self.imgs if alt is None],
+            'empty_alt': [src for src, alt in self.imgs if alt is not None and alt.strip() == ''],
+            'srcs': [src for src, _ in self.imgs if src],
+        }
+
+    @staticmethod
+    def issues(r):
+        missing = r['missing_alt'] + r['empty_alt']
+        if missing:
+            return [f'Images missing alt text: {len(missing)} (examples: {missing[:5]})']
+        return []
+
+
+class MetaCheck(Check):
+    name = 'meta'
+    version = 3
+
+    def __init__(self):
+        self.html_lang = None
+        self.title = ''
+        self.in_title = False
+        self.meta_description = None
+
+    def start(self, tag, attrs):
+        if tag == 'html':
+            self.html_lang = attrs.get('lang')
+        elif tag == 'title':
+            self.in_title = True
+        elif tag == 'meta' and (attrs.get('name') or '').lower() == 'description':
+            self.meta_description = attrs.get('content')
+
+    def end(self, tag):
+        if tag == 'title':
+            self.in_title = False
+
+    def data(self, text):
+        if self.in_title:
+            self.title += text.strip()
+
+    def result(self, page):
+        return {
+            'lang': self.html_lang,
+            'title': self.title,
+            'has_meta_description': bool((self.meta_description or '').strip()),
+        }
+
+    @staticmethod
+    def issues(r):
+        issues = []
+        if not r['lang']:
+            issues.append('Missing lang attribute on <html>')
+        if not r['title']:
+            issues.append('Missing or empty <title>')
+        if not r['has_meta_description']:
+            issues.append('Missing meta description')
+        return issues
+
+
+class CanonicalCheck(Check):
+    """SEO rather than accessibility, so it is in LIGHT_CHECKS but not A11Y_CHECKS"""
+    name = 'canonical'
+
+    def __init__(self):
+        self.canonical = None
+
+    def start(self, tag, attrs):
+        if tag == 'link' and 'canonical' in (attrs.get('rel') or '').lower().split():
+            self.canonical = attrs.get('href')
+
+    def result(self, page):
+        return {'has_canonical': self.canonical is not None}
+
+    @staticmethod
+    def issues(r):
+        return [] if r['has_canonical'] else ['Missing canonical link']
+
+
+class HeadingsCheck(Check):
+    name = 'headings'
+
+    def __init__(self):
+        self.h1_count = 0
+
+    def start(self, tag, attrs):
+        if tag == 'h1':
+            self.h1_count += 1
+
+    def result(self, page):
+        return {'h1_count': self.h1_count}
+
+    @staticmethod
+    def issues(r):
+        if r['h1_count'] == 0:
+            return ['No <h1> found']
+        if r['h1_count'] > 1:
+            return [f"Multiple <h1> elements found ({r['h1_count']}) — consider using a single H1"]
+        return []
+
+
+class LabelsCheck(Check):
+    name = 'labels'
+
+    def __init__(self):
+        self.inputs = []  # tuples (type, id, name, in_label)
+        self.labels_for = set()
+        self.in_label = False
+
+    def start(self, tag, attrs):
+        if tag == 'label':
+            self.in_label = True
+            if attrs.get('for'):
+                self.labels_for.add(attrs['for'])
+        elif tag == 'input':
+            self.inputs.append(((attrs.get('type') or '').lower(), attrs.get('id'), attrs.get('name'), self.in_label))
+
+    def end(self, tag):
+        if tag == 'label':
+            self.in_label = False
+
+    def result(self, page):
+        unlabeled = [[itype, iid, iname] for itype, iid, iname, in_label in self.inputs
+                     if itype not in ('hidden', 'submit', 'button')
+                     and not in_label and not (iid and iid in self.labels_for)]
+        return {'input_count': len(self.inputs), 'unlabeled_inputs': unlabeled}
+
+    @staticmethod
+    def issues(r):
+        u = r['unlabeled_inputs']
+        if u:
+            return [f'Form inputs without labels or associated label: {len(u)} (examples: {u[:5]})']
+        return []
+
+
+class LinksCheck(Check):
+    name = 'links'
+
+    def __init__(self):
+        self.anchors = []
+        self.current = None
+
+    def start(self, tag, attrs):
+        if tag == 'a':
+            self.current = {'href': attrs.get('href') or '', 'text': '', 'aria': attrs.get('aria-label')}
+        elif tag == 'img' and self.current is not None and (attrs.get('alt') or '').strip():
+            # an image with alt text names the link
+            self.current['text'] += attrs['alt']
+
+    def end(self, tag):
+        if tag == 'a' and self.current is not None:
+            self.anchors.append(self.current)
+            self.current = None
+
+    def data(self, text):
+        if self.current is not None:
+            self.current['text'] += text
+
+    def result(self, page):
+        return {'anchors_without_text': [a['href'] for a in self.anchors if not a['text'].strip() and not a['aria']]}
+
+    @staticmethod
+    def issues(r):
+        a = r['anchors_without_text']
+        if a:
+            return [f'Links with no text or aria-label: {len(a)} (examples: {a[:5]})']
+        return []
+
+
+class LandmarksCheck(Check):
+    name = 'landmarks'
+    LANDMARKS = ('header', 'nav', 'main', 'footer')
+
+    def __init__(self):
+        self.seen = set()
+        self.buttons = []
+
+    def start(self, tag, attrs):
+        if tag in self.LANDMARKS:
+            self.seen.add(tag)
+        elif tag == 'button':
+            self.buttons.append(attrs)
+
+    def result(self, page):
+        nav_toggle = []
+        for b in self.buttons:
+            if 'nav-toggle' in (b.get('class') or '') or 'nav' in (b.get('id') or '').lower():
+                for attr in ('aria-controls', 'aria-expanded'):
+                    if attr not in b:
+                        nav_toggle.append(f'nav toggle missing {attr}')
+        return {'landmarks': sorted(self.seen), 'nav_toggle_issues': nav_toggle}
+
+    @staticmethod
+    def issues(r):
+        issues = []
+        missing = [t for t in ('header', 'main', 'footer') if t not in r['landmarks']]
+        if missing:
+            issues.append('Missing semantic landmark elements: ' + ', '.join(missing))
+        return issues + r['nav_toggle_issues']
+
+
+class MissingFilesCheck(ImagesCheck):
+    """Local <img> sources that do not exist in the site tree, or only with different case"""
+    name = 'files'
+
+    def result(self, page):
+        refs = [src for src, _ in self.imgs
+                if src and not src.startswith(('http://', 'https://', '//', 'data:'))]
+        return {'refs': refs}
+
+    @staticmethod
+    def finish(result, page):
+        index = shared_index(ROOT)
+        try:
+            from_dir = page.resolve().parent.relative_to(index.root).as_posix()
+        except ValueError:
+            from_dir = None
+        missing, mismatched = [], []
+        for src in result['refs']:
+            if from_dir is None:
+                # page outside the site: fall back to the filesystem
+                path = unquote(src.split('#')[0].split('?')[0])
+                if not (page.parent / path).resolve().exists():
+                    missing.append(src)
+                continue
+            status, rel = index.resolve(src, '' if from_dir == '.' else from_dir)
+            if status == MISSING:
+                missing.append(src)
+            elif status == CASE_MISMATCH:
+                mismatched.append([src, rel])
+        return dict(result, missing_files=missing, case_mismatch=mismatched)
+
+    @staticmethod
+    def issues(r):
+        return ([f'Missing image file: {m}' for m in r['missing_files']] +
+                [f'Image path case does not match the file ({actual}): {src}' for src, actual in r['case_mismatch']])
+
+
+CHECKS = {c.name: c for c in (ImagesCheck, MetaCheck, CanonicalCheck, HeadingsCheck, LabelsCheck, LinksCheck,
+                              LandmarksCheck, MissingFilesCheck)}
+# the checks the original light_audit scripts ran
+LIGHT_CHECKS = ['images', 'meta', 'canonical', 'headings', 'files']
+A11Y_CHECKS = ['meta', 'headings', 'images', 'labels', 'links', 'landmarks']
+
+
+class AuditParser(HTMLParser):
+    """Feeds one tokenization of a page to every check"""
+
+    def __init__(self, checks):
+        super().__init__(convert_charrefs=True)
+        self.checks = checks
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for c in self.checks:
+            c.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        for c in self.checks:
+            c.end(tag)
+
+    def handle_data(self, data):
+        for c in self.checks:
+            c.data(data)
+
+
+def check_key(name):
+    return f'{name}@{CHECKS[name].version}'
+
+
+def parse_page(text, page: Path, check_names=None):
+    """Content-only results of the named checks (default: all) for one page's HTML"""
+    checks = [CHECKS[n]() for n in (check_names or CHECKS)]
+    parser = AuditParser(checks)
+    parser.feed(text)
+    parser.close()
+    return {c.name: c.result(page) for c in checks}
+
+
+def finish_page(rel, page: Path, results):
+    """Site-dependent results and issues on top of (possibly cached) check results"""
+    checks = {name: CHECKS[name].finish(r, page) for name, r in results.items()}
+    issues = [issue for name, r in checks.items() for issue in CHECKS[name].issues(r)]
+    return {'file': rel, 'checks': checks, 'issues': issues}
+
+
+def audit_text(text, page: Path, check_names=None):
+    """Run the named checks (default: all) over one page's HTML"""
+    return finish_page(rel_name(page), page, parse_page(text, page, check_names))
+
+
+def _parse_file(page: Path, check_names):
+    data = page.read_bytes()
+    text = data.decode('utf-8', errors='ignore')
+    return hashlib.sha256(data).hexdigest(), parse_page(text, page, check_names)
+
+
+def audit_file(page: Path, check_names=None):
+    _, results = _parse_file(page, check_names)
+    return finish_page(rel_name(page), page, results)
+
+
+def rel_name(page: Path):
+    try:
+        return page.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return str(page)
+
+
+class AuditCache:
+    """Per-page check results keyed by content hash and check version.
+
+    Entries also keep size/mtime so unchanged pages are recognised from a stat
+    alone; a touched-but-identical page is recognised by its hash.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or CACHE_FILE)
+        try:
+            self.pages = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.pages = {}
+        self.dirty = False
+
+    def lookup(self, rel, page: Path, check_names):
+        entry = self.pages.get(rel)
+        if not entry:
+            return None
+        st = page.stat()
+        if (entry['size'], entry['mtime_ns']) != (st.st_size, st.st_mtime_ns):
+            digest = hashlib.sha256(page.read_bytes()).hexdigest()
+            if digest != entry['digest']:
+                return None
+            entry['size'], entry['mtime_ns'] = st.st_size, st.st_mtime_ns
+            self.dirty = True
+        keys = [check_key(n) for n in check_names]
+        if not all(k in entry['checks'] for k in keys):
+            return None
+        return {n: entry['checks'][k] for n, k in zip(check_names, keys)}
+
+    def store(self, rel, page: Path, digest, results):
+        st = page.stat()
+        entry = self.pages.get(rel)
+        if not entry or entry['digest'] != digest:
+            entry = self.pages[rel] = {'digest': digest, 'checks': {}}
+        entry['size'], entry['mtime_ns'] = st.st_size, st.st_mtime_ns
+        entry['checks'].update({check_key(n): r for n, r in results.items()})
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps(self.pages, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def audit_files(pages, check_names=None, workers=None, cache=None):
+    """Audit pages across a process pool; results come back in input order.
+
+    With a cache, only pages whose content (or the check set) changed are parsed.
+    """
+    pages = list(pages)
+    check_names = list(check_names or CHECKS)
+    rels = [rel_name(p) for p in pages]
+    parsed = {}
+    todo = []
+    for rel, page in zip(rels, pages):
+        hit = cache.lookup(rel, page, check_names) if cache else None
+        if hit is not None:
+            parsed[rel] = hit
+        else:
+            todo.append(page)
+    if len(todo) < 2 or workers == 1:
+        fresh = [_parse_file(p, check_names) for p in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(_parse_file, todo, [check_names] * len(todo), chunksize=8))
+    for page, (digest, results) in zip(todo, fresh):
+        rel = rel_name(page)
+        parsed[rel] = results
+        if cache:
+            cache.store(rel, page, digest, results)
+    if cache:
+        cache.save()
+    return [finish_page(rel, page, parsed[rel]) for rel, page in zip(rels, pages)]
+
+
+def discover_pages(root=ROOT, include=INCLUDE, exclude=EXCLUDE):
+    """Pages under root matching an include glob and no exclude glob (site-relative paths)"""
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        prefix = '' if rel_dir == '.' else rel_dir + '/'
+        dirnames[:] = sorted(d for d in dirnames if not any(fnmatch(prefix + d + '/', pat) for pat in exclude))
+        for name in filenames:
+            rel = prefix + name
+            if any(fnmatch(name, pat) or fnmatch(rel, pat) for pat in include) \
+                    and not any(fnmatch(rel, pat) for pat in exclude):
+                pages.append(Path(dirpath) / name)
+    return sorted(pages)
+
+
+def text_report(results, base=ROOT):
+    out = ['Lightweight HTML Audit Report', f'Base: {base}', f'Files scanned: {len(results)}', '']
+    missing_total = set()
+    for r in results:
+        c = r['checks']
+        fields = []
+        if 'images' in c:
+            fields += [f"imgs={c['images']['img_count']}", f"missing_alt={len(c['images']['missing_alt'])}",
+                       f"empty_alt={len(c['images']['empty_alt'])}"]
+        if 'headings' in c:
+            fields.append(f"h1={c['headings']['h1_count']}")
+        if 'meta' in c:
+            fields.append(f"meta_desc={c['meta']['has_meta_description']}")
+        if 'canonical' in c:
+            fields.append(f"canonical={c['canonical']['has_canonical']}")
+        out.append(f"- {r['file']}: " + ', '.join(fields))
+        for m in c.get('files', {}).get('missing_files', []):
+            out.append('   MISSING IMAGE FILE: ' + m)
+            missing_total.add(m)
+        for src, actual in c.get('files', {}).get('case_mismatch', []):
+            out.append(f'   CASE MISMATCH: {src} (file is {actual}; 404 on Linux hosting)')
+        for name in c:
+            if name in ('images', 'headings', 'meta', 'canonical', 'files'):
+                continue
+            for issue in CHECKS[name].issues(c[name]):
+                out.append('   ISSUE: ' + issue)
+    if any('files' in r['checks'] for r in results):
+        out.append('')
+        out.append(f'Total distinct missing referenced image paths: {len(missing_total)}')
+        out.extend(' - ' + m for m in sorted(missing_total))
+    return '\n'.join(out)
+
+
+def json_report(results, base=ROOT):
+    return json.dumps({'base': str(base), 'files_scanned': len(results), 'files': results}, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Single-pass HTML audit')
+    parser.add_argument('pages', nargs='*', help='pages to audit (default: every published page under the site root)')
+    parser.add_argument('--checks', default=','.join(CHECKS),
+                        help=f"comma-separated checks to run ({', '.join(CHECKS)})")
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help=f"only scan pages matching this glob (repeatable; default: {' '.join(INCLUDE)})")
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='also skip pages matching this glob (repeatable)')
+    parser.add_argument('--all-files', action='store_true',
+                        help='do not apply the default excludes (backups, _files captures, reports)')
+    parser.add_argument('--no-cache', action='store_true', help='re-check every page and leave the cache alone')
+    parser.add_argument('--text', metavar='PATH', help='write the text report here instead of printing it')
+    parser.add_argument('--json', metavar='PATH', help='also write a JSON report')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+    args.checks = [c.strip() for c in args.checks.split(',') if c.strip()]
+    unknown = [c for c in args.checks if c not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.pages:
+        pages = [Path(p).resolve() for p in args.pages]
+    else:
+        exclude = ([] if args.all_files else EXCLUDE) + args.exclude
+        pages = discover_pages(ROOT, args.include or INCLUDE, exclude)
+    cache = None if args.no_cache else AuditCache()
+    results = audit_files(pages, args.checks, args.workers, cache)
+    report = text_report(results)
+    if args.text:
+        Path(args.text).write_text(report, encoding='utf-8')
+        print('Wrote report to', args.text)
+    else:
+        print(report)
+    if args.json:
+        Path(args.json).write_text(json_report(results), encoding='utf-8')
+        print('Wrote JSON report to', args.json)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Conservative HTML, CSS and JS minifiers (standard library only).
+
+Each one only removes comments and collapses whitespace, tracking strings,
+template literals and regex literals so their contents are never touched.
+Nothing is renamed or reordered.
+"""
+import json
+import re
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_STRING_RE = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*\'''', re.S)
+CSS_PUNCT_RE = re.compile(r'\s*([{};,>~])\s*')
+# characters after which a '/' starts a regex literal rather than a division
+JS_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw')
+
+
+def _split_strings(text, pattern):
+    """[(is_string, chunk), ...] so string literals can be passed through untouched"""
+    parts, pos = [], 0
+    for m in pattern.finditer(text):
+        parts.append((False, text[pos:m.start()]))
+        parts.append((True, m.group(0)))
+        pos = m.end()
+    parts.append((False, text[pos:]))
+    return parts
+
+
+def minify_css(css):
+    out = []
+    for is_string, chunk in _split_strings(css, CSS_STRING_RE):
+        if is_string:
+            out.append(chunk)
+            continue
+        chunk = CSS_COMMENT_RE.sub('', chunk)
+        chunk = re.sub(r'[ \t\r\n\f]+', ' ', chunk)
+        chunk = CSS_PUNCT_RE.sub(r'\1', chunk)
+        # 'a :hover' differs from 'a:hover', so only the space after ':' goes
+        chunk = re.sub(r':\s+', ':', chunk)
+        chunk = chunk.replace(';}', '}')
+        out.append(chunk)
+    return ''.join(out).strip()
+
+
+def _is_word(c):
+    return c.isalnum() or c in '_$'
+
+
+def _space_needed(prev, nxt):
+    """Whether a space between two tokens is significant: 'var x', 'a + +b', '1 .toFixed'"""
+    return ((_is_word(prev) and _is_word(nxt)) or (prev in '+-' and nxt in '+-')
+            or (prev.isdigit() and nxt == '.') or (prev == '/' and nxt == '/'))
+
+
+def minify_js(js):
+    """Drop comments and collapse whitespace outside string, template and regex literals.
+    Newlines are kept (one per run) so automatic semicolon insertion is unaffected."""
+    out = []
+    i, n = 0, len(js)
+    last = ''  # last significant character emitted
+    word = ''  # last identifier emitted
+    pending_ws = ''
+    while i < n:
+        c = js[i]
+        if c in ' \t\r\n\f\v':
+            j = i
+            while j < n and js[j] in ' \t\r\n\f\v':
+                j += 1
+            pending_ws = '\n' if '\n' in js[i:j] or pending_ws == '\n' else (pending_ws or ' ')
+            i = j
+            continue
+        if c == '/' and i + 1 < n and js[i + 1] == '/':
+            j = js.find('\n', i)
+            i = n if j == -1 else j
+            continue
+        if c == '/' and i + 1 < n and js[i + 1] == '*':
+            j = js.find('*/', i + 2)
+            had_newline = '\n' in js[i:j if j != -1 else n]
+            i = n if j == -1 else j + 2
+            pending_ws = '\n' if had_newline or pending_ws == '\n' else (pending_ws or ' ')
+            continue
+        if pending_ws:
+            if out and (pending_ws == '\n' or _space_needed(out[-1][-1], c)):
+                out.append(pending_ws)
+            pending_ws = ''
+        if c in '"\'`':
+            j = i + 1
+            while j < n and js[j] != c:
+                j += 2 if js[j] == '\\' else 1
+            out.append(js[i:j + 1])
+            i = j + 1
+            last, word = c, ''
+            continue
+        if c == '/' and (not last or last in JS_REGEX_PREFIX or word in JS_REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and js[j] != '\n':
+                if js[j] == '\\':
+                    j += 2
+                    continue
+                if js[j] == '[':
+                    in_class = True
+                elif js[j] == ']':
+                    in_class = False
+                elif js[j] == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (js[j].isalnum() or js[j] == '_'):
+                j += 1  # flags
+            out.append(js[i:j])
+            i = j
+            last, word = '/', ''
+            continue
+        if c.isalnum() or c in '_$':
+            j = i
+            while j < n and (js[j].isalnum() or js[j] in '_$'):
+                j += 1
+            word = js[i:j]
+            out.append(word)
+            last = word[-1]
+            i = j
+            continue
+        out.append(c)
+        last, word = c, ''
+        i += 1
+    return ''.join(out).strip()
+
+
+HTML_RAW_RE = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.I | re.S)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.S)
+SCRIPT_TYPE_RE = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]+)''', re.I)
+
+
+def _minify_text(html):
+    html = HTML_COMMENT_RE.sub('', html)
+    # not \s: a literal no-break space is content
+    return re.sub(r'[ \t\r\n\f]+', ' ', html)
+
+
+def minify_html(html, css=minify_css, js=minify_js):
+    """Collapse whitespace and drop comments; <pre>/<textarea> are kept verbatim and
+    inline <style>/<script> go through the CSS/JS minifiers (JSON-LD is compacted)"""
+    out, pos = [], 0
+    for m in HTML_RAW_RE.finditer(html):
+        out.append(_minify_text(html[pos:m.start()]))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == 'style':
+            body = css(body)
+        elif tag == 'script':
+            t = SCRIPT_TYPE_RE.search(open_tag)
+            kind = t.group(1).lower() if t else 'text/javascript'
+            if kind in ('application/ld+json', 'application/json'):
+                try:
+                    body = json.dumps(json.loads(body), separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+                except ValueError:
+                    pass
+            elif 'javascript' in kind or kind == 'module':
+                body = js(body)
+        out.append(_minify_text(open_tag) + body + close_tag)
+        pos = m.end()
+    out.append(_minify_text(html[pos:]))
+    return ''.join(out).strip()
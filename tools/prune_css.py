@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Remove stylesheet rules that no published page can match.
+
+Each stylesheet under css/ is matched against the DOM of every published page
+that loads it (per tools/ref_graph.py), plus the markup of the travel-guide
+generators (fora_*.py), so styles for guides published later are kept too.
+A rule survives when one of its selectors
+- matches an element on one of those pages,
+- names a class, id or attribute that scripts change at runtime (ALLOWLIST
+  plus classList/setAttribute calls and class="..."/className values in markup
+  the published scripts, external or inline, build as strings), or
+- cannot be decided statically; those are listed in the report.
+
+tools/build_site.py ships the pruned stylesheets. Run this script directly for
+the report, or with --out to write the pruned files somewhere to inspect.
+
+Usage:
+    python tools/prune_css.py
+    python tools/prune_css.py --out pruned-css --json prune.json
+"""
+from pathlib import Path
+import argparse
+import ast
+import json
+import posixpath
+import re
+
+from critical_css import stylesheet_links
+from css_select import (Matcher, Unresolved, drop_unused_at_rules, parse_css, parse_dom, serialize,
+                        split_selectors)
+from minify import minify_css
+
+ROOT = Path(__file__).resolve().parents[1]
+CSS_DIR = 'css/'
+# toggled by js/main.js (mobile menu, carousel) and the nav toggle button itself
+ALLOWLIST = {'nav-toggle', 'open', 'active'}
+# travel-guide generators and the directory their pages are written to
+GENERATORS = ['fora_automation.py', 'fora_pdf_to_web.py', 'fora_google_sheets_automation.py']
+GENERATED_DIR = 'travel-guides'
+SCRIPT_CLASS_RE = re.compile(r'classList\.(?:add|toggle|replace)\(([^)]*)\)')
+SCRIPT_ATTR_RE = re.compile(r'''setAttribute\(\s*['"]([\w:-]+)['"]''')
+STRING_RE = re.compile(r'''['"]([\w-]+)['"]''')
+# class attributes in HTML that scripts build in strings/template literals (innerHTML),
+# and className assignments; interpolated parts (${...}) are skipped
+SCRIPT_MARKUP_CLASS_RE = re.compile(r'''\bclass(?:Name)?\s*=\s*\\?["'`]([^"'`\\]*)''')
+CLASS_TOKEN_RE = re.compile(r'^-?[A-Za-z_][\w-]*$')
+INLINE_SCRIPT_RE = re.compile(r'<script\b(?![^>]*\bsrc\s*=)[^>]*>(.*?)</script\s*>', re.I | re.S)
+SELECTOR_NAME_RE = re.compile(r'[.#]((?:[\w-]|\\.)+)|\[\s*([\w:-]+)')
+
+
+def script_names(texts):
+    """Class and attribute names scripts add, toggle or render at runtime"""
+    names = set()
+    for text in texts:
+        for m in SCRIPT_CLASS_RE.finditer(text):
+            names.update(STRING_RE.findall(m.group(1)))
+        names.update(m.group(1).lower() for m in SCRIPT_ATTR_RE.finditer(text))
+        for m in SCRIPT_MARKUP_CLASS_RE.finditer(text):
+            names.update(t for t in m.group(1).split() if CLASS_TOKEN_RE.match(t))
+    return names
+
+
+def generator_markup(source):
+    """The HTML a generator writes, taken from the string literals in its source.
+
+    Literals are read with ast rather than by importing the module, so this works
+    without the generators' third-party dependencies; interpolated values are
+    left out. Fragments built separately (highlights, tags) end up as siblings
+    of the page template rather than inside it."""
+    chunks = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.JoinedStr):
+            text = ''.join(v.value for v in node.values if isinstance(v, ast.Constant) and isinstance(v.value, str))
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            text = node.value
+        else:
+            continue
+        if '<' in text and '>' in text:
+            chunks.append((node.lineno, node.col_offset, text))
+    return '\n'.join(text for _, _, text in sorted(chunks))
+
+
+class Pruner:
+    def __init__(self, graph, pages, allowlist=ALLOWLIST):
+        """pages: the published pages (site-relative); graph: an updated RefGraph"""
+        self.graph = graph
+        self.index = graph.index
+        self.docs = {}  # page rel -> (Matcher, stylesheets it loads)
+        inline_scripts = []
+        for rel in pages:
+            html = (ROOT / rel).read_text(encoding='utf-8', errors='ignore')
+            sheets = {a for a in graph.assets(rel) if a.lower().endswith('.css')}
+            self.docs[rel] = (Matcher(*parse_dom(html)), sheets)
+            inline_scripts.extend(INLINE_SCRIPT_RE.findall(html))
+        for name in GENERATORS:
+            if not (ROOT / name).exists():
+                continue
+            html = generator_markup((ROOT / name).read_text(encoding='utf-8', errors='ignore'))
+            sheets = {self.index.rel_path(href, GENERATED_DIR) for _, href in stylesheet_links(html)}
+            self.docs[f'{GENERATED_DIR}/({name})'] = (Matcher(*parse_dom(html)), sheets - {None})
+        scripts = sorted({a for rel in pages for a in graph.assets(rel) if a.lower().endswith('.js')})
+        self.allow = set(allowlist) | script_names(
+            [(ROOT / s).read_text(encoding='utf-8', errors='ignore') for s in scripts] + inline_scripts)
+        self.inputs = sorted(self.docs) + scripts  # what pruning depends on, for build caching
+        self._used = {}  # selector -> True / False / Unresolved
+
+    def pages_loading(self, css_rel):
+        return sorted(rel for rel, (_, sheets) in self.docs.items() if css_rel in sheets)
+
+    def allowlisted(self, selector):
+        return any((cls or attr).replace('\\', '') in self.allow
+                   for cls, attr in SELECTOR_NAME_RE.findall(selector))
+
+    def used(self, selector, pages):
+        key = (selector, tuple(pages))
+        if key not in self._used:
+            try:
+                self._used[key] = any(self.docs[p][0].matches_any(selector) for p in pages)
+            except Unresolved:
+                self._used[key] = Unresolved
+        return self._used[key]
+
+    def _prune(self, rules, pages, report):
+        kept = []
+        for r in rules:
+            if r.kind == 'style':
+                selectors = split_selectors(r.prelude)
+                keep = []
+                for sel in selectors:
+                    used = self.used(sel, pages)
+                    if used is Unresolved:
+                        report['unresolved'].append(sel)
+                        keep.append(sel)
+                    elif used:
+                        keep.append(sel)
+                    elif self.allowlisted(sel):
+                        report['allowlisted'].append(sel)
+                        keep.append(sel)
+                    else:
+                        report['removed_selectors'] += 1
+                if keep:
+                    kept.append(type(r)('style', ','.join(keep), r.body))
+                else:
+                    report['removed_rules'] += 1
+            elif r.kind == 'group':
+                children = self._prune(r.children, pages, report)
+                if children:
+                    kept.append(type(r)('group', r.prelude, children=children))
+            else:
+                kept.append(r)
+        return kept
+
+    def prune(self, css_rel, css):
+        """(pruned CSS, report) for one stylesheet's text"""
+        pages = self.pages_loading(css_rel)
+        report = {'stylesheet': css_rel, 'pages': len(pages), 'removed_rules': 0, 'removed_selectors': 0,
+                  'unresolved': [], 'allowlisted': []}
+        pruned = serialize(drop_unused_at_rules(self._prune(parse_css(css), pages, report)))
+        report['bytes_before'] = len(minify_css(css).encode())
+        report['bytes_after'] = len(minify_css(pruned).encode())
+        report['unresolved'] = sorted(set(report['unresolved']))
+        report['allowlisted'] = sorted(set(report['allowlisted']))
+        return pruned, report
+
+
+def print_report(reports):
+    print(f"{'stylesheet':28} {'pages':>5} {'before KB':>9} {'after KB':>8} {'saved':>6} {'rules removed':>13}")
+    for r in reports:
+        saved = 1 - r['bytes_after'] / r['bytes_before'] if r['bytes_before'] else 0
+        print(f"{r['stylesheet']:28} {r['pages']:>5} {r['bytes_before'] / 1024:>9.1f} "
+              f"{r['bytes_after'] / 1024:>8.1f} {saved:>6.0%} {r['removed_rules']:>13}")
+        if not r['pages']:
+            print('   not loaded by any published page')
+        for sel in r['unresolved']:
+            print(f'   kept, could not resolve statically: {sel}')
+    total = sum(r['bytes_before'] - r['bytes_after'] for r in reports)
+    print(f'Total saved: {total / 1024:.1f} KB (minified)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report (and optionally write) pruned stylesheets')
+    parser.add_argument('stylesheets', nargs='*', help='site-relative stylesheets (default: everything in css/)')
+    parser.add_argument('--out', metavar='DIR', help='write the pruned stylesheets into DIR')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    from build_site import Builder  # build_site imports this module
+    builder = Builder()
+    pages, _ = builder.sources()
+    pruner = Pruner(builder.graph, pages)
+    sheets = args.stylesheets or sorted(r for r in builder.index.sizes
+                                        if r.startswith(CSS_DIR) and r.lower().endswith('.css'))
+    reports = []
+    for rel in sheets:
+        pruned, report = pruner.prune(rel, (ROOT / rel).read_text(encoding='utf-8', errors='ignore'))
+        reports.append(report)
+        if args.out:
+            target = Path(args.out) / posixpath.relpath(rel, CSS_DIR)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(minify_css(pruned), encoding='utf-8')
+    print_report(reports)
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2), encoding='utf-8')
+        print('Wrote', args.json)
+    return reports
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Site-wide reference graph: which pages, stylesheets and scripts use which files.
+
+Every published HTML, CSS and JS file is parsed once for href/src/srcset/poster,
+CSS url()/@import and quoted asset paths in JavaScript. The raw references are
+kept in tools/.ref-graph.json keyed by content hash, so a re-run only re-parses
+files that changed; references are resolved against the site tree index on each
+run, so added or deleted files are always reflected.
+
+Usage:
+    python tools/ref_graph.py unreferenced --prefix images/   # safe-to-prune candidates
+    python tools/ref_graph.py weight index.html resources.html
+    python tools/ref_graph.py dependents images/hero.jpg      # pages that break if it goes
+    python tools/ref_graph.py unreferenced --json unreferenced.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+
+from html_audit import EXCLUDE, discover_pages
+from site_index import OK, CASE_MISMATCH, SiteIndex
+
+ROOT = Path(__file__).resolve().parents[1]
+GRAPH_FILE = ROOT / 'tools' / '.ref-graph.json'
+# bump when extraction changes so cached references are re-parsed
+PARSER_VERSION = 1
+SOURCE_GLOBS = ['*.html', '*.htm', '*.css', '*.js']
+PAGE_EXTS = ('.html', '.htm')
+
+# reference kinds: 'asset' is loaded with the page, 'link' is only navigated to
+ASSET, LINK = 'asset', 'link'
+URL_ATTRS = {'src', 'href', 'poster', 'data-src', 'data-bg', 'action'}
+LINK_TAGS = {'a', 'area', 'form'}
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3''', re.I)
+JS_PATH_RE = re.compile(r'''["'`]([^"'`\s<>{}()]+?\.(?:png|jpe?g|gif|webp|avif|svg|ico|css|js|json|html?|pdf'''
+                        r'''|mp4|webm|woff2?|ttf|otf))(?:[?#][^"'`\s]*)?["'`]''', re.I)
+
+
+def css_refs(text):
+    return [m.group(2) or m.group(4) for m in CSS_URL_RE.finditer(text)]
+
+
+def js_refs(text):
+    return [m.group(1) for m in JS_PATH_RE.finditer(text)]
+
+
+class RefParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.refs = []  # [kind, ref]
+        self.in_style = False
+        self.in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        kind = LINK if tag in LINK_TAGS else ASSET
+        if tag == 'link' and 'stylesheet' not in (attrs.get('rel') or '').lower() \
+                and 'icon' not in (attrs.get('rel') or '').lower() \
+                and 'preload' not in (attrs.get('rel') or '').lower():
+            # canonical, alternate, ... are not loaded with the page
+            kind = LINK
+        for name, value in attrs.items():
+            if value and name in URL_ATTRS:
+                self.refs.append([kind, value])
+            elif value and name in ('srcset', 'data-srcset', 'imagesrcset'):
+                self.refs.extend([ASSET, part.split()[0]] for part in value.split(',') if part.strip())
+            elif value and name == 'style':
+                self.refs.extend([ASSET, r] for r in css_refs(value))
+        if tag == 'meta' and (attrs.get('property') or attrs.get('name') or '').lower() in ('og:image', 'twitter:image'):
+            self.refs.append([LINK, attrs.get('content') or ''])
+        self.in_style = tag == 'style'
+        self.in_script = tag == 'script'
+
+    def handle_endtag(self, tag):
+        if tag in ('style', 'script'):
+            self.in_style = self.in_script = False
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.refs.extend([ASSET, r] for r in css_refs(data))
+        elif self.in_script:
+            self.refs.extend([ASSET, r] for r in js_refs(data))
+
+
+def extract_refs(path: Path):
+    """(sha256, [[kind, ref], ...]) for one HTML/CSS/JS file; content-only"""
+    data = path.read_bytes()
+    text = data.decode('utf-8', errors='ignore')
+    ext = path.suffix.lower()
+    if ext in PAGE_EXTS:
+        parser = RefParser()
+        parser.feed(text)
+        parser.close()
+        refs = parser.refs
+    elif ext == '.css':
+        refs = [[ASSET, r] for r in css_refs(text)]
+    else:
+        refs = [[ASSET, r] for r in js_refs(text)]
+    return hashlib.sha256(data).hexdigest(), refs
+
+
+class RefGraph:
+    """Resolved edges between site files (site-relative posix paths).
+
+    edges[src] is {target: kind}; missing[src] lists references that resolve
+    to nothing, case_mismatch[src] those that only match with different case.
+    """
+
+    def __init__(self, root=ROOT, path=None):
+        self.root = Path(root).resolve()
+        self.path = Path(path or GRAPH_FILE)
+        try:
+            stored = json.loads(self.path.read_text(encoding='utf-8'))
+            self.files = stored['files'] if stored.get('version') == PARSER_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+        self.index = None
+        self.edges = {}
+        self.missing = {}
+        self.case_mismatch = {}
+
+    def update(self, sources=None, workers=None):
+        """Re-parse changed sources, drop deleted ones and rebuild the resolved edges.
+        Returns the number of files parsed."""
+        if sources is None:
+            sources = discover_pages(self.root, SOURCE_GLOBS, EXCLUDE)
+        current = {}
+        todo = []
+        for p in sources:
+            rel = p.relative_to(self.root).as_posix()
+            st = p.stat()
+            entry = self.files.get(rel)
+            if entry and (entry['size'], entry['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+                current[rel] = entry
+            else:
+                todo.append((rel, p, st))
+        if len(todo) < 2 or workers == 1:
+            parsed = [extract_refs(p) for _, p, _ in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(extract_refs, [p for _, p, _ in todo], chunksize=8))
+        for (rel, p, st), (digest, refs) in zip(todo, parsed):
+            current[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'digest': digest, 'refs': refs}
+        changed = bool(todo) or set(current) != set(self.files)
+        self.files = current
+        if changed:
+            self.save()
+        self.resolve()
+        return len(todo)
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({'version': PARSER_VERSION, 'files': self.files}, separators=(',', ':')),
+                       encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def resolve(self):
+        self.index = SiteIndex(self.root)
+        self.edges, self.missing, self.case_mismatch = {}, {}, {}
+        for rel, entry in self.files.items():
+            from_dir = posixpath.dirname(rel)
+            is_js = rel.lower().endswith('.js')
+            edges = self.edges.setdefault(rel, {})
+            for kind, ref in entry['refs']:
+                status, target = self.index.resolve(ref, from_dir)
+                if status != OK and is_js and not ref.startswith(('/', '.')):
+                    # scripts fetch relative to the page that loads them; most live at the root
+                    status, target = self.index.resolve(ref, '')
+                if status == OK:
+                    if edges.get(target) != ASSET:
+                        edges[target] = kind
+                elif status == CASE_MISMATCH:
+                    self.case_mismatch.setdefault(rel, []).append([ref, target])
+                elif target is not None and not is_js:
+                    # JS string matches are heuristic; only report misses from markup and CSS
+                    self.missing.setdefault(rel, []).append(ref)
+
+    def referenced(self):
+        return {t for edges in self.edges.values() for t in edges}
+
+    def unreferenced(self, prefix=''):
+        """Files under prefix that no scanned page, stylesheet or script references"""
+        used = self.referenced()
+        return sorted(rel for rel in self.index.sizes
+                      if rel.startswith(prefix) and rel not in used and not rel.lower().endswith(PAGE_EXTS))
+
+    def assets(self, page):
+        """Everything loaded with a page: its direct assets plus what their CSS/JS pulls in"""
+        seen, stack = set(), [page]
+        while stack:
+            for target, kind in self.edges.get(stack.pop(), {}).items():
+                if kind == ASSET and target not in seen and not target.lower().endswith(PAGE_EXTS):
+                    seen.add(target)
+                    stack.append(target)
+        return seen
+
+    def weight(self, page):
+        assets = self.assets(page)
+        return {'page': page, 'html_bytes': self.index.size(page) or 0,
+                'asset_bytes': sum(self.index.size(a) or 0 for a in assets), 'assets': sorted(assets)}
+
+    def dependents(self, target):
+        """Pages that break if target is deleted, directly or via a stylesheet/script, with the path taken.
+        target is a site-relative path ('./' and Windows separators are fine); ValueError if no
+        such file is in the site."""
+        status, rel = self.index.resolve(target.replace('\\', '/'))
+        if status not in (OK, CASE_MISMATCH) or rel not in self.index.sizes:
+            raise ValueError(f"{target}: no such file in the site")
+        target = rel
+        reverse = {}
+        for src, edges in self.edges.items():
+            for t in edges:
+                reverse.setdefault(t, []).append(src)
+        found, stack, seen = {}, [(target, [target])], {target}
+        while stack:
+            node, chain = stack.pop()
+            for src in reverse.get(node, []):
+                if src in seen:
+                    continue
+                seen.add(src)
+                if src.lower().endswith(PAGE_EXTS):
+                    found[src] = [src] + chain
+                else:
+                    stack.append((src, [src] + chain))
+        return dict(sorted(found.items()))
+
+
+def _mb(n):
+    return f"{n / 1024 / 1024:.1f} MB"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Site-wide reference graph')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--json', metavar='PATH', help='write the query result as JSON')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('unreferenced', help='files nothing references')
+    p.add_argument('--prefix', default='images/', help="only files under this path (default: images/; '' for all)")
+    p = sub.add_parser('weight', help='bytes each page pulls in')
+    p.add_argument('pages', nargs='*', help='site-relative pages (default: every published page)')
+    p = sub.add_parser('dependents', help='pages that break if a file is removed')
+    p.add_argument('targets', nargs='+', help='site-relative file paths')
+    sub.add_parser('broken', help='references to missing files and case mismatches')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    graph = RefGraph()
+    parsed = graph.update(workers=args.workers)
+    print(f'Reference graph: {len(graph.files)} files scanned ({parsed} re-parsed), '
+          f'{sum(len(e) for e in graph.edges.values())} edges')
+
+    if args.command == 'unreferenced':
+        rels = graph.unreferenced(args.prefix)
+        total = sum(graph.index.size(r) for r in rels)
+        print(f"Unreferenced under '{args.prefix or '.'}': {len(rels)} files ({_mb(total)})")
+        for rel in rels:
+            print(f" - {rel}\t{graph.index.size(rel) / 1024:.0f} KB")
+        result = {'prefix': args.prefix, 'bytes': total, 'files': rels}
+    elif args.command == 'weight':
+        pages = args.pages or sorted(r for r in graph.files if r.lower().endswith(PAGE_EXTS))
+        result = [graph.weight(p) for p in pages]
+        for w in sorted(result, key=lambda w: -(w['html_bytes'] + w['asset_bytes'])):
+            print(f" - {w['page']}\t{_mb(w['html_bytes'] + w['asset_bytes'])}\t"
+                  f"(html {w['html_bytes'] / 1024:.0f} KB + {len(w['assets'])} assets {_mb(w['asset_bytes'])})")
+    elif args.command == 'dependents':
+        result, unknown = {}, []
+        for target in args.targets:
+            try:
+                result[target] = graph.dependents(target)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                unknown.append(target)
+                continue
+            print(f"{target}: {len(result[target])} page(s)")
+            for page, chain in result[target].items():
+                print('   ' + ' -> '.join(chain))
+    else:
+        result = {'missing': graph.missing, 'case_mismatch': graph.case_mismatch}
+        for src, refs in sorted(graph.missing.items()):
+            for ref in refs:
+                print(f" - {src}: missing {ref}")
+        for src, pairs in sorted(graph.case_mismatch.items()):
+            for ref, actual in pairs:
+                print(f" - {src}: case mismatch {ref} (file is {actual})")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2), encoding='utf-8')
+        print('Wrote', args.json)
+    if args.command == 'dependents' and unknown:
+        sys.exit(2)
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""In-memory index of the site tree for resolving local references.
+
+One os.walk records every file's site-relative path and size, plus a
+lower-cased lookup so references that only differ in case can be reported:
+they work on Windows (and macOS) but 404 on Netlify's Linux hosting.
+"""
+from pathlib import Path
+from urllib.parse import unquote
+import os
+import posixpath
+
+ROOT = Path(__file__).resolve().parents[1]
+# never part of the source site (dist/ is build output)
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', 'dist'}
+EXTERNAL_PREFIXES = ('http://', 'https://', '//', 'data:', 'mailto:', 'tel:', 'javascript:', '#')
+
+OK = 'ok'
+MISSING = 'missing'
+CASE_MISMATCH = 'case-mismatch'
+EXTERNAL = 'external'
+
+
+class SiteIndex:
+    def __init__(self, root=ROOT):
+        self.root = Path(root).resolve()
+        self.sizes = {}  # rel path -> bytes
+        self.dirs = {''}
+        self.lower = {}  # lower-cased rel path -> actual rel path (files and dirs)
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            rel_dir = Path(dirpath).relative_to(self.root).as_posix()
+            prefix = '' if rel_dir == '.' else rel_dir + '/'
+            for d in dirnames:
+                self.dirs.add(prefix + d)
+                self.lower.setdefault((prefix + d).lower(), prefix + d)
+            for name in filenames:
+                rel = prefix + name
+                try:
+                    self.sizes[rel] = os.stat(os.path.join(dirpath, name)).st_size
+                except OSError:
+                    continue
+                self.lower.setdefault(rel.lower(), rel)
+
+    def rel_path(self, ref, from_dir=''):
+        """Site-relative path a local reference points at, or None for external
+        URLs, fragments and paths that climb out of the site"""
+        ref = ref.strip()
+        if not ref or ref.lower().startswith(EXTERNAL_PREFIXES):
+            return None
+        path = unquote(ref.split('#')[0].split('?')[0])
+        if not path:
+            return None
+        joined = path.lstrip('/') if path.startswith('/') else posixpath.join(from_dir, path)
+        rel = posixpath.normpath(joined)
+        if rel == '.':
+            return ''
+        if rel.startswith('../'):
+            return None
+        return rel
+
+    def resolve(self, ref, from_dir=''):
+        """(status, rel path) for a reference made from a page in from_dir.
+
+        status is OK, MISSING, CASE_MISMATCH (rel path is then the file that
+        actually exists) or EXTERNAL. Directory references resolve to their
+        index.html.
+        """
+        rel = self.rel_path(ref, from_dir)
+        if rel is None:
+            return EXTERNAL, None
+        if rel in self.dirs:
+            rel = posixpath.join(rel, 'index.html') if rel else 'index.html'
+        if rel in self.sizes:
+            return OK, rel
+        actual = self.lower.get(rel.lower())
+        if actual is not None:
+            return CASE_MISMATCH, actual
+        return MISSING, rel
+
+    def exists(self, rel):
+        return rel in self.sizes
+
+    def size(self, rel):
+        return self.sizes.get(rel)
+
+
+_shared = {}
+
+
+def shared_index(root=ROOT):
+    """Index built on first use and reused for the rest of the process"""
+    root = Path(root).resolve()
+    if root not in _shared:
+        _shared[root] = SiteIndex(root)
+    return _shared[root]